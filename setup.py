@@ -32,6 +32,7 @@ setup(
     entry_points={
         "console_scripts": [
             "macd-etf-analyzer=macd_etf_analyzer.__main__:main",
+            "macd-etf-service=macd_etf_analyzer.service:main",
         ],
     },
 ) 
\ No newline at end of file
@@ -1,156 +1,253 @@
 import os
-import numpy as np
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
 from .data.fetcher import download_data
-from .strategies.macd import get_macd_signals, get_macd_signals_zero_cross
-from .strategies.vpvma import get_vpvma_signals, get_vpvma_signals_zero_cross
-from .utils.performance import calculate_performance_metrics, get_trade_info
+from .data.async_fetcher import AsyncFetcher
+from .data.store import BarStore, BAR_STORE_DIR, update_store
+from .pipeline import analyze_strategy_performance, process_etf, run_pipeline
+from .strategies.scan import scan_daily, scan_store
+from .utils.scheduler import get_scheduler
+from .utils.timeframes import DEFAULT_TIMEFRAMES, generate_timeframe_report
+from .utils.walk_forward import generate_walk_forward_report
+from .utils.portfolio import generate_portfolio_report
+from .utils.correlation import generate_correlation_report
+from .utils.sharding import run_coordinator, run_worker
+from .utils.significance import run_significance_tests
 from .utils.summary import generate_etf_summary, save_summary_report, generate_trade_logs_summary
 from .visualization.summary_plots import generate_summary_visualizations
+from .visualization.dashboard import generate_dashboard
+from .visualization.correlation_plots import plot_clustered_correlation
 
-def analyze_strategy_performance(results, symbol):
-    """Analyze and compare strategy performance for a ticker"""
-    strategy_metrics = {
-        'MACD': results[0],
-        'MACD Zero-Cross': results[1],
-        'VPVMA': results[2],
-        'VPVMA Zero-Cross': results[3]
-    }
-    
-    # Calculate Sharpe ratio for each strategy
-    sharpe_ratios = {}
-    for strategy_name, df in strategy_metrics.items():
-        returns = df['Strategy_Returns']
-        sharpe = np.sqrt(52) * returns.mean() / returns.std() if returns.std() != 0 else 0
-        sharpe_ratios[strategy_name] = sharpe
-    
-    # Find best strategy
-    best_strategy = max(sharpe_ratios.items(), key=lambda x: x[1])
-    
-    # Save performance comparison to ticker directory
-    ticker_dir = os.path.join('data', symbol.replace('^', ''))
-    performance_file = os.path.join(ticker_dir, 'strategy_comparison.txt')
-    
-    with open(performance_file, 'w') as f:
-        f.write(f"Strategy Performance Comparison for {symbol}\n")
-        f.write("=" * 50 + "\n\n")
-        f.write("Sharpe Ratios:\n")
-        for strategy, sharpe in sharpe_ratios.items():
-            f.write(f"{strategy}: {sharpe:.2f}\n")
-        f.write(f"\nBest Strategy: {best_strategy[0]} (Sharpe: {best_strategy[1]:.2f})")
-    
-    return best_strategy[0], sharpe_ratios
+def print_etf_results(etf, results):
+    """Print the Sharpe ratios of one ETF"""
+    _, best_strategy, sharpe_ratios = results
+    print(f"\nResults for {etf}:")
+    print(f"Best Strategy: {best_strategy}")
+    print("Sharpe Ratios:")
+    for strategy, sharpe in sharpe_ratios.items():
+        print(f"{strategy}: {sharpe:.2f}")
 
-def process_etf(symbol, start_date='2005-01-01', end_date='2023-12-31', initial_capital=1_000_000):
-    """Process all strategies for a single ETF"""
-    try:
-        # Create ETF-specific directory
-        ticker_dir = os.path.join('data', symbol.replace('^', ''))
-        os.makedirs(ticker_dir, exist_ok=True)
-        
-        # Download data once and reuse
-        df, vix_df = download_data(symbol, start_date, end_date)
-        
-        # Process all strategies in parallel
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = []
-            futures.append(executor.submit(get_macd_signals, df=df.copy(), symbol=symbol))
-            futures.append(executor.submit(get_macd_signals_zero_cross, df=df.copy(), symbol=symbol))
-            futures.append(executor.submit(get_vpvma_signals, df=df.copy(), vix_df=vix_df.copy(), symbol=symbol))
-            futures.append(executor.submit(get_vpvma_signals_zero_cross, df=df.copy(), vix_df=vix_df.copy(), symbol=symbol))
-            
-            results = [f.result() for f in as_completed(futures)]
-            
-            # Analyze strategy performance
-            best_strategy, sharpe_ratios = analyze_strategy_performance(results, symbol)
-            print(f"\n{symbol} Best Strategy: {best_strategy}")
-            
-            # Generate trade logs for each strategy
-            strategy_names = ['MACD', 'MACD Zero-Cross', 'VPVMA', 'VPVMA Zero-Cross']
-            for i, strategy_name in enumerate(strategy_names):
-                get_trade_info(results[i], strategy_name, symbol)
-            
-            return results, best_strategy, sharpe_ratios
-            
-    except Exception as e:
-        print(f"Error processing {symbol}: {str(e)}")
-        return None
+# ETFs analyzed by default
+DEFAULT_ETFS = [
+    # Country/Region ETFs
+    'EEM',  # Emerging Markets
+    'VWO',  # Emerging Markets
+    'FXI',  # China Large-Cap
+    'AAXJ', # Asia ex-Japan
+    'EWJ',  # Japan
+    'ACWX', # All Country World ex-US
+    'CHIX', # China Technology
+    'CQQQ', # China Technology
+    'EWZ',  # Brazil
+    'ERUS', # Russia
+    'EWC',  # Canada
+    'EWU',  # United Kingdom
+    'VGK',  # Europe
+    'VPL',  # Pacific
+    
+    # Sector ETFs
+    'XLF',  # Financial Sector
+    'XLE',  # Energy Sector
+    'XLK',  # Technology Sector
+    'XLV',  # Healthcare Sector
+    'XLI',  # Industrial Sector
+    'XLP',  # Consumer Staples Sector
+    'XLY',  # Consumer Discretionary Sector
+    'XLB',  # Materials Sector
+    'XLU',  # Utilities Sector
+    'XLRE', # Real Estate Sector
+    
+    # Bond ETFs
+    'AGG',  # US Aggregate Bond
+    'BND',  # Total Bond Market
+    'TLT',  # 20+ Year Treasury Bond
+    'IEF',  # 7-10 Year Treasury Bond
+    'SHY',  # 1-3 Year Treasury Bond
+    'LQD',  # Investment Grade Corporate Bond
+    'HYG',  # High Yield Corporate Bond
+    'MUB',  # Municipal Bond
+    'EMB',  # Emerging Markets Bond
+    'BNDX'  # Total International Bond
+]
 
-def main():
-    # List of ETFs to analyze
-    etfs = [
-        # Country/Region ETFs
-        'EEM',  # Emerging Markets
-        'VWO',  # Emerging Markets
-        'FXI',  # China Large-Cap
-        'AAXJ', # Asia ex-Japan
-        'EWJ',  # Japan
-        'ACWX', # All Country World ex-US
-        'CHIX', # China Technology
-        'CQQQ', # China Technology
-        'EWZ',  # Brazil
-        'ERUS', # Russia
-        'EWC',  # Canada
-        'EWU',  # United Kingdom
-        'VGK',  # Europe
-        'VPL',  # Pacific
-        
-        # Sector ETFs
-        'XLF',  # Financial Sector
-        'XLE',  # Energy Sector
-        'XLK',  # Technology Sector
-        'XLV',  # Healthcare Sector
-        'XLI',  # Industrial Sector
-        'XLP',  # Consumer Staples Sector
-        'XLY',  # Consumer Discretionary Sector
-        'XLB',  # Materials Sector
-        'XLU',  # Utilities Sector
-        'XLRE', # Real Estate Sector
-        
-        # Bond ETFs
-        'AGG',  # US Aggregate Bond
-        'BND',  # Total Bond Market
-        'TLT',  # 20+ Year Treasury Bond
-        'IEF',  # 7-10 Year Treasury Bond
-        'SHY',  # 1-3 Year Treasury Bond
-        'LQD',  # Investment Grade Corporate Bond
-        'HYG',  # High Yield Corporate Bond
-        'MUB',  # Municipal Bond
-        'EMB',  # Emerging Markets Bond
-        'BNDX'  # Total International Bond
-    ]
-    
-    # Dictionary to store results for all ETFs
-    etf_results = {}
-    
-    # Process ETFs in parallel
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = {executor.submit(process_etf, etf): etf for etf in etfs}
-        for future in as_completed(futures):
-            etf = futures[future]
+def run_etfs(etfs, incremental=True, **kwargs):
+    """
+    Run the pipeline on ETFs the way the command line does
+    
+    Daily bars come from the bar store when there is one and are
+    downloaded otherwise, and each strategy's persisted run is extended
+    with the new weeks (incremental=False reruns the whole history);
+    kwargs go to run_pipeline.
+    """
+    scheduler = get_scheduler()
+    store = BarStore(BAR_STORE_DIR) if os.path.exists(BAR_STORE_DIR) else None
+    with AsyncFetcher() as fetcher:
+        etf_results = run_pipeline(etfs, scheduler, fetcher=fetcher, store=store, on_result=print_etf_results,
+                                   incremental=incremental, **kwargs)
+    print(f"\n{scheduler.report()}")
+    print(f"Downloads: {fetcher.stats}")
+    return etf_results
+
+def load_bars(symbol, start_date='2005-01-01', end_date='2023-12-31', store=None):
+    """(df, vix_df) daily bars of a symbol from the bar store when it holds them up to end_date, downloaded otherwise"""
+    if store is not None and store.covers(symbol, end_date):
+        return store.load(symbol, start_date, end_date)
+    return download_data(symbol, start_date, end_date)
+
+def ingest_bars(path, etfs=None, start_date='2005-01-01', end_date=None):
+    """Bring the bar store at path up to end_date (see data.store.update_store)"""
+    if not etfs:
+        etfs = BarStore(path).symbols if os.path.exists(path) else DEFAULT_ETFS
+    with AsyncFetcher() as fetcher:
+        appended, failures = update_store(path, etfs, fetcher.fetch_many, start_date, end_date)
+    store = BarStore(path)
+    print(f"Appended {sum(appended.values())} bars for {len(appended)} symbols; "
+          f"{len(store.symbols)} symbols through {store.calendar[-1].date() if len(store) else None}")
+    for symbol, error in failures.items():
+        print(f"Error fetching {symbol}: {error}")
+    return appended, failures
+
+def scan_etfs(path, etfs=None, output_file=os.path.join('data', 'summary', 'signal_scan.csv')):
+    """
+    Latest signal of each ETF from its trailing weeks (see strategies.scan.scan_signals)
+    
+    Bars come from the bar store at path when it holds every ETF up to
+    today; ETFs it lacks or holds only stale bars of are downloaded. The
+    table is printed and saved as CSV.
+    """
+    store = BarStore(path) if os.path.exists(path) else None
+    if not etfs:
+        etfs = [symbol for symbol in store.symbols if symbol != '^VIX'] if store is not None else DEFAULT_ETFS
+    if store is not None and all(store.covers(symbol) for symbol in etfs):
+        scan_df = scan_store(store, etfs)
+    else:
+        frames, vix_df = {}, None
+        for symbol in etfs:
             try:
-                results = future.result()
-                if results:
-                    etf_results[etf] = results
-                    _, best_strategy, sharpe_ratios = results
-                    print(f"\nResults for {etf}:")
-                    print(f"Best Strategy: {best_strategy}")
-                    print("Sharpe Ratios:")
-                    for strategy, sharpe in sharpe_ratios.items():
-                        print(f"{strategy}: {sharpe:.2f}")
+                frames[symbol], vix_df = load_bars(symbol, end_date=None, store=store)
             except Exception as e:
-                print(f"Error processing {etf}: {str(e)}")
+                print(f"Error fetching {symbol}: {str(e)}")
+        scan_df = scan_daily(frames, vix_df)
+    
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    scan_df.to_csv(output_file, index=False)
+    print(scan_df.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    print(f"\nSignal scan saved to {output_file}")
+    return scan_df
+
+def run_symbol_reports(report, etfs, start_date='2005-01-01', end_date='2023-12-31', **kwargs):
+    """
+    Run a per-symbol report on the daily bars of each ETF
+    
+    report is called as report(symbol, df, vix_df, **kwargs), e.g.
+    generate_walk_forward_report or generate_timeframe_report; a failing
+    symbol is reported and skipped.
+    """
+    store = BarStore(BAR_STORE_DIR) if os.path.exists(BAR_STORE_DIR) else None
+    outputs = {}
+    for symbol in etfs:
+        try:
+            df, vix_df = load_bars(symbol, start_date, end_date, store)
+            outputs[symbol] = report(symbol, df, vix_df, **kwargs)
+        except Exception as e:
+            print(f"Error processing {symbol}: {str(e)}")
+    return outputs
+
+def generate_reports(etf_results):
+    """Write the summary, trade, portfolio, significance and correlation reports and the visualizations"""
+    nbytes = sum(result.nbytes for results, _, _ in etf_results.values() for result in results.values())
+    print(f"Results memory: {nbytes / 1e6:.2f} MB ({nbytes / len(etf_results) / 1e3:.1f} KB per ETF)")
+    
+    print("\nGenerating summary reports...")
+    summary_df = generate_etf_summary(etf_results)
+    
+    # Add significance of the best strategy's Sharpe next to it
+    significance_df = run_significance_tests(etf_results)
+    summary_df = summary_df.merge(
+        significance_df.drop(columns='Sharpe Ratio').rename(columns={'Strategy': 'Best Strategy'}),
+        on=['ETF', 'Best Strategy'], how='left')
+    save_summary_report(summary_df)
+    generate_trade_logs_summary(etf_results)
+    generate_portfolio_report(etf_results)
+    correlation, _, link = generate_correlation_report(etf_results)
+    
+    # Generate summary visualizations
+    print("\nGenerating summary visualizations...")
+    generate_summary_visualizations()
+    plot_clustered_correlation(correlation, link)
+    generate_dashboard(etf_results, summary_df)
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest MACD and VPVMA strategies on ETFs")
+    parser.add_argument('--full', action='store_true',
+                        help="Rerun every strategy on the whole history instead of extending the saved runs")
+    commands = parser.add_subparsers(dest='command')
+    coordinate = commands.add_parser('coordinate', help="Split the ETFs into shards for workers and merge their results")
+    coordinate.add_argument('queue', help="Queue directory shared with the workers")
+    coordinate.add_argument('--shard-size', type=int, default=4, help="ETFs per shard")
+    work = commands.add_parser('work', help="Run shards from a coordinator's queue")
+    work.add_argument('queue', help="Queue directory shared with the coordinator")
+    work.add_argument('--name', help="Worker name in the logs (default: <host>-<pid>)")
+    for command in (coordinate, work):
+        command.add_argument('--lease', type=float, default=600, help="Seconds before a silent worker's shard is reassigned")
+        command.add_argument('--poll', type=float, default=5.0, help="Seconds between queue polls")
+    walk_forward = commands.add_parser('walk-forward', help="Walk-forward optimize each strategy's parameters")
+    walk_forward.add_argument('etfs', nargs='*', default=DEFAULT_ETFS, help="ETF symbols (default: all)")
+    walk_forward.add_argument('--train-weeks', type=int, default=260, help="Weeks of each training window")
+    walk_forward.add_argument('--test-weeks', type=int, default=52, help="Weeks of each out-of-sample window")
+    walk_forward.add_argument('--workers', type=int, help="Worker processes per grid search (default: CPU count)")
+    timeframes = commands.add_parser('timeframes', help="Compare the strategies on daily, weekly and monthly bars")
+    timeframes.add_argument('etfs', nargs='*', default=DEFAULT_ETFS, help="ETF symbols (default: all)")
+    timeframes.add_argument('--freqs', nargs='+', default=list(DEFAULT_TIMEFRAMES),
+                            help="Bar frequencies (default: D W ME)")
+    ingest = commands.add_parser('ingest', help="Download new daily bars into the bar store")
+    ingest.add_argument('etfs', nargs='*', help="ETF symbols (default: those in the store, or all)")
+    ingest.add_argument('--store', default=BAR_STORE_DIR, help=f"Bar store directory (default: {BAR_STORE_DIR})")
+    ingest.add_argument('--start', default='2005-01-01', help="History start of symbols new to the store")
+    ingest.add_argument('--end', help="End of the bars, exclusive (default: today)")
+    scan = commands.add_parser('scan', help="Latest signal of each ETF from its trailing weeks only")
+    scan.add_argument('etfs', nargs='*', help="ETF symbols (default: those in the store, or all)")
+    scan.add_argument('--store', default=BAR_STORE_DIR, help=f"Bar store directory (default: {BAR_STORE_DIR})")
+    args = parser.parse_args()
+    
+    if args.command == 'scan':
+        scan_etfs(args.store, args.etfs)
+        return
+    
+    if args.command == 'ingest':
+        ingest_bars(args.store, args.etfs, args.start, args.end)
+        return
+    
+    if args.command == 'walk-forward':
+        run_symbol_reports(generate_walk_forward_report, args.etfs, train_weeks=args.train_weeks,
+                           test_weeks=args.test_weeks, max_workers=args.workers)
+        print("\nWalk-forward complete!")
+        return
+    
+    if args.command == 'timeframes':
+        run_symbol_reports(generate_timeframe_report, args.etfs, freqs=args.freqs)
+        print("\nTimeframe comparison complete!")
+        return
+    
+    if args.command == 'work':
+        # Workers run on the shared data directory; the coordinator writes the reports
+        ran = run_worker(args.queue, run_etfs, lease_seconds=args.lease, poll_seconds=args.poll, name=args.name)
+        print(f"\nRan {len(ran)} shards")
+        return
+    
+    if args.command == 'coordinate':
+        try:
+            options = {'incremental': False} if args.full else None
+            etf_results, _ = run_coordinator(args.queue, DEFAULT_ETFS, args.shard_size, options=options,
+                                             lease_seconds=args.lease, poll_seconds=args.poll)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        # Process ETFs on the shared I/O and CPU lanes, extending the runs saved by the previous invocation
+        etf_results = run_etfs(DEFAULT_ETFS, incremental=not args.full)
     
     # Generate summary reports if we have results
     if etf_results:
-        print("\nGenerating summary reports...")
-        summary_df = generate_etf_summary(etf_results)
-        save_summary_report(summary_df)
-        generate_trade_logs_summary(etf_results)
-        
-        # Generate summary visualizations
-        print("\nGenerating summary visualizations...")
-        generate_summary_visualizations()
+        generate_reports(etf_results)
     
     print("\nAnalysis complete!")
 
@@ -0,0 +1,285 @@
+import json
+import time
+import random
+import asyncio
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from .bars import to_market_time
+
+YAHOO_CHART_URL = 'https://query1.finance.yahoo.com/v8/finance/chart'
+
+# HTTP statuses worth retrying (throttling and server-side errors)
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+class FetchError(Exception):
+    """A symbol could not be fetched; retryable errors are retried by AsyncFetcher"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+class YFinanceProvider:
+    """Daily bars from yfinance (the blocking call runs in a worker thread, its requests time out after timeout seconds)"""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    async def fetch(self, symbol, start_date, end_date):
+        import yfinance as yf
+        df = await asyncio.to_thread(yf.Ticker(symbol).history, start=start_date, end=end_date, timeout=self.timeout)
+        if df.empty:
+            raise FetchError(f"No data returned for {symbol}")
+        return df
+
+class HttpChartProvider:
+    """
+    Daily bars from a Yahoo-style chart endpoint
+
+    GET {base_url}/{symbol}?period1=..&period2=..&interval=1d returns the
+    chart JSON; prices are adjusted with adjclose like yfinance's
+    auto_adjust. Pointing base_url at a local server allows offline runs.
+    """
+
+    def __init__(self, base_url=YAHOO_CHART_URL, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _get(self, url):
+        request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            raise FetchError(f"HTTP {e.code} for {url}", retryable=e.code in RETRYABLE_STATUSES) from e
+
+    async def fetch(self, symbol, start_date, end_date):
+        query = urllib.parse.urlencode({
+            'period1': int(pd.Timestamp(start_date, tz='UTC').timestamp()),
+            'period2': int(pd.Timestamp(end_date, tz='UTC').timestamp()),
+            'interval': '1d',
+            'events': 'div,split'
+        })
+        url = f"{self.base_url}/{urllib.parse.quote(symbol)}?{query}"
+        payload = await asyncio.to_thread(self._get, url)
+        return parse_chart(payload, symbol)
+
+def parse_chart(payload, symbol):
+    """Adjusted daily OHLCV frame from a chart JSON payload"""
+    try:
+        chart = payload['chart']['result'][0]
+        quote = chart['indicators']['quote'][0]
+        timezone = chart['meta'].get('exchangeTimezoneName', 'America/New_York')
+        index = pd.to_datetime(chart['timestamp'], unit='s', utc=True).tz_convert(timezone).normalize()
+    except (KeyError, IndexError, TypeError) as e:
+        raise FetchError(f"Malformed chart data for {symbol}", retryable=False) from e
+
+    df = pd.DataFrame({
+        'Open': quote['open'],
+        'High': quote['high'],
+        'Low': quote['low'],
+        'Close': quote['close'],
+        'Volume': quote['volume']
+    }, index=index, dtype=float).dropna(subset=['Close'])
+    adjclose = chart['indicators'].get('adjclose', [{}])[0].get('adjclose')
+    if adjclose is not None:
+        ratio = pd.Series(adjclose, index=index, dtype=float).reindex(df.index) / df['Close']
+        df[['Open', 'High', 'Low']] = df[['Open', 'High', 'Low']].mul(ratio, axis=0)
+        df['Close'] = df['Close'] * ratio
+    df['Volume'] = df['Volume'].fillna(0).astype('int64')
+    return df
+
+class TokenBucket:
+    """Token bucket rate limiter: rate tokens per second, at most capacity at once"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncFetcher:
+    """
+    Concurrent, rate-limited downloads on a background asyncio loop
+
+    Requests share a token bucket and a concurrency limit, each attempt
+    has a timeout and retryable failures are retried with jittered
+    exponential backoff. submit() returns a concurrent.futures.Future,
+    so the compute pipeline can start on each symbol as soon as its
+    download completes. VIX is downloaded once per date range and shared,
+    and requests for a symbol and range already in flight share its
+    download.
+
+    Providers' blocking calls run on the loop's own thread pool of
+    max_concurrency threads. A timed-out attempt cannot stop its thread,
+    so the pool bounds how many abandoned calls can pile up; providers
+    should also time out their own requests (both built-in ones do).
+    Every error is retried except FetchErrors marked not retryable.
+
+    Parameters:
+    -----------
+    provider : object, optional
+        Object with an async fetch(symbol, start_date, end_date) returning
+        daily OHLCV; defaults to YFinanceProvider
+    rate : float
+        Requests per second
+    burst : int
+        Requests allowed at once before the rate applies
+    max_concurrency : int
+        Requests in flight at once
+    timeout : float
+        Seconds allowed per attempt
+    retries : int
+        Retries after the first attempt
+    backoff : float
+        Base delay in seconds, doubled every retry and jittered by 50-150%
+    seed : int, optional
+        Seed of the jitter
+    """
+
+    def __init__(self, provider=None, rate=2.0, burst=4, max_concurrency=8, timeout=30.0, retries=3, backoff=1.0,
+                 seed=None):
+        self.provider = provider or YFinanceProvider()
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._random = random.Random(seed)
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._shared = {}
+        self.stats = {'Requests': 0, 'Retries': 0, 'Timeouts': 0, 'Failed': 0, 'Completed': 0}
+
+    def start(self):
+        """Start the event loop thread"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            # asyncio.to_thread runs on the loop's default executor
+            self._executor = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix='async-fetcher-io')
+            self._loop.set_default_executor(self._executor)
+            self._thread = threading.Thread(target=self._loop.run_forever, name='async-fetcher', daemon=True)
+            self._thread.start()
+            # Loop-bound primitives are created on the loop itself
+            asyncio.run_coroutine_threadsafe(self._init_limits(), self._loop).result()
+        return self
+
+    async def _init_limits(self):
+        self._bucket = TokenBucket(self.rate, self.burst)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def close(self):
+        """Stop the event loop thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._shared = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def fetch(self, symbol, start_date, end_date):
+        """Fetch one symbol with rate limiting, timeouts and retries (daily bars in market time)"""
+        for attempt in range(self.retries + 1):
+            async with self._semaphore:
+                await self._bucket.acquire()
+                self.stats['Requests'] += 1
+                try:
+                    df = await asyncio.wait_for(self.provider.fetch(symbol, start_date, end_date), self.timeout)
+                    self.stats['Completed'] += 1
+                    return to_market_time(df)
+                except asyncio.TimeoutError:
+                    self.stats['Timeouts'] += 1
+                    error = FetchError(f"Timed out after {self.timeout}s fetching {symbol}")
+                except FetchError as e:
+                    error = e
+                except Exception as e:
+                    # Anything else (network errors, provider exceptions) is treated as transient
+                    error = FetchError(f"{type(e).__name__} fetching {symbol}: {e}")
+            if not error.retryable or attempt == self.retries:
+                break
+            self.stats['Retries'] += 1
+            await asyncio.sleep(self.backoff * 2 ** attempt * self._random.uniform(0.5, 1.5))
+
+        self.stats['Failed'] += 1
+        raise error
+
+    def _fetch_shared(self, symbol, start_date, end_date, keep=False):
+        """
+        Download of a symbol shared by every request for the same range
+
+        The download is shared while in flight, or for good with keep (VIX);
+        a failed download is started again by the next request.
+        """
+        key = (symbol, start_date, end_date)
+        task = self._shared.get(key)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            task = self._shared[key] = asyncio.ensure_future(self.fetch(symbol, start_date, end_date))
+            if not keep:
+                task.add_done_callback(lambda done: self._shared.pop(key) if self._shared.get(key) is done else None)
+        return asyncio.shield(task)
+
+    async def _fetch_with_vix(self, symbol, start_date, end_date):
+        if symbol in ['VIX', '^VIX']:
+            # Like download_data: VIX itself comes without a separate VIX frame
+            return await self._fetch_shared(symbol, start_date, end_date, keep=True), None
+        return tuple(await asyncio.gather(self._fetch_shared(symbol, start_date, end_date),
+                                          self._fetch_shared('^VIX', start_date, end_date, keep=True)))
+
+    async def _fetch_many(self, ranges):
+        results = await asyncio.gather(*(self._fetch_shared(symbol, start_date, end_date)
+                                         for symbol, (start_date, end_date) in ranges.items()), return_exceptions=True)
+        return dict(zip(ranges, results))
+
+    def fetch_many(self, ranges):
+        """
+        Download several symbols, each over its own date range, and wait for all of them
+
+        Parameters:
+        -----------
+        ranges : dict
+            Symbol -> (start_date, end_date)
+
+        Returns:
+        --------
+        results : dict
+            Symbol -> daily bars, or the exception that prevented them
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._fetch_many(ranges), self._loop).result()
+
+    def submit(self, symbol, start_date, end_date):
+        """
+        Schedule the download of a symbol and the shared VIX history
+
+        Returns:
+        --------
+        future : concurrent.futures.Future
+            Resolves to (df, vix_df) like download_data
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._fetch_with_vix(symbol, start_date, end_date), self._loop)
@@ -0,0 +1,271 @@
+import numpy as np
+import pandas as pd
+
+# Aggregation used to build weekly bars from daily bars
+BAR_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum'
+}
+
+# Time zone all bars are converted to once, when they enter the pipeline
+MARKET_TZ = 'US/Eastern'
+
+def to_market_time(df):
+    """
+    Frame indexed in market time, without modifying or copying the input
+
+    Returns df itself when it is already in MARKET_TZ, otherwise a new
+    frame that shares df's data under the converted index.
+    """
+    index = pd.to_datetime(df.index)
+    if str(index.tz) == MARKET_TZ:
+        return df
+    return df.set_axis(index.tz_convert(MARKET_TZ), axis=0, copy=False)
+
+# Anchored frequencies whose buckets are closed and labelled on the right,
+# as in pandas resample ('W' ends on Sunday, 'ME' on the month end, ...)
+RIGHT_CLOSED_OFFSETS = (pd.offsets.Week, pd.offsets.MonthEnd, pd.offsets.QuarterEnd, pd.offsets.YearEnd)
+
+def bucket_ids(index, freq='W'):
+    """
+    Bucket number of every timestamp of a sorted calendar
+
+    Buckets follow pandas resample: anchored frequencies ('W', 'ME', 'QE',
+    'YE') are labelled by the period end on or after each day, fixed
+    'ND' buckets start at midnight of the first day. Empty buckets keep
+    their label, so holiday weeks appear as they do in pandas.
+
+    Parameters:
+    -----------
+    index : pandas.DatetimeIndex
+        Sorted timestamps (time zone aware or naive)
+    freq : str or pandas.DateOffset
+        Bucket frequency
+
+    Returns:
+    --------
+    ids : numpy.ndarray
+        int64 bucket number of every timestamp (non-decreasing)
+    labels : pandas.DatetimeIndex
+        Label of every bucket, including empty ones
+    """
+    offset = pd.tseries.frequencies.to_offset(freq)
+    days = index.normalize()
+
+    if isinstance(offset, RIGHT_CLOSED_OFFSETS):
+        labels = pd.date_range(offset.rollforward(days[0]), offset.rollforward(days[-1]), freq=offset)
+        ids = labels.searchsorted(days, side='left')
+    elif isinstance(offset, pd.offsets.Day):
+        # Buckets are counted in wall-clock days, so DST changes do not shift them
+        first = days[0].tz_localize(None)
+        day_number = (days.tz_localize(None) - first).days.to_numpy()
+        ids = day_number // offset.n
+        labels = pd.date_range(first, periods=ids[-1] + 1, freq=offset).tz_localize(index.tz)
+    else:
+        raise ValueError(f"Unsupported bar frequency: {freq}")
+
+    return np.asarray(ids, dtype=np.int64), labels
+
+def aggregate_bars(values, ids, n_buckets, how):
+    """
+    Aggregate rows of a 2-D array into buckets
+
+    One reduceat call per aggregation covers every column at once. NaNs
+    are skipped like pandas does: first/last take the first/last valid
+    value, max/min ignore NaN and sum treats NaN as 0. Empty buckets are
+    NaN (0 for sum).
+
+    Parameters:
+    -----------
+    values : numpy.ndarray
+        (rows x columns) float array
+    ids : numpy.ndarray
+        Non-decreasing bucket number of every row
+    n_buckets : int
+        Total number of buckets
+    how : str
+        'first', 'last', 'max', 'min' or 'sum'
+
+    Returns:
+    --------
+    result : numpy.ndarray
+        (n_buckets x columns) aggregated array
+    """
+    values = np.asarray(values, dtype=float).reshape(len(ids), -1)
+    fill = 0.0 if how == 'sum' else np.nan
+    result = np.full((n_buckets, values.shape[1]), fill)
+    if len(ids) == 0:
+        return result
+
+    # reduceat over the start row of each non-empty bucket
+    starts = np.flatnonzero(np.diff(ids, prepend=-1))
+    filled = ids[starts]
+
+    if how == 'sum':
+        result[filled] = np.add.reduceat(np.nan_to_num(values), starts, axis=0)
+    elif how == 'max':
+        result[filled] = np.fmax.reduceat(values, starts, axis=0)
+    elif how == 'min':
+        result[filled] = np.fmin.reduceat(values, starts, axis=0)
+    elif how in ('first', 'last'):
+        rows = np.arange(len(ids))[:, None]
+        valid = ~np.isnan(values)
+        if how == 'first':
+            pick = np.minimum.reduceat(np.where(valid, rows, len(ids)), starts, axis=0)
+        else:
+            pick = np.maximum.reduceat(np.where(valid, rows, -1), starts, axis=0)
+        found = (pick >= 0) & (pick < len(ids))
+        picked = np.take_along_axis(values, np.clip(pick, 0, len(ids) - 1), axis=0)
+        result[filled] = np.where(found, picked, np.nan)
+    else:
+        raise ValueError(f"Unsupported aggregation: {how}")
+
+    return result
+
+def _restore_dtype(column, dtype):
+    """Cast an aggregated column back to an integer dtype when pandas would keep it"""
+    if np.issubdtype(dtype, np.integer) and not np.isnan(column).any():
+        return column.astype(dtype)
+    return column
+
+def resample_bars_many(frames, freq='W', aggregation=BAR_AGGREGATION):
+    """
+    Resample many symbols' bars in one pass
+
+    Frames are aligned on the union of their calendars, bucket ids are
+    computed once for that calendar and each aggregation runs once over
+    the (days x symbols) matrix. Every result is trimmed to its own first
+    and last bucket and matches df.resample(freq).agg(aggregation).
+
+    Parameters:
+    -----------
+    frames : dict
+        Symbol -> daily frame with the aggregated columns
+    freq : str
+        Bucket frequency (see bucket_ids)
+    aggregation : dict
+        Column -> 'first', 'last', 'max', 'min' or 'sum'
+
+    Returns:
+    --------
+    bars : dict
+        Symbol -> resampled frame
+    """
+    symbols = list(frames)
+    bars = {}
+    for group in _calendar_groups(frames, freq):
+        bars.update(_resample_group({symbol: frames[symbol] for symbol in group}, [freq], aggregation)[freq])
+    return {symbol: bars[symbol] for symbol in symbols}
+
+def periods_per_year(freq):
+    """Bars per year of a bar frequency, for annualizing ('D' counts 252 trading days)"""
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if isinstance(offset, pd.offsets.Day):
+        return 252 / offset.n
+    if isinstance(offset, pd.offsets.Week):
+        return 52 / offset.n
+    if isinstance(offset, pd.offsets.MonthEnd):
+        return 12 / offset.n
+    if isinstance(offset, pd.offsets.QuarterEnd):
+        return 4 / offset.n
+    if isinstance(offset, pd.offsets.YearEnd):
+        return 1 / offset.n
+    raise ValueError(f"Unsupported bar frequency: {freq}")
+
+def resample_timeframes(frames, freqs=('D', 'W', 'ME'), aggregation=BAR_AGGREGATION):
+    """
+    Bars of many symbols at several frequencies in one pass over the daily data
+
+    The union calendar and the (days x symbols) column matrices are built
+    once and every frequency aggregates them with its own bucket ids.
+    Daily ('D') bars keep only the days with a close, so weekends and
+    holidays do not become empty bars; other frequencies match
+    resample_bars_many.
+
+    Parameters:
+    -----------
+    frames : dict
+        Symbol -> daily frame with the aggregated columns
+    freqs : sequence of str
+        Bar frequencies (see bucket_ids)
+    aggregation : dict
+        Column -> 'first', 'last', 'max', 'min' or 'sum'
+
+    Returns:
+    --------
+    bars : dict
+        Frequency -> symbol -> resampled frame
+    """
+    symbols = list(frames)
+    # 'ND' buckets that split the symbols into calendar groups are resampled on their own
+    shared = [freq for freq in freqs if len(_calendar_groups(frames, freq)) == 1]
+    bars = _resample_group(frames, shared, aggregation) if shared else {}
+    for freq in freqs:
+        if freq not in bars:
+            bars[freq] = resample_bars_many(frames, freq, aggregation)
+
+    timeframes = {}
+    for freq in freqs:
+        offset = pd.tseries.frequencies.to_offset(freq)
+        if isinstance(offset, pd.offsets.Day) and offset.n == 1 and 'Close' in aggregation:
+            bars[freq] = {symbol: df[df['Close'].notna()] for symbol, df in bars[freq].items()}
+        timeframes[freq] = {symbol: bars[freq][symbol] for symbol in symbols}
+    return timeframes
+
+def _calendar_groups(frames, freq):
+    """Split symbols into groups that share bucket boundaries"""
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if not isinstance(offset, pd.offsets.Day) or offset.n == 1:
+        return [list(frames)]
+
+    # 'ND' buckets start on each symbol's first day, so only symbols whose
+    # first days are a multiple of N days apart share boundaries
+    groups = {}
+    for symbol, df in frames.items():
+        first_day = df.index[0].tz_localize(None).normalize()
+        groups.setdefault((first_day - pd.Timestamp(0)).days % offset.n, []).append(symbol)
+    return list(groups.values())
+
+def _resample_group(frames, freqs, aggregation):
+    """Resample symbols sharing bucket boundaries on their union calendar (frequency -> symbol -> bars)"""
+    symbols = list(frames)
+    calendar = frames[symbols[0]].index
+    for symbol in symbols[1:]:
+        if not frames[symbol].index.equals(calendar):
+            calendar = calendar.union(frames[symbol].index)
+    stacked = {column: np.column_stack([frames[symbol][column].reindex(calendar).to_numpy(dtype=float)
+                                        for symbol in symbols])
+               for column in aggregation}
+    first_last = {symbol: calendar.searchsorted(frames[symbol].index[[0, -1]]) for symbol in symbols}
+
+    timeframes = {}
+    for freq in freqs:
+        ids, labels = bucket_ids(calendar, freq)
+        columns = {column: aggregate_bars(stacked[column], ids, len(labels), how)
+                   for column, how in aggregation.items()}
+
+        # Each symbol spans the buckets of its own first and last day
+        bars = {}
+        for i, symbol in enumerate(symbols):
+            start, stop = ids[first_last[symbol][0]], ids[first_last[symbol][1]] + 1
+            bars[symbol] = pd.DataFrame({
+                column: _restore_dtype(columns[column][start:stop, i], frames[symbol][column].dtype)
+                for column in aggregation
+            }, index=labels[start:stop])
+        timeframes[freq] = bars
+    return timeframes
+
+def resample_bars(df, freq='W', aggregation=BAR_AGGREGATION):
+    """Resample one frame of daily bars (see resample_bars_many)"""
+    return resample_bars_many({None: df}, freq, aggregation)[None]
+
+def resample_weekly(df):
+    """Resample daily OHLCV bars to weekly bars (last trading day of the week)"""
+    return resample_bars(df, 'W')
+
+def resample_weekly_close(df):
+    """Resample a daily series frame to its weekly last Close (used for VIX)"""
+    return resample_bars(df, 'W', {'Close': 'last'})
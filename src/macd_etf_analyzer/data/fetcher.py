@@ -1,14 +1,14 @@
 import yfinance as yf
-import pandas as pd
+from .bars import to_market_time
 
 def download_data(symbol, start_date, end_date):
-    """Download price and VIX data for a symbol"""
+    """Download price and VIX data for a symbol (indexed in market time)"""
     ticker = yf.Ticker(symbol)
-    df = ticker.history(start=start_date, end=end_date)
+    df = to_market_time(ticker.history(start=start_date, end=end_date))
     
     # Download VIX data only once if needed
     if symbol not in ['VIX', '^VIX']:
         vix = yf.Ticker('^VIX')
-        vix_df = vix.history(start=start_date, end=end_date)
+        vix_df = to_market_time(vix.history(start=start_date, end=end_date))
         return df, vix_df
-    return df, None 
\ No newline at end of file
+    return df, None 
@@ -0,0 +1,310 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from .bars import MARKET_TZ
+
+BAR_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# Store read by main() when present
+BAR_STORE_DIR = os.path.join('data', 'bar_store')
+
+META_FILE = 'meta.json'
+CALENDAR_FILE = 'calendar.npy'
+
+class BarStore:
+    """
+    Memory-mapped daily bars of a whole universe
+
+    Bars live in one (symbol, date, field) float64 array on disk, next to
+    a symbol index and a trading calendar (market-time days). Every
+    symbol's history is contiguous, so values() and frame() are views of
+    the mapped pages: worker processes that open the same store share
+    them instead of loading their own copies. The date axis is allocated
+    with spare capacity so append() can extend the calendar in place.
+
+    A store has one writer; readers see the calendar as of when they
+    opened it. Pickling a store (e.g. to send it to a process pool)
+    reopens it read-only on the other side.
+
+    Parameters:
+    -----------
+    path : str
+        Directory of the store
+    mode : str
+        'r' for read-only, 'r+' to append
+    """
+
+    def __init__(self, path, mode='r'):
+        if mode not in ('r', 'r+'):
+            raise ValueError(f"mode must be 'r' or 'r+', got {mode!r}")
+        self.path = path
+        self.mode = mode
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        self.fields = tuple(meta['fields'])
+        self.symbols = list(meta['symbols'])
+        self.capacity = meta['capacity']
+        self._data_file = meta['data_file']
+        self._n_dates = meta['n_dates']
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._field_index = {field: i for i, field in enumerate(self.fields)}
+        days = np.load(os.path.join(path, CALENDAR_FILE))[:self._n_dates]
+        self.calendar = pd.DatetimeIndex(days).tz_localize(MARKET_TZ)
+        self._map()
+
+    @classmethod
+    def create(cls, path, fields=BAR_FIELDS, capacity=4096):
+        """Create an empty store (fails if one already exists at path)"""
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            raise FileExistsError(f"A bar store already exists at {path}")
+        np.save(os.path.join(path, CALENDAR_FILE), np.empty(0, dtype='datetime64[ns]'))
+        data_file = f'bars-{capacity}.dat'
+        open(os.path.join(path, data_file), 'wb').close()
+        _write_meta(path, {'fields': list(fields), 'symbols': [], 'n_dates': 0, 'capacity': capacity,
+                           'data_file': data_file})
+        return cls(path, mode='r+')
+
+    def _map(self):
+        shape = (len(self.symbols), self.capacity, len(self.fields))
+        if shape[0] == 0:
+            self._data = np.empty(shape)
+        else:
+            self._data = np.memmap(os.path.join(self.path, self._data_file), dtype=np.float64, mode=self.mode,
+                                   shape=shape)
+
+    def __reduce__(self):
+        return BarStore, (self.path,)
+
+    def __len__(self):
+        return self._n_dates
+
+    def __contains__(self, symbol):
+        return symbol in self._symbol_index
+
+    def _date_slice(self, start=None, end=None):
+        lo = 0 if start is None else self.calendar.searchsorted(_market_timestamp(start))
+        hi = self._n_dates if end is None else self.calendar.searchsorted(_market_timestamp(end))
+        return slice(lo, hi)
+
+    def values(self, symbol, start=None, end=None):
+        """(date × field) view of one symbol's bars in [start, end); dates it did not trade are NaN"""
+        if symbol not in self._symbol_index:
+            raise KeyError(f"{symbol} is not in the bar store")
+        return self._data[self._symbol_index[symbol], self._date_slice(start, end)]
+
+    def field(self, name, start=None, end=None):
+        """(symbol × date) view of one field for the whole universe"""
+        return self._data[:, self._date_slice(start, end), self._field_index[name]]
+
+    def frame(self, symbol, start=None, end=None):
+        """
+        Daily OHLCV frame of one symbol in [start, end) backed by the mapped pages
+
+        Only the days the symbol has a bar on are included: dates before its
+        first and after its last bar are left out, and so are calendar days
+        in between on which it did not trade (e.g. a symbol appended later
+        whose history has gaps other symbols do not). Without such gaps the
+        frame is a view, so treat it as read-only; with them it is a copy.
+        """
+        calendar = self.calendar[self._date_slice(start, end)]
+        values = self.values(symbol, start, end)
+        traded = np.flatnonzero(~np.isnan(values[:, self._field_index['Close']]))
+        if len(traded) == 0 or traded[-1] - traded[0] + 1 == len(traded):
+            first, last = (traded[0], traded[-1] + 1) if len(traded) else (0, 0)
+            return pd.DataFrame(values[first:last], index=calendar[first:last], columns=list(self.fields), copy=False)
+        return pd.DataFrame(values[traded], index=calendar[traded], columns=list(self.fields))
+
+    def last_date(self, symbol):
+        """Market-time day of the symbol's last bar (None if it has none)"""
+        traded = np.flatnonzero(~np.isnan(self.values(symbol)[:, self._field_index['Close']]))
+        return self.calendar[traded[-1]] if len(traded) else None
+
+    def covers(self, symbol, end_date=None):
+        """
+        True if the store holds the symbol and ^VIX with bars up to end_date
+
+        Both must have a bar on the last business day before end_date
+        (exclusive, like download_data; today by default, like
+        update_store). A symbol whose bars end earlier is stale, e.g. its
+        last update_store fetch failed while the others moved on, and
+        should be fetched (or the store refreshed with update_store).
+        """
+        if symbol not in self or '^VIX' not in self:
+            return False
+        end = _market_timestamp(end_date or pd.Timestamp.now(tz=MARKET_TZ).date()).normalize()
+        for name in dict.fromkeys([symbol, '^VIX']):
+            last = self.last_date(name)
+            if last is None or last < end - pd.offsets.BDay(1):
+                return False
+        return True
+
+    def frames(self, symbols=None, start=None, end=None):
+        """Symbol -> frame() for several symbols (all by default)"""
+        return {symbol: self.frame(symbol, start, end) for symbol in (symbols or self.symbols)}
+
+    def load(self, symbol, start_date=None, end_date=None):
+        """(df, vix_df) of a symbol like download_data, read from the store"""
+        df = self.frame(symbol, start_date, end_date)
+        if symbol in ['VIX', '^VIX']:
+            return df, None
+        return df, self.frame('^VIX', start_date, end_date)
+
+    def append(self, frames):
+        """
+        Write daily bars for several symbols
+
+        Dates after the end of the calendar extend it; dates already on it
+        are overwritten (e.g. to backfill a newly added symbol). Unknown
+        symbols are added to the index. Bars dated before the end of the
+        calendar but not on it cannot be inserted and raise ValueError.
+
+        Parameters:
+        -----------
+        frames : dict
+            Symbol -> daily OHLCV frame (any timezone; bars are stored by market-time day)
+        """
+        if self.mode != 'r+':
+            raise ValueError("The bar store is open read-only")
+
+        days = {symbol: _market_days(df) for symbol, df in frames.items()}
+        last_day = self.calendar[-1].tz_localize(None) if self._n_dates else None
+        new_days = pd.DatetimeIndex(np.unique(np.concatenate([d.values for d in days.values()]))) if days else \
+            pd.DatetimeIndex([])
+        if last_day is not None:
+            new_days = new_days[new_days > last_day]
+        calendar = self.calendar.tz_localize(None).append(new_days)
+        rows = {symbol: calendar.get_indexer(symbol_days) for symbol, symbol_days in days.items()}
+        for symbol, symbol_rows in rows.items():
+            if (symbol_rows < 0).any():
+                raise ValueError(f"{symbol} has bars inside the calendar on days it does not contain")
+
+        new_symbols = [symbol for symbol in frames if symbol not in self._symbol_index]
+        n_dates = len(calendar)
+        old_file = self._data_file
+        if n_dates > self.capacity:
+            self._relayout(new_symbols, max(2 * self.capacity, n_dates))
+        elif new_symbols:
+            self._add_symbols(new_symbols)
+
+        for symbol, df in frames.items():
+            block = self._data[self._symbol_index[symbol]]
+            for field in self.fields:
+                if field in df.columns:
+                    block[rows[symbol], self._field_index[field]] = df[field].to_numpy(dtype=np.float64)
+        if isinstance(self._data, np.memmap):
+            self._data.flush()
+
+        # The calendar and meta are replaced after the bars so readers never see unwritten days
+        _replace(os.path.join(self.path, CALENDAR_FILE), lambda f: np.save(f, calendar.values))
+        self._n_dates = n_dates
+        self.calendar = calendar.tz_localize(MARKET_TZ)
+        _write_meta(self.path, {'fields': list(self.fields), 'symbols': self.symbols, 'n_dates': n_dates,
+                                'capacity': self.capacity, 'data_file': self._data_file})
+        if old_file != self._data_file:
+            # Readers that mapped the old file keep its pages until they close it
+            os.remove(os.path.join(self.path, old_file))
+
+    def _add_symbols(self, symbols):
+        """Grow the symbol axis of the current data file (NaN-filled)"""
+        n_old = len(self.symbols)
+        block = self.capacity * len(self.fields) * 8
+        with open(os.path.join(self.path, self._data_file), 'r+b') as f:
+            f.truncate((n_old + len(symbols)) * block)
+        self._register(symbols)
+        self._map()
+        self._data[n_old:] = np.nan
+
+    def _relayout(self, symbols, capacity):
+        """Copy the bars into a new data file with a larger date capacity"""
+        old = self._data
+        n_old = len(self.symbols)
+        self._register(symbols)
+        self.capacity = capacity
+        self._data_file = f'bars-{capacity}.dat'
+        self._data = np.memmap(os.path.join(self.path, self._data_file), dtype=np.float64, mode='w+',
+                               shape=(len(self.symbols), capacity, len(self.fields)))
+        self._data[:] = np.nan
+        self._data[:n_old, :self._n_dates] = old[:, :self._n_dates]
+
+    def _register(self, symbols):
+        for symbol in symbols:
+            self._symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+
+def update_store(path, symbols, fetch, start_date='2005-01-01', end_date=None):
+    """
+    Append the bars of symbols past what a bar store holds
+
+    Each symbol already in the store is fetched from the day after its
+    last bar, new symbols from start_date; ^VIX is always included. The
+    store is created if there is none at path.
+
+    Parameters:
+    -----------
+    path : str
+        Directory of the store
+    symbols : list of str
+        Symbols to bring up to date
+    fetch : callable
+        fetch({symbol: (start_date, end_date)}) -> {symbol: daily OHLCV
+        frame or the exception that prevented it}, e.g. AsyncFetcher.fetch_many
+    start_date : str
+        History start of symbols not yet in the store
+    end_date : str, optional
+        End of the bars to fetch (exclusive); defaults to today, so
+        only completed days are stored
+
+    Returns:
+    --------
+    appended : dict
+        Symbol -> number of new bars written
+    failures : dict
+        Symbol -> error of the symbols that could not be fetched
+    """
+    store = BarStore(path, mode='r+') if os.path.exists(os.path.join(path, META_FILE)) else BarStore.create(path)
+    end_date = pd.Timestamp(end_date or pd.Timestamp.now(tz=MARKET_TZ).date()).date()
+    symbols = list(dict.fromkeys(list(symbols) + ['^VIX']))
+
+    ranges = {}
+    for symbol in symbols:
+        last = store.last_date(symbol) if symbol in store else None
+        start = pd.Timestamp(start_date).date() if last is None else (last + pd.Timedelta(days=1)).date()
+        if start < end_date:
+            ranges[symbol] = (str(start), str(end_date))
+    results = fetch(ranges) if ranges else {}
+
+    frames, failures = {}, {}
+    for symbol, result in results.items():
+        if isinstance(result, Exception):
+            failures[symbol] = result
+            continue
+        # Providers may repeat the last stored day; keep only new ones
+        last = store.last_date(symbol) if symbol in store else None
+        days = _market_days(result)
+        new = result[days > last.tz_localize(None)] if last is not None else result
+        if len(new):
+            frames[symbol] = new
+    if frames:
+        store.append(frames)
+    return {symbol: len(df) for symbol, df in frames.items()}, failures
+
+def _market_timestamp(value):
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize(MARKET_TZ) if timestamp.tz is None else timestamp.tz_convert(MARKET_TZ)
+
+def _market_days(df):
+    """Market-time calendar days of a frame's bars (tz-naive)"""
+    index = df.index if df.index.tz is None else df.index.tz_convert(MARKET_TZ).tz_localize(None)
+    return index.normalize()
+
+def _replace(path, write):
+    """Write a file through a temporary file and an atomic rename"""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+def _write_meta(path, meta):
+    _replace(os.path.join(path, META_FILE), lambda f: f.write(json.dumps(meta).encode()))
@@ -0,0 +1,12 @@
+ETF_CATEGORIES = {
+    'Country/Region': ['EEM', 'VWO', 'FXI', 'AAXJ', 'EWJ', 'ACWX', 'CHIX', 'CQQQ',
+                       'EWZ', 'ERUS', 'EWC', 'EWU', 'VGK', 'VPL'],
+    'Sector': ['XLF', 'XLE', 'XLK', 'XLV', 'XLI', 'XLP', 'XLY', 'XLB', 'XLU', 'XLRE'],
+    'Bond': ['AGG', 'BND', 'TLT', 'IEF', 'SHY', 'LQD', 'HYG', 'MUB', 'EMB', 'BNDX']
+}
+
+_SYMBOL_CATEGORY = {symbol: category for category, symbols in ETF_CATEGORIES.items() for symbol in symbols}
+
+def get_category(symbol):
+    """Return the category of an ETF symbol ('Unknown' if not classified)"""
+    return _SYMBOL_CATEGORY.get(symbol, 'Unknown')
@@ -0,0 +1,243 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import wait, FIRST_COMPLETED
+from .data.fetcher import download_data
+from .data.bars import resample_bars_many
+from .strategies.features import FeatureStore
+from .strategies.incremental import run_incremental
+from .strategies.result import STRATEGY_NAMES, StrategyResult
+from .utils.performance import get_trade_info, stop_loss_sensitivity
+from .utils.costs import DEFAULT_COST_MODELS
+from .utils.copies import CopyCounter, count_copies
+from .utils.precision import DEFAULT_PRECISION
+from .utils.scheduler import get_scheduler
+from .utils.walk_forward import run_strategy
+
+def strategy_sharpe_ratios(results, periods_per_year=52):
+    """Annualized Sharpe ratio of each strategy (results: strategy name -> StrategyResult)"""
+    sharpe_ratios = {}
+    for strategy_name, df in results.items():
+        returns = df['Strategy_Returns']
+        sharpe = np.sqrt(periods_per_year) * returns.mean() / returns.std() if returns.std() != 0 else 0
+        sharpe_ratios[strategy_name] = sharpe
+    return sharpe_ratios
+
+def analyze_strategy_performance(results, symbol, periods_per_year=52):
+    """
+    Analyze and compare strategy performance for a ticker (results: strategy name -> StrategyResult)
+    
+    Sharpe ratios are annualized with periods_per_year bars (52 for weekly bars).
+    """
+    strategy_metrics = results
+    
+    # Calculate Sharpe ratio for each strategy
+    sharpe_ratios = strategy_sharpe_ratios(strategy_metrics, periods_per_year)
+    
+    # Find best strategy
+    best_strategy = max(sharpe_ratios.items(), key=lambda x: x[1])
+    
+    # Evaluate alternative stop loss thresholds for each strategy
+    sensitivity = {strategy_name: stop_loss_sensitivity(df, periods_per_year=periods_per_year)
+                   for strategy_name, df in strategy_metrics.items()}
+    
+    # Save performance comparison to ticker directory
+    ticker_dir = os.path.join('data', symbol.replace('^', ''))
+    performance_file = os.path.join(ticker_dir, 'strategy_comparison.txt')
+    
+    with open(performance_file, 'w') as f:
+        f.write(f"Strategy Performance Comparison for {symbol}\n")
+        f.write("=" * 50 + "\n\n")
+        f.write("Sharpe Ratios:\n")
+        for strategy, sharpe in sharpe_ratios.items():
+            f.write(f"{strategy}: {sharpe:.2f}\n")
+        f.write(f"\nBest Strategy: {best_strategy[0]} (Sharpe: {best_strategy[1]:.2f})\n")
+        
+        # Sharpe ratios net of each transaction cost scenario, if computed
+        net_columns = [c for c in strategy_metrics['MACD'].columns if c.startswith('Net_Strategy_Returns_')]
+        if net_columns:
+            f.write("\nNet Sharpe Ratios (after transaction costs):\n")
+            for strategy_name, df in strategy_metrics.items():
+                net_sharpes = []
+                for column in net_columns:
+                    returns = df[column]
+                    sharpe = np.sqrt(periods_per_year) * returns.mean() / returns.std() if returns.std() != 0 else 0
+                    net_sharpes.append(f"{column[len('Net_Strategy_Returns_'):]}: {sharpe:.2f}")
+                f.write(f"{strategy_name}: {', '.join(net_sharpes)}\n")
+        
+        f.write("\nStop-Loss Sensitivity:\n")
+        for strategy, sensitivity_df in sensitivity.items():
+            f.write(f"\n{strategy}:\n")
+            f.write(sensitivity_df.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+            f.write("\n")
+    
+    # Save sensitivity surface for all strategies
+    sensitivity_file = os.path.join(ticker_dir, 'stop_loss_sensitivity.csv')
+    pd.concat(sensitivity, names=['Strategy', None]).reset_index(level=0).to_csv(sensitivity_file, index=False)
+    
+    return best_strategy[0], sharpe_ratios
+
+def prepare_bars(symbol, df, vix_df):
+    """Weekly float64 bars of the ETF and VIX, aggregated together in one pass"""
+    bars = resample_bars_many({symbol: df, '^VIX': vix_df})
+    return bars[symbol], bars['^VIX'][['Close']]
+
+def run_strategy_result(strategy, weekly_df, weekly_vix, precision=DEFAULT_PRECISION, **kwargs):
+    """Run one strategy on shared weekly bars and keep its compact result"""
+    return StrategyResult.from_frame(strategy, run_strategy(strategy, weekly_df, weekly_vix, **kwargs),
+                                     index=weekly_df.index, precision=precision)
+
+def finish_etf(symbol, results, write_trades=True, write_reports=True):
+    """
+    Compare the strategies of one ETF and write its comparison and trade logs
+    
+    write_trades=False skips trade logs already written (by incremental
+    runs); write_reports=False only ranks the strategies and writes nothing.
+    """
+    if not write_reports:
+        sharpe_ratios = strategy_sharpe_ratios(results)
+        return results, max(sharpe_ratios, key=sharpe_ratios.get), sharpe_ratios
+    best_strategy, sharpe_ratios = analyze_strategy_performance(results, symbol)
+    if write_trades:
+        for strategy_name, result in results.items():
+            get_trade_info(result, strategy_name, symbol)
+    return results, best_strategy, sharpe_ratios
+
+def run_pipeline(etfs, scheduler=None, start_date='2005-01-01', end_date='2023-12-31', initial_capital=1_000_000,
+                 intraweek_stops=False, cost_models=DEFAULT_COST_MODELS, precision=DEFAULT_PRECISION, fetcher=None,
+                 store=None, on_bars=None, on_result=None, incremental=False, write_reports=True):
+    """
+    Download, backtest and analyze ETFs on the shared scheduler
+    
+    Each ETF moves through four stages: download (I/O lane or fetcher), weekly bars,
+    one task per strategy and the analysis (CPU lane). This thread chains
+    the stages as tasks complete, so no task waits on another and ETFs
+    overlap freely. New downloads start only while fewer ETFs are active
+    than the CPU lane can hold, which bounds the data held in memory.
+    
+    Parameters:
+    -----------
+    etfs : list of str
+        ETF symbols
+    scheduler : Scheduler, optional
+        Defaults to the process-wide scheduler
+    start_date, end_date : str
+        Download range
+    initial_capital : float
+        Starting portfolio value
+    intraweek_stops : bool
+        Resolve stop exits on daily bars
+    cost_models : dict
+        Transaction cost scenarios
+    precision : str or dict
+        Precision policy of the stored results ('compact' or 'full', see
+        utils.precision); the strategies compute in float64
+    fetcher : AsyncFetcher, optional
+        Downloads through the asyncio fetcher (rate limited, with retries)
+        instead of download_data on the I/O lane
+    store : BarStore, optional
+        Bar store to read daily bars from; symbols it holds (with ^VIX)
+        are not downloaded unless the store ends before end_date
+    on_bars : callable, optional
+        Called with (symbol, weekly_df, weekly_vix) when an ETF's weekly bars are ready
+    on_result : callable, optional
+        Called with (symbol, (results, best_strategy, sharpe_ratios)) as each ETF completes
+    incremental : bool
+        Extend each strategy's persisted run with the new weeks instead of
+        rerunning the whole history (see strategies.incremental); ignored
+        with intraweek_stops
+    write_reports : bool
+        Write each ETF's strategy comparison, stop loss sensitivity and
+        trade logs under data/<symbol>; with False nothing is written
+        (incremental runs still persist their state)
+    
+    Returns:
+    --------
+    etf_results : dict
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values
+    """
+    scheduler = scheduler or get_scheduler()
+    cpu_lane = scheduler.lane('cpu')
+    max_active = cpu_lane.max_workers + cpu_lane.max_queue
+    strategy_kwargs = {'initial_capital': initial_capital, 'cost_models': cost_models, 'precision': precision}
+    incremental = incremental and not intraweek_stops
+    
+    waiting = list(dict.fromkeys(etfs))  # each ETF once
+    in_flight = {}  # future -> (stage, symbol, strategy)
+    active = {}     # symbol -> state of an ETF between download and analysis
+    etf_results = {}
+    
+    def fail(symbol, error):
+        print(f"Error processing {symbol}: {str(error)}")
+        active.pop(symbol, None)
+    
+    while waiting or in_flight:
+        while waiting and len(active) < max_active and (fetcher is not None or scheduler.lane('io').has_capacity()):
+            symbol = waiting.pop(0)
+            if write_reports or incremental:
+                os.makedirs(os.path.join('data', symbol.replace('^', '')), exist_ok=True)
+            active[symbol] = {'copies': CopyCounter(), 'results': {}}
+            if store is not None and store.covers(symbol, end_date):
+                download = scheduler.submit('io', store.load, symbol, start_date, end_date)
+            elif fetcher is not None:
+                download = fetcher.submit(symbol, start_date, end_date)
+            else:
+                download = scheduler.submit('io', download_data, symbol, start_date, end_date)
+            in_flight[download] = ('download', symbol, None)
+        
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            stage, symbol, strategy = in_flight.pop(future)
+            if symbol not in active:
+                continue  # an earlier stage of this ETF already failed
+            state = active[symbol]
+            try:
+                value = future.result()
+            except Exception as e:
+                fail(symbol, e)
+                continue
+            
+            # Tasks are submitted inside the ETF's copy counter so their copies are counted
+            with count_copies(state['copies']):
+                if stage == 'download':
+                    df, vix_df = value
+                    state['daily_df'] = df if intraweek_stops else None
+                    in_flight[scheduler.submit('cpu', prepare_bars, symbol, df, vix_df)] = ('bars', symbol, None)
+                elif stage == 'bars':
+                    weekly_df, weekly_vix = value
+                    if on_bars is not None:
+                        on_bars(symbol, weekly_df, weekly_vix)
+                    # The strategies share the ETF's indicator features
+                    state['features'] = features = FeatureStore(weekly_df, weekly_vix)
+                    for name in STRATEGY_NAMES:
+                        if incremental:
+                            task = scheduler.submit('cpu', run_incremental, symbol, name, weekly_df, weekly_vix,
+                                                    features=features, **strategy_kwargs)
+                        else:
+                            task = scheduler.submit('cpu', run_strategy_result, name, weekly_df, weekly_vix,
+                                                    daily_df=state['daily_df'], features=features, **strategy_kwargs)
+                        in_flight[task] = ('strategy', symbol, name)
+                elif stage == 'strategy':
+                    state['results'][strategy] = value
+                    if len(state['results']) == len(STRATEGY_NAMES):
+                        # Keyed by strategy name, so the order does not depend on which finishes first
+                        results = {name: state['results'][name] for name in STRATEGY_NAMES}
+                        task = scheduler.submit('cpu', finish_etf, symbol, results, write_trades=not incremental,
+                                                write_reports=write_reports)
+                        in_flight[task] = ('analysis', symbol, None)
+                else:
+                    del active[symbol]
+                    etf_results[symbol] = value
+                    print(f"\n{symbol} Best Strategy: {value[1]} (strategies made {state['copies']}; "
+                          f"{state['features']})")
+                    if on_result is not None:
+                        on_result(symbol, value)
+    
+    return etf_results
+
+def process_etf(symbol, start_date='2005-01-01', end_date='2023-12-31', initial_capital=1_000_000, intraweek_stops=False,
+                cost_models=DEFAULT_COST_MODELS, precision=DEFAULT_PRECISION):
+    """Process all strategies for a single ETF (intraweek_stops resolves stop exits on daily bars)"""
+    etf_results = run_pipeline([symbol], start_date=start_date, end_date=end_date, initial_capital=initial_capital,
+                               intraweek_stops=intraweek_stops, cost_models=cost_models, precision=precision)
+    return etf_results.get(symbol)
@@ -0,0 +1,336 @@
+import json
+import time
+import argparse
+import threading
+import urllib.parse
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import pandas as pd
+from .data.async_fetcher import AsyncFetcher
+from .data.store import BarStore
+from .pipeline import run_pipeline
+from .strategies.features import FeatureStore
+from .strategies.result import STRATEGY_NAMES
+from .utils.costs import DEFAULT_COST_MODELS
+from .utils.performance import calculate_performance_metrics, extract_trades
+from .utils.precision import DEFAULT_PRECISION
+from .utils.scheduler import get_scheduler
+from .utils.walk_forward import PARAMETER_GRIDS, run_strategy
+
+# Types and (low, high] ranges of the parameters accepted by on-demand
+# backtests (per strategy: its PARAMETER_GRIDS entries and initial_capital);
+# spans and windows are at most ten years of weeks
+BACKTEST_PARAMETERS = {
+    'fast_span': (int, 0, 520),
+    'slow_span': (int, 0, 520),
+    'signal_span': (int, 0, 520),
+    'window': (int, 0, 520),
+    'signal_window': (int, 0, 520),
+    'stop_loss_pct': (float, 0, 1),
+    'initial_capital': (float, 0, 1e12)
+}
+
+class ServiceError(Exception):
+    """Request error answered with an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class LatencyStats:
+    """Request count, errors and latency percentiles per route (over the last `window` requests)"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, seconds, error=False):
+        with self._lock:
+            stats = self._routes.setdefault(route, {'count': 0, 'errors': 0, 'latencies': deque(maxlen=self.window)})
+            stats['count'] += 1
+            stats['errors'] += int(error)
+            stats['latencies'].append(seconds)
+
+    def summary(self):
+        with self._lock:
+            routes = {route: (stats['count'], stats['errors'], np.array(stats['latencies']))
+                      for route, stats in self._routes.items()}
+        return {route: {
+            'Requests': count,
+            'Errors': errors,
+            'Mean (ms)': 1000 * latencies.mean(),
+            'p50 (ms)': 1000 * np.percentile(latencies, 50),
+            'p95 (ms)': 1000 * np.percentile(latencies, 95),
+            'Max (ms)': 1000 * latencies.max()
+        } for route, (count, errors, latencies) in routes.items()}
+
+class SignalService:
+    """
+    Warm in-memory state behind the HTTP API
+
+    load() runs the regular pipeline once and keeps each ETF's weekly bars
+    and strategy results, so requests are answered from memory. On-demand
+    backtests reuse the cached weekly bars and a feature store per ETF,
+    so indicators computed by earlier backtests are not computed again.
+    At most max_backtests run at once and a request that cannot start
+    within backtest_wait seconds is rejected with 503. Each feature store
+    keeps the max_features most recently used features, so arbitrary
+    request parameters cannot grow it without bound. Loading writes no
+    report files.
+
+    Parameters:
+    -----------
+    symbols : list of str
+        ETF symbols to serve
+    start_date, end_date : str
+        Data range
+    initial_capital : float
+        Starting portfolio value
+    cost_models : dict
+        Transaction cost scenarios
+    precision : str or dict
+        Precision policy of bars and results
+    store : BarStore, optional
+        Bar store to read daily bars from (symbols it lacks are downloaded)
+    max_backtests : int
+        On-demand backtests allowed to run at once
+    backtest_wait : float
+        Seconds a backtest request may wait for a free slot
+    max_features : int
+        Features kept per ETF for on-demand backtests
+    """
+
+    def __init__(self, symbols, start_date='2005-01-01', end_date='2023-12-31', initial_capital=1_000_000,
+                 cost_models=DEFAULT_COST_MODELS, precision=DEFAULT_PRECISION, store=None, max_backtests=2,
+                 backtest_wait=5.0, max_features=256):
+        self.symbols = list(symbols)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.initial_capital = initial_capital
+        self.cost_models = cost_models
+        self.precision = precision
+        self.store = store
+        self.backtest_wait = backtest_wait
+        self.max_features = max_features
+        self.latency = LatencyStats()
+        self.bars = {}
+        self.features = {}
+        self.results = {}
+        self.loaded_at = None
+        self._backtests = threading.BoundedSemaphore(max_backtests)
+        self._reload_lock = threading.Lock()
+        self.backtests_rejected = 0
+
+    def load(self):
+        """(Re)load bars and results; requests keep using the previous state until the new one is complete"""
+        with self._reload_lock:
+            bars = {}
+
+            def keep_bars(symbol, weekly_df, weekly_vix):
+                bars[symbol] = (weekly_df, weekly_vix)
+
+            with AsyncFetcher() as fetcher:
+                results = run_pipeline(self.symbols, get_scheduler(), self.start_date, self.end_date,
+                                       self.initial_capital, cost_models=self.cost_models, precision=self.precision,
+                                       fetcher=fetcher, store=self.store, on_bars=keep_bars, write_reports=False)
+            # In the order of self.symbols, not the order the ETFs finished in
+            loaded = [symbol for symbol in self.symbols if symbol in results]
+            self.bars = {symbol: bars[symbol] for symbol in loaded}
+            self.features = {symbol: FeatureStore(*bars[symbol], max_features=self.max_features) for symbol in loaded}
+            self.results = {symbol: results[symbol] for symbol in loaded}
+            self.loaded_at = pd.Timestamp.now(tz='UTC')
+        return self
+
+    def _etf(self, symbol):
+        if symbol not in self.results:
+            raise ServiceError(404, f"Unknown symbol: {symbol}")
+        return self.results[symbol]
+
+    def _strategy(self, strategy):
+        if strategy not in STRATEGY_NAMES:
+            raise ServiceError(404, f"Unknown strategy: {strategy}")
+        return strategy
+
+    def latest_signal(self, symbol):
+        """Last week's close and position of every strategy of an ETF"""
+        results, best_strategy, sharpe_ratios = self._etf(symbol)
+        strategies = {}
+        for name, result in results.items():
+            strategies[name] = {
+                'Position': int(result.position[-1]),
+                'Signal Position': int(result.signal_position[-1]),
+                'Portfolio Value': float(result.portfolio_value[-1]),
+                'Sharpe Ratio': float(sharpe_ratios[name])
+            }
+        last = results[best_strategy]
+        return {'Symbol': symbol, 'Date': last.index[-1].isoformat(), 'Close': float(last.raw_close[-1]),
+                'Best Strategy': best_strategy, 'Strategies': strategies}
+
+    def latest_signals(self):
+        return [self.latest_signal(symbol) for symbol in self.results]
+
+    def metrics(self, symbol):
+        """Performance metrics of every strategy of an ETF"""
+        results, best_strategy, _ = self._etf(symbol)
+        return {'Symbol': symbol, 'Best Strategy': best_strategy,
+                'Strategies': {name: calculate_performance_metrics(result.to_frame())
+                               for name, result in results.items()}}
+
+    def trades(self, symbol, strategy=None):
+        """Trade ledger of an ETF's best strategy (or the given one)"""
+        results, best_strategy, _ = self._etf(symbol)
+        strategy = self._strategy(strategy) if strategy else best_strategy
+        return {'Symbol': symbol, 'Strategy': strategy, 'Trades': _records(extract_trades(results[strategy]))}
+
+    def backtest(self, symbol, strategy, **params):
+        """Run a strategy with custom parameters on the cached weekly bars"""
+        self._etf(symbol)
+        self._strategy(strategy)
+        unknown = set(params) - set(PARAMETER_GRIDS[strategy]) - {'initial_capital'}
+        if unknown:
+            raise ServiceError(400, f"Unknown parameters for {strategy}: {', '.join(sorted(unknown))}")
+        try:
+            params = {name: BACKTEST_PARAMETERS[name][0](value) for name, value in params.items()}
+        except ValueError as e:
+            raise ServiceError(400, f"Invalid parameter value: {e}")
+        for name, value in params.items():
+            _, low, high = BACKTEST_PARAMETERS[name]
+            # NaN fails the comparison too
+            if not low < value <= high:
+                raise ServiceError(400, f"{name} must be greater than {low} and at most {high}, got {value}")
+        params.setdefault('initial_capital', self.initial_capital)
+
+        if not self._backtests.acquire(timeout=self.backtest_wait):
+            self.backtests_rejected += 1
+            raise ServiceError(503, "Too many backtests in flight")
+        try:
+            weekly_df, weekly_vix = self.bars[symbol]
+            df = run_strategy(strategy, weekly_df, weekly_vix, features=self.features[symbol],
+                              cost_models=self.cost_models, **params)
+        finally:
+            self._backtests.release()
+
+        return {'Symbol': symbol, 'Strategy': strategy, 'Parameters': params,
+                'Metrics': calculate_performance_metrics(df),
+                'Position': int(np.nan_to_num(df['Position'].iloc[-1])),
+                'Trades': _records(extract_trades(df))}
+
+    def stats(self):
+        """Request latency per route and the state of the caches"""
+        return {'Loaded At': self.loaded_at.isoformat() if self.loaded_at is not None else None,
+                'Symbols': len(self.results),
+                'Backtests Rejected': self.backtests_rejected,
+                'Features Computed': sum(features.computed for features in self.features.values()),
+                'Feature Hits': sum(features.hits for features in self.features.values()),
+                'Results Memory (MB)': sum(result.nbytes for results, _, _ in self.results.values()
+                                           for result in results.values()) / 1e6,
+                'Latency': self.latency.summary(),
+                'Lanes': get_scheduler().stats()}
+
+def _records(df):
+    """JSON-ready records of a frame (dates as ISO strings, NaN as null)"""
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    GET  /signals                       latest signal of every ETF
+    GET  /signals/<symbol>              latest signal of one ETF
+    GET  /metrics/<symbol>              per-strategy performance metrics
+    GET  /trades/<symbol>[?strategy=]   trade ledger
+    GET  /backtest/<symbol>?strategy=..&<parameter>=..
+                                        on-demand backtest with custom parameters
+    GET  /stats                         latency metrics and cache state
+    POST /reload                        reload bars and results
+    """
+
+    service = None
+
+    def _route(self, method):
+        url = urllib.parse.urlparse(self.path)
+        parts = [urllib.parse.unquote(part) for part in url.path.strip('/').split('/') if part]
+        query = {name: values[-1] for name, values in urllib.parse.parse_qs(url.query).items()}
+        service = self.service
+        route = f"{method} /{parts[0] if parts else ''}"
+
+        if method == 'GET' and parts == ['signals']:
+            return route, lambda: service.latest_signals()
+        if method == 'GET' and len(parts) == 2 and parts[0] == 'signals':
+            return route, lambda: service.latest_signal(parts[1])
+        if method == 'GET' and len(parts) == 2 and parts[0] == 'metrics':
+            return route, lambda: service.metrics(parts[1])
+        if method == 'GET' and len(parts) == 2 and parts[0] == 'trades':
+            return route, lambda: service.trades(parts[1], query.get('strategy'))
+        if method == 'GET' and len(parts) == 2 and parts[0] == 'backtest':
+            strategy = query.pop('strategy', None)
+            if strategy is None:
+                return route, _raise(ServiceError(400, "Missing strategy"))
+            return route, lambda: service.backtest(parts[1], strategy, **query)
+        if method == 'GET' and parts == ['stats']:
+            return route, lambda: service.stats()
+        if method == 'POST' and parts == ['reload']:
+            return route, lambda: (service.load(), {'Symbols': len(service.results)})[1]
+        return route, _raise(ServiceError(404, f"No route for {method} {url.path}"))
+
+    def _handle(self, method):
+        start = time.perf_counter()
+        route, handler = self._route(method)
+        try:
+            status, body = 200, handler()
+        except ServiceError as e:
+            status, body = e.status, {'error': str(e)}
+        except Exception as e:
+            status, body = 500, {'error': f"{type(e).__name__}: {e}"}
+
+        payload = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        self.service.latency.record(route, time.perf_counter() - start, error=status >= 400)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def log_message(self, *args):
+        pass
+
+def _raise(error):
+    def handler():
+        raise error
+    return handler
+
+def make_server(service, host='127.0.0.1', port=8000):
+    """HTTP server answering from a loaded SignalService (one thread per request)"""
+    handler = type('BoundServiceHandler', (ServiceHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve ETF signals, metrics and backtests over HTTP")
+    parser.add_argument('symbols', nargs='+', help="ETF symbols to serve")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--store', help="Bar store directory to read daily bars from")
+    parser.add_argument('--max-backtests', type=int, default=2, help="On-demand backtests run at once")
+    args = parser.parse_args()
+
+    store = BarStore(args.store) if args.store else None
+    service = SignalService(args.symbols, store=store, max_backtests=args.max_backtests).load()
+    server = make_server(service, args.host, args.port)
+    print(f"Serving {len(service.results)} ETFs on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+from .indicators import ewm_mean, rolling_mean
+
+# Feature kind -> builder(store, *args) computing it from the store's bars and other features
+FEATURE_BUILDERS = {}
+
+# Feature kind -> builder(store, args_list) computing several features of the kind in one batched call
+BATCH_BUILDERS = {}
+
+def feature(kind):
+    """Register the builder of a feature kind"""
+    def register(builder):
+        FEATURE_BUILDERS[kind] = builder
+        return builder
+    return register
+
+def batch_feature(kind):
+    """Register the batched builder of a feature kind (see FeatureStore.prefetch)"""
+    def register(builder):
+        BATCH_BUILDERS[kind] = builder
+        return builder
+    return register
+
+@feature('ema')
+def _ema(store, span):
+    """adjust=False EWM of the close"""
+    return ewm_mean(store.bars['Close'], span)
+
+@batch_feature('ema')
+def _emas(store, args_list):
+    """EMAs of the close for several spans, in one ewm_mean call"""
+    return list(ewm_mean(store.bars['Close'], [span for span, in args_list]))
+
+@feature('macd')
+def _macd(store, fast_span, slow_span, signal_span):
+    """(MACD line, signal line) as Series, from the shared close EMAs"""
+    macd = store.get('ema', fast_span) - store.get('ema', slow_span)
+    signal = ewm_mean(macd, signal_span)
+    index = store.bars.index
+    return pd.Series(macd, index=index), pd.Series(signal, index=index)
+
+@feature('vix_close')
+def _vix_close(store):
+    """Weekly VIX close aligned to the bars"""
+    if store.vix_bars is None:
+        raise ValueError("This feature needs VIX bars")
+    return store.vix_bars['Close'].reindex(store.bars.index)
+
+@feature('vpvma_line')
+def _vpvma_line(store, window):
+    """VIX-adjusted Price Volume Moving Average"""
+    bars = store.bars
+    volume_price = bars['Close'] * bars['Volume'] * (1 / store.get('vix_close'))
+    mean_volume_price, mean_volume = rolling_mean([volume_price, bars['Volume']], window)
+    return mean_volume_price / mean_volume
+
+@batch_feature('vpvma_line')
+def _vpvma_lines(store, args_list):
+    """VPVMAs of several windows, in one rolling_mean call"""
+    bars = store.bars
+    volume_price = bars['Close'] * bars['Volume'] * (1 / store.get('vix_close'))
+    means = rolling_mean([volume_price, bars['Volume']], [window for window, in args_list])
+    return [mean_volume_price / mean_volume for mean_volume_price, mean_volume in means]
+
+@feature('vpvma')
+def _vpvma(store, window, signal_window):
+    """(VPVMA, signal line) as Series"""
+    vpvma = store.get('vpvma_line', window)
+    index = store.bars.index
+    return pd.Series(vpvma, index=index), pd.Series(rolling_mean(vpvma, signal_window), index=index)
+
+class FeatureStore:
+    """
+    Memoized indicator features of one symbol's bars
+
+    Features are keyed by kind and arguments, e.g. ('ema', 12) or
+    ('macd', 12, 26, 9), and each distinct key is computed once and
+    shared by every strategy run on the store (features build on each
+    other, so MACDs of different signal spans share their EMAs). Lookups
+    are thread safe: a strategy asking for a feature being computed by
+    another waits for it instead of computing it again. Values are shared,
+    so callers must not modify them.
+
+    With max_features set, the store keeps only that many features and
+    evicts the least recently used one, so a long-lived store (e.g. the
+    signal service's, fed by arbitrary request parameters) stays bounded;
+    an evicted feature is computed again on its next use.
+
+    Parameters:
+    -----------
+    bars : pandas.DataFrame
+        OHLCV bars of the symbol
+    vix_bars : pandas.DataFrame, optional
+        VIX bars with a Close column (needed by the VPVMA features)
+    max_features : int, optional
+        Largest number of features kept (unbounded by default)
+    """
+
+    def __init__(self, bars, vix_bars=None, max_features=None):
+        self.bars = bars
+        self.vix_bars = vix_bars
+        self.max_features = max_features
+        self._values = OrderedDict()
+        self._counts = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind, *args):
+        """Value of a feature, computed on first use"""
+        key = (kind,) + tuple(args)
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._values:
+                    self._values.move_to_end(key)
+                    self._counts[key][1] += 1
+                    return self._values[key]
+            if kind not in FEATURE_BUILDERS:
+                raise ValueError(f"Unknown feature: {kind}")
+            value = FEATURE_BUILDERS[kind](self, *args)
+            self._put(key, value)
+            return value
+
+    def prefetch(self, kind, args_list):
+        """
+        Compute the features of one kind for several arguments at once
+
+        Kinds with a batched builder (e.g. 'ema', 'vpvma_line') compute all
+        the missing ones in a single kernel call, e.g. every EMA span of a
+        parameter sweep in one ewm_mean; other kinds fall back to get().
+        Features already held are left as they are.
+        """
+        # Key locks are taken in sorted order, so overlapping prefetches cannot deadlock
+        keys = sorted({(kind,) + tuple(args) for args in args_list})
+        if kind not in BATCH_BUILDERS:
+            for key in keys:
+                self.get(*key)
+            return
+        with self._lock:
+            key_locks = [self._locks.setdefault(key, threading.Lock()) for key in keys]
+        for key_lock in key_locks:
+            key_lock.acquire()
+        try:
+            with self._lock:
+                missing = [key for key in keys if key not in self._values]
+            if missing:
+                for key, value in zip(missing, BATCH_BUILDERS[kind](self, [key[1:] for key in missing])):
+                    self._put(key, value)
+        finally:
+            for key_lock in key_locks:
+                key_lock.release()
+
+    def _put(self, key, value):
+        """Keep a computed feature, evicting the least recently used beyond max_features"""
+        with self._lock:
+            self._values[key] = value
+            self._counts.setdefault(key, [0, 0])[0] += 1
+            while self.max_features is not None and len(self._values) > self.max_features:
+                evicted, _ = self._values.popitem(last=False)
+                self._locks.pop(evicted, None)
+
+    @property
+    def computed(self):
+        """Number of feature computations (evicted features count again when recomputed)"""
+        with self._lock:
+            return sum(computed for computed, _ in self._counts.values())
+
+    def __len__(self):
+        """Number of features held"""
+        with self._lock:
+            return len(self._values)
+
+    @property
+    def hits(self):
+        """Number of lookups answered from memory"""
+        with self._lock:
+            return sum(hits for _, hits in self._counts.values())
+
+    def stats(self):
+        """Computations and hits per feature"""
+        with self._lock:
+            counts = dict(self._counts)
+        return pd.DataFrame([{'Feature': f"{key[0]}({', '.join(map(str, key[1:]))})", 'Computed': computed,
+                              'Hits': hits} for key, (computed, hits) in counts.items()],
+                            columns=['Feature', 'Computed', 'Hits'])
+
+    def __str__(self):
+        return f"{self.computed} features computed, {self.hits} hits"
@@ -0,0 +1,271 @@
+import os
+import pickle
+import pandas as pd
+from ..utils.performance import TRADE_COLUMNS, append_trade_info, get_trade_info, trade_path
+from ..utils.precision import DEFAULT_PRECISION
+from ..utils.walk_forward import run_strategy
+from .features import FeatureStore
+from .indicators import ewm_continue, ewm_state
+from .registry import STRATEGIES, run_signals, strategy_features
+from .result import StrategyResult
+
+def state_file(ticker, strategy):
+    """Path of the persisted state of a strategy on an ETF (next to its trade_info CSV)"""
+    return os.path.join('data', ticker, f'state_{strategy}.pkl')
+
+def _macd_state(features, key):
+    """End-of-run state of a MACD feature: its close EWMs and signal EWM"""
+    _, fast_span, slow_span, _ = key
+    close = features.bars['Close']
+    line, signal = features.get(*key)
+    return {'fast': ewm_state(close, features.get('ema', fast_span)),
+            'slow': ewm_state(close, features.get('ema', slow_span)),
+            'signal': ewm_state(line, signal)}
+
+def _continue_macd(key, state, bars, vix_bars):
+    """(MACD line, signal line) of new bars continuing the stored EWMs, and the state after them"""
+    _, fast_span, slow_span, signal_span = key
+    close = bars['Close'].to_numpy(dtype=float)
+    fast, fast_state = ewm_continue(close, fast_span, state['fast'])
+    slow, slow_state = ewm_continue(close, slow_span, state['slow'])
+    line = fast - slow
+    signal, signal_state = ewm_continue(line, signal_span, state['signal'])
+    value = pd.Series(line, index=bars.index), pd.Series(signal, index=bars.index)
+    return value, {'fast': fast_state, 'slow': slow_state, 'signal': signal_state}
+
+def _vpvma_state(features, key):
+    """End-of-run state of a VPVMA feature: the trailing weeks its rolling means reach back over"""
+    _, window, signal_window = key
+    lookback = window + signal_window - 2
+    bars = features.bars[['Close', 'Volume']].iloc[max(len(features.bars) - lookback, 0):]
+    return {'bars': bars, 'vix': features.vix_bars['Close'].reindex(bars.index)}
+
+def _continue_vpvma(key, state, bars, vix_bars):
+    """(VPVMA, signal line) of new bars from the stored trailing weeks, and the state after them"""
+    lookback = len(state['bars'])
+    bars = pd.concat([state['bars'], bars[['Close', 'Volume']]])
+    vix = pd.concat([state['vix'], vix_bars['Close'].reindex(bars.index[lookback:])])
+    line, signal = FeatureStore(bars, vix.to_frame('Close')).get(*key)
+    trailing = len(bars) - lookback
+    return (line.iloc[lookback:], signal.iloc[lookback:]), {'bars': bars.iloc[trailing:], 'vix': vix.iloc[trailing:]}
+
+# Feature kind -> (state(features, key) after a full run, continue(key, state, bars, vix_bars) -> (value, state))
+FEATURE_CONTINUATIONS = {
+    'macd': (_macd_state, _continue_macd),
+    'vpvma': (_vpvma_state, _continue_vpvma)
+}
+
+class IncrementalBacktest:
+    """
+    A strategy's result and trade ledger on one ETF, extendable week by week
+
+    Next to the compact StrategyResult and the closed trades it keeps the
+    end-of-run state of every path-dependent step: the state of each
+    indicator feature (the MACD EWMs, or the trailing weeks the VPVMA
+    rolling means need), the run state of finish_strategy (last
+    crossover signal, stop loss position and entry price, last close and
+    position, portfolio growth) and the open trade. extend() runs only the
+    new weeks through the registered strategy from that state and appends
+    them, with results identical to a full rerun on all weeks.
+
+    Intra-week stops (daily_df) are not supported: they need the daily bars
+    of the stop weeks.
+
+    Parameters:
+    -----------
+    settings : dict
+        Strategy, indicator parameters and run options
+    result : StrategyResult
+        Result over the weeks run so far
+    trades : pandas.DataFrame
+        Trades closed so far
+    state : dict
+        End-of-run state (see run())
+    """
+
+    def __init__(self, settings, result, trades, state):
+        self.settings = settings
+        self.result = result
+        self.trades = trades
+        self.state = state
+
+    @staticmethod
+    def make_settings(strategy, initial_capital=1_000_000, stop_loss_pct=0.05, cost_models=None, net_of=None,
+                      precision=DEFAULT_PRECISION, **params):
+        """Settings of a run, with the strategy's default indicator parameters filled in"""
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        spec = STRATEGIES[strategy]
+        unknown = set(params) - set(spec.parameters)
+        if unknown:
+            raise ValueError(f"Unknown parameters for {strategy}: {', '.join(sorted(unknown))}")
+        if any(key[0] not in FEATURE_CONTINUATIONS for key in strategy_features(strategy)):
+            raise ValueError(f"{strategy} uses features that cannot be continued")
+        return {'strategy': strategy, 'params': {**spec.parameters, **params},
+                'initial_capital': initial_capital, 'stop_loss_pct': stop_loss_pct,
+                'cost_models': dict(cost_models) if cost_models else None, 'net_of': net_of,
+                'precision': precision}
+
+    @classmethod
+    def run(cls, strategy, weekly_df, weekly_vix=None, features=None, **kwargs):
+        """
+        Full run of a strategy on weekly bars, keeping the state to extend it
+
+        Parameters:
+        -----------
+        strategy : str
+            Strategy name
+        weekly_df : pandas.DataFrame
+            Weekly OHLCV bars
+        weekly_vix : pandas.DataFrame, optional
+            Weekly VIX bars with a Close column (required for VPVMA)
+        features : FeatureStore, optional
+            Feature store of the bars shared with other strategies
+        **kwargs :
+            initial_capital, stop_loss_pct, cost_models, net_of, precision
+            and indicator parameters (see make_settings)
+        """
+        settings = cls.make_settings(strategy, **kwargs)
+        features = features if features is not None else FeatureStore(weekly_df, weekly_vix)
+        run_state = {}
+        frame = run_strategy(strategy, weekly_df, weekly_vix, initial_capital=settings['initial_capital'],
+                             stop_loss_pct=settings['stop_loss_pct'], cost_models=settings['cost_models'],
+                             net_of=settings['net_of'], features=features, state=run_state, **settings['params'])
+        result = StrategyResult.from_frame(strategy, frame, index=weekly_df.index, precision=settings['precision'])
+        trades, trade_state = trade_path(result.index, result.position_change, result.position, result.close)
+
+        state = {
+            'indicators': {key: FEATURE_CONTINUATIONS[key[0]][0](features, key)
+                           for key in strategy_features(strategy, **settings['params'])},
+            'run': run_state,
+            'trade': trade_state,
+            'first_bar': weekly_df.iloc[:1],
+            'last_bar': weekly_df.iloc[-1:]
+        }
+        return cls(settings, result, pd.DataFrame(trades, columns=TRADE_COLUMNS), state)
+
+    @property
+    def open_trade(self):
+        """(position, entry price, entry date) of the open trade, or None when flat"""
+        position, entry_price, entry_date = self.state['trade']
+        return None if position == 0 else (position, entry_price, entry_date)
+
+    def matches(self, weekly_df, weekly_vix=None):
+        """Whether weekly_df continues the weeks run so far (same first and last bars, no revised VIX weeks)"""
+        state = self.state
+        if not len(weekly_df):
+            return False
+        at = weekly_df.index.searchsorted(self.result.index[-1])
+        if (at == len(weekly_df) or not weekly_df.iloc[at:at + 1].equals(state['last_bar'])
+                or not weekly_df.iloc[:1].equals(state['first_bar'])):
+            return False
+        for indicator in state['indicators'].values():
+            if 'vix' in indicator:
+                vix = indicator['vix']
+                if weekly_vix is None or not weekly_vix['Close'].reindex(vix.index).equals(vix):
+                    return False
+        return True
+
+    def extend(self, weekly_df, weekly_vix=None):
+        """
+        Run the weeks of weekly_df after the last one run so far and append them
+
+        Parameters:
+        -----------
+        weekly_df : pandas.DataFrame
+            Weekly bars continuing those run so far (typically the whole
+            history up to a later end date)
+        weekly_vix : pandas.DataFrame, optional
+            Weekly VIX bars covering the new weeks (required for VPVMA)
+
+        Returns:
+        --------
+        trades : pandas.DataFrame
+            Trades closed in the new weeks (also appended to self.trades)
+        """
+        if not self.matches(weekly_df, weekly_vix):
+            raise ValueError("Weekly bars do not continue the stored run; run the strategy again")
+        new = weekly_df.iloc[weekly_df.index.searchsorted(self.result.index[-1]) + 1:]
+        if not len(new):
+            return pd.DataFrame(columns=TRADE_COLUMNS)
+
+        settings, state = self.settings, self.state
+        values, indicators = [], {}
+        for key, indicator in state['indicators'].items():
+            value, indicators[key] = FEATURE_CONTINUATIONS[key[0]][1](key, indicator, new, weekly_vix)
+            values.append(value)
+
+        # The registered strategy runs the new weeks from the stored signal, stop loss and portfolio state
+        run_state = dict(state['run'])
+        frame = run_signals(settings['strategy'], new, values, settings['initial_capital'],
+                            settings['stop_loss_pct'], cost_models=settings['cost_models'],
+                            net_of=settings['net_of'], state=run_state)
+        result = self.result.append(StrategyResult.from_frame(self.result.name, frame,
+                                                              precision=settings['precision']))
+
+        # Trades closed in the new weeks, from the open trade on
+        start = len(self.result)
+        trades, trade_state = trade_path(result.index[start:], result.position_change[start:],
+                                         result.position[start:], result.close[start:], *state['trade'])
+        trades = pd.DataFrame(trades, columns=TRADE_COLUMNS)
+
+        self.result = result
+        if len(trades):
+            self.trades = pd.concat([self.trades, trades], ignore_index=True) if len(self.trades) else trades
+        state.update({'indicators': indicators, 'run': run_state, 'trade': trade_state, 'last_bar': new.iloc[-1:]})
+        return trades
+
+    def save(self, path):
+        """Persist the result, trades and state"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def load(path):
+        """Read a backtest persisted with save()"""
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+def run_incremental(symbol, strategy, weekly_df, weekly_vix, daily_df=None, features=None, **kwargs):
+    """
+    Strategy result of an ETF, extending its persisted run when the weeks continue it
+
+    The state saved by the last run (see state_file) is extended with the
+    new weeks and their closed trades are appended to the ETF's trade_info
+    CSV. Without a usable state (first run, other settings, revised bars)
+    the strategy runs on the whole history and the CSV is rewritten.
+
+    Parameters:
+    -----------
+    symbol : str
+        ETF symbol
+    strategy : str
+        Strategy name
+    weekly_df, weekly_vix : pandas.DataFrame
+        Weekly bars of the ETF and VIX
+    daily_df : pandas.DataFrame, optional
+        Must be None (intra-week stops are not supported)
+    features : FeatureStore, optional
+        Feature store of the bars shared with other strategies (for full runs)
+    **kwargs :
+        Run settings (see IncrementalBacktest.make_settings)
+
+    Returns:
+    --------
+    result : StrategyResult
+        Result over all weeks of weekly_df
+    """
+    if daily_df is not None:
+        raise ValueError("Incremental runs do not support intra-week stops")
+    path = state_file(symbol, strategy)
+    backtest = IncrementalBacktest.load(path) if os.path.exists(path) else None
+    if (backtest is not None and backtest.settings == IncrementalBacktest.make_settings(strategy, **kwargs)
+            and backtest.matches(weekly_df, weekly_vix)):
+        append_trade_info(backtest.extend(weekly_df, weekly_vix), strategy, symbol)
+    else:
+        backtest = IncrementalBacktest.run(strategy, weekly_df, weekly_vix, features=features, **kwargs)
+        get_trade_info(backtest.result, strategy, symbol)
+    backtest.save(path)
+    return backtest.result
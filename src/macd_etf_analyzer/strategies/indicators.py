@@ -0,0 +1,154 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+def _as_matrix(values):
+    """View 1-D or 2-D input as a (series x time) float array"""
+    values = np.asarray(values, dtype=float)
+    return np.atleast_2d(values), values.ndim == 1
+
+def ewm_mean(values, spans):
+    """
+    Exponentially weighted means for many series and spans at once
+
+    Matches pandas .ewm(span=span, adjust=False).mean(). The recursion
+    y[t] = alpha * x[t] + (1 - alpha) * y[t-1] runs along the time axis
+    with scipy.signal.lfilter for all series of one span in a single call.
+    Leading NaNs (the warm-up of an upstream indicator) stay NaN and the
+    recursion starts at each series' first valid value. Series with NaNs
+    after their first valid value are filtered run by run with pandas'
+    gap weighting (see ewm_continue).
+
+    Parameters:
+    -----------
+    values : array-like
+        (series x time) or (time,) values
+    spans : int or sequence of int
+        EWM spans
+
+    Returns:
+    --------
+    means : numpy.ndarray
+        (spans x series x time) means; the spans axis is dropped for a
+        scalar span and the series axis for 1-D input
+    """
+    matrix, one_series = _as_matrix(values)
+    span_list = np.atleast_1d(spans)
+    n_series, n_times = matrix.shape
+    result = np.full((len(span_list), n_series, n_times), np.nan)
+
+    valid = ~np.isnan(matrix)
+    first_valid = np.where(valid.any(axis=1), valid.argmax(axis=1), n_times)
+    warm_up = np.arange(n_times) < first_valid[:, None]
+    has_gaps = (~valid & ~warm_up).any(axis=1)
+
+    # Back-fill the warm-up with the first valid value: the filter then
+    # holds that value until the series starts, as pandas does
+    linear = np.flatnonzero(~has_gaps & (first_valid < n_times))
+    series = matrix[linear]
+    start = series[np.arange(len(linear)), first_valid[linear]][:, None]
+    series = np.where(warm_up[linear], start, series)
+
+    for i, span in enumerate(span_list):
+        alpha = 2 / (span + 1)
+        if len(linear):
+            filtered, _ = lfilter([alpha], [1, alpha - 1], series, axis=-1, zi=(1 - alpha) * start)
+            result[i, linear] = np.where(warm_up[linear], np.nan, filtered)
+        for row in np.flatnonzero(has_gaps):
+            result[i, row] = ewm_continue(matrix[row], span)[0]
+
+    if one_series:
+        result = result[:, 0]
+    return result if np.ndim(spans) else result[0]
+
+def ewm_continue(values, span, state=None):
+    """
+    adjust=False EWM of one series, continuing the EWM of the values before it
+
+    As in pandas, a NaN holds the mean and the first value after k NaNs
+    weighs alpha against (1 - alpha)^(k + 1) of the held mean. Each run
+    of valid values is one lfilter call, so a series filtered in pieces
+    (each continuing from the state of the previous one) gives exactly
+    the means of one call on the whole series.
+
+    Parameters:
+    -----------
+    values : array-like
+        (time,) values
+    span : int
+        EWM span
+    state : tuple, optional
+        (mean, missing) after the preceding values: their last mean and
+        the number of NaNs since their last valid value (see ewm_state);
+        by default the EWM starts at the first valid value
+
+    Returns:
+    --------
+    means : numpy.ndarray
+        (time,) means
+    state : tuple
+        (mean, missing) after the last value
+    """
+    values = np.asarray(values, dtype=float)
+    alpha = 2 / (span + 1)
+    mean, missing = state if state is not None else (np.nan, 0)
+    means = np.full(len(values), np.nan)
+
+    # Start and end of each run of valid values
+    edges = np.flatnonzero(np.diff(np.r_[0, ~np.isnan(values), 0]))
+    end = 0
+    for start, run_end in zip(edges[::2], edges[1::2]):
+        means[end:start] = mean
+        missing += start - end
+        run = values[start:run_end]
+        if np.isnan(mean):
+            mean = run[0]
+        elif missing:
+            old_weight = (1 - alpha) ** (missing + 1)
+            means[start] = (old_weight * mean + alpha * run[0]) / (old_weight + alpha)
+            mean, run, start = means[start], run[1:], start + 1
+        if len(run):
+            means[start:run_end] = lfilter([alpha], [1, alpha - 1], run, zi=[(1 - alpha) * mean])[0]
+        mean, missing, end = means[run_end - 1], 0, run_end
+    means[end:] = mean
+    return means, (mean, missing + len(values) - end)
+
+def ewm_state(values, means):
+    """(mean, missing) state of an EWM after the last of its values (see ewm_continue)"""
+    valid = np.flatnonzero(~np.isnan(np.asarray(values, dtype=float)))
+    return float(np.asarray(means)[-1]), len(values) - 1 - valid[-1] if len(valid) else len(values)
+
+def rolling_mean(values, windows):
+    """
+    Rolling means for many series and windows at once
+
+    Matches pandas .rolling(window).mean(): a mean needs a full window of
+    valid values, so warm-up and any window touching a NaN is NaN. Every
+    window is summed directly over a strided view (no running sums), so
+    long series accumulate no rounding drift.
+
+    Parameters:
+    -----------
+    values : array-like
+        (series x time) or (time,) values
+    windows : int or sequence of int
+        Window lengths
+
+    Returns:
+    --------
+    means : numpy.ndarray
+        (windows x series x time) means; the windows axis is dropped for a
+        scalar window and the series axis for 1-D input
+    """
+    matrix, one_series = _as_matrix(values)
+    window_list = np.atleast_1d(windows)
+    n_series, n_times = matrix.shape
+    result = np.full((len(window_list), n_series, n_times), np.nan)
+
+    for i, window in enumerate(window_list):
+        if window <= n_times:
+            result[i, :, window - 1:] = sliding_window_view(matrix, window, axis=-1).sum(axis=-1) / window
+
+    if one_series:
+        result = result[:, 0]
+    return result if np.ndim(windows) else result[0]
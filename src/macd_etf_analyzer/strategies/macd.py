@@ -1,109 +1,83 @@
-import pandas as pd
-from ..utils.position_manager import apply_stop_loss, calculate_strategy_returns
+from ..data.bars import resample_weekly, to_market_time
+from .features import FeatureStore
+from .registry import register_strategy, run_registered
+from .signals import crossover_positions, finish_strategy  # also importable from here, as before
 
-def get_macd_signals(df=None, symbol='^GSPC', start_date='2005-01-01', end_date='2023-12-31', initial_capital=1_000_000):
+MACD_PARAMETERS = {'fast_span': 12, 'slow_span': 26, 'signal_span': 9}
+MACD_FEATURES = [('macd', 'fast_span', 'slow_span', 'signal_span')]
+
+def compute_macd(close, fast_span=12, slow_span=26, signal_span=9):
+    """Return the MACD line and its signal line for a close series"""
+    return FeatureStore(close.to_frame('Close')).get('macd', fast_span, slow_span, signal_span)
+
+@register_strategy('MACD', MACD_PARAMETERS, MACD_FEATURES, 'MACD')
+def macd_signals(bars, macd):
+    """Long above the signal line, short below"""
+    line, signal = macd
+    return line, signal, None
+
+@register_strategy('MACD Zero-Cross', MACD_PARAMETERS, MACD_FEATURES, 'MACD')
+def macd_zero_cross_signals(bars, macd):
+    """Entries also need the MACD above/below zero"""
+    line, signal = macd
+    return line, signal, 0
+
+def run_macd_strategy(weekly_df, fast_span=12, slow_span=26, signal_span=9, zero_cross=False,
+                      initial_capital=1_000_000, stop_loss_pct=0.05, daily_df=None, cost_models=None, net_of=None,
+                      features=None):
+    """
+    Run the MACD strategy on precomputed weekly bars
+    
+    Parameters:
+    -----------
+    weekly_df : pandas.DataFrame
+        Weekly OHLCV bars (not modified)
+    fast_span, slow_span, signal_span : int
+        EMA spans of the MACD
+    zero_cross : bool
+        Require MACD above/below zero for entries (zero-crossing variant)
+    initial_capital : float
+        Starting portfolio value
+    stop_loss_pct : float
+        Stop loss threshold
+    daily_df : pandas.DataFrame, optional
+        Daily bars; if given, stop exits are resolved intra-week
+    cost_models, net_of :
+        Transaction cost scenarios passed to calculate_strategy_returns
+    features : FeatureStore, optional
+        Feature store of weekly_df shared with other strategies
+    
+    Returns:
+    --------
+    weekly_df : pandas.DataFrame
+        Weekly frame with indicators, positions and returns
+    """
+    return run_registered('MACD Zero-Cross' if zero_cross else 'MACD', weekly_df, features=features,
+                          initial_capital=initial_capital, stop_loss_pct=stop_loss_pct, daily_df=daily_df,
+                          cost_models=cost_models, net_of=net_of, fast_span=fast_span, slow_span=slow_span,
+                          signal_span=signal_span)
+
+def get_macd_signals(df=None, symbol='^GSPC', start_date='2005-01-01', end_date='2023-12-31', initial_capital=1_000_000, stop_loss_pct=0.05, intraweek_stops=False, cost_models=None, net_of=None):
     """MACD strategy with pre-downloaded data option"""
     if df is None:
         return None
     
-    # Convert timezone from UTC to US/Eastern
-    df.index = pd.to_datetime(df.index)
-    df.index = df.index.tz_convert('US/Eastern')
+    # Convert timezone from UTC to US/Eastern (the input is not modified)
+    df = to_market_time(df)
     
     # Resample to weekly data (last trading day of the week)
-    weekly_df = df.resample('W').agg({
-        'Open': 'first',
-        'High': 'max',
-        'Low': 'min',
-        'Close': 'last',
-        'Volume': 'sum'
-    })
-    
-    # Calculate weekly MACD
-    exp1 = weekly_df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = weekly_df['Close'].ewm(span=26, adjust=False).mean()
-    macd = exp1 - exp2
-    signal = macd.ewm(span=9, adjust=False).mean()
-    
-    # Create signals on weekly data
-    weekly_df['MACD'] = macd
-    weekly_df['Signal_Line'] = signal
-    weekly_df['MACD_Histogram'] = macd - signal
-    
-    # Generate buy/sell signals
-    weekly_df['Position'] = 0
-    weekly_df['Position'] = weekly_df['Position'].mask(macd > signal, 1)
-    weekly_df['Position'] = weekly_df['Position'].mask(macd < signal, -1)
-    
-    # Shift positions by 1 week to implement signal lag
-    weekly_df['Position'] = weekly_df['Position'].shift(1)
-    
-    # Initialize Portfolio Value
-    weekly_df['Portfolio_Value'] = initial_capital
-    
-    # Apply stop loss with 5%
-    weekly_df = apply_stop_loss(weekly_df, stop_loss_pct=0.05)
+    weekly_df = resample_weekly(df)
     
-    # Recalculate returns after stop loss
-    weekly_df = calculate_strategy_returns(weekly_df)
-    
-    return weekly_df
+    return run_macd_strategy(weekly_df, initial_capital=initial_capital, stop_loss_pct=stop_loss_pct,
+                             daily_df=df if intraweek_stops else None, cost_models=cost_models, net_of=net_of)
 
-def get_macd_signals_zero_cross(df, symbol):
+def get_macd_signals_zero_cross(df, symbol, stop_loss_pct=0.05, intraweek_stops=False, cost_models=None, net_of=None):
     """MACD zero-crossing strategy implementation"""
-    # Convert timezone from UTC to US/Eastern
-    df.index = pd.to_datetime(df.index)
-    df.index = df.index.tz_convert('US/Eastern')
+    # Convert timezone from UTC to US/Eastern (the input is not modified)
+    df = to_market_time(df)
     
     # Resample to weekly data (last trading day of the week)
-    weekly_df = df.resample('W').agg({
-        'Open': 'first',
-        'High': 'max',
-        'Low': 'min',
-        'Close': 'last',
-        'Volume': 'sum'
-    })
-    
-    # Calculate weekly MACD
-    exp1 = weekly_df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = weekly_df['Close'].ewm(span=26, adjust=False).mean()
-    macd = exp1 - exp2
-    signal = macd.ewm(span=9, adjust=False).mean()
-    
-    # Create signals on weekly data
-    weekly_df['MACD'] = macd
-    weekly_df['Signal_Line'] = signal
-    weekly_df['MACD_Histogram'] = macd - signal
-    
-    # Generate buy/sell signals with zero-line condition
-    weekly_df['Position'] = 0
-    
-    # Previous position to maintain when no new signal
-    prev_position = 0
-    
-    for i in range(len(weekly_df)):
-        # Buy signal: MACD crosses above signal line AND MACD is above zero
-        if (macd.iloc[i] > signal.iloc[i]) and (macd.iloc[i] > 0):
-            weekly_df.iloc[i, weekly_df.columns.get_loc('Position')] = 1
-            prev_position = 1
-        # Sell signal: MACD crosses below signal line AND MACD crosses below zero
-        elif (macd.iloc[i] < signal.iloc[i]) and (macd.iloc[i] < 0):
-            weekly_df.iloc[i, weekly_df.columns.get_loc('Position')] = -1
-            prev_position = -1
-        else:
-            # Maintain previous position when no new signal
-            weekly_df.iloc[i, weekly_df.columns.get_loc('Position')] = prev_position
-    
-    # Shift positions by 1 week to implement signal lag
-    weekly_df['Position'] = weekly_df['Position'].shift(1)
-    
-    # Initialize Portfolio Value
-    weekly_df['Portfolio_Value'] = 1_000_000
-    
-    # Apply stop loss with 5%
-    weekly_df = apply_stop_loss(weekly_df, stop_loss_pct=0.05)
-    
-    # Recalculate returns after stop loss
-    weekly_df = calculate_strategy_returns(weekly_df)
+    weekly_df = resample_weekly(df)
     
-    return weekly_df 
\ No newline at end of file
+    return run_macd_strategy(weekly_df, zero_cross=True, stop_loss_pct=stop_loss_pct,
+                             daily_df=df if intraweek_stops else None, cost_models=cost_models, net_of=net_of)
@@ -0,0 +1,92 @@
+from collections import namedtuple
+from ..utils.copies import copy_frame
+from .features import FeatureStore
+from .signals import crossover_positions, finish_strategy
+
+# name : strategy name
+# parameters : indicator parameter -> default value
+# features : features the strategy needs, as (kind, parameter name, ...) templates
+# signals : signals(bars, *features) -> (line, signal line, zero line or None)
+# line_column : frame column of the line (its histogram goes to <line_column>_Histogram)
+StrategySpec = namedtuple('StrategySpec', ['name', 'parameters', 'features', 'signals', 'line_column'])
+
+# Strategy name -> StrategySpec, filled by the strategy modules
+STRATEGIES = {}
+
+def register_strategy(name, parameters, features, line_column):
+    """
+    Register the signal logic of a strategy
+
+    The decorated function receives the bars and the declared features
+    (fetched from the symbol's FeatureStore with the run's parameters) and
+    returns the line, its signal line and the zero line of the crossover
+    (None for a plain crossover). Lagging, stop loss and returns are shared
+    by all strategies (finish_strategy).
+    """
+    def register(signals):
+        STRATEGIES[name] = StrategySpec(name, dict(parameters), list(features), signals, line_column)
+        return signals
+    return register
+
+def strategy_features(name, **params):
+    """Feature keys a strategy needs with the given parameters"""
+    spec = STRATEGIES[name]
+    params = {**spec.parameters, **params}
+    return [(kind,) + tuple(params[parameter] for parameter in parameters) for kind, *parameters in spec.features]
+
+def run_registered(name, bars, vix_bars=None, features=None, initial_capital=1_000_000, stop_loss_pct=0.05,
+                   daily_df=None, cost_models=None, net_of=None, state=None, **params):
+    """
+    Run a registered strategy on bars
+
+    Parameters:
+    -----------
+    name : str
+        Strategy name
+    bars : pandas.DataFrame
+        OHLCV bars (not modified)
+    vix_bars : pandas.DataFrame, optional
+        VIX bars with a Close column, for strategies that use them
+    features : FeatureStore, optional
+        Feature store of these bars shared with other strategies; a
+        private one is used by default
+    initial_capital, stop_loss_pct, daily_df, cost_models, net_of, state :
+        Passed to finish_strategy
+    **params :
+        Indicator parameters overriding the strategy's defaults
+
+    Returns:
+    --------
+    df : pandas.DataFrame
+        Frame with indicators, positions and returns
+    """
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {name}")
+    spec = STRATEGIES[name]
+    unknown = set(params) - set(spec.parameters)
+    if unknown:
+        raise TypeError(f"Unknown parameters for {name}: {', '.join(sorted(unknown))}")
+    features = features if features is not None else FeatureStore(bars, vix_bars)
+
+    values = [features.get(*key) for key in strategy_features(name, **params)]
+    return run_signals(name, bars, values, initial_capital, stop_loss_pct, daily_df, cost_models, net_of, state)
+
+def run_signals(name, bars, values, initial_capital=1_000_000, stop_loss_pct=0.05, daily_df=None, cost_models=None,
+                net_of=None, state=None):
+    """
+    Run a registered strategy on bars given the values of its features
+
+    run_registered takes the values from a FeatureStore; incremental runs
+    pass features continued from an earlier run instead, with the state
+    of that run (see finish_strategy).
+    """
+    spec = STRATEGIES[name]
+    df = copy_frame(bars)
+    line, signal, zero_line = spec.signals(df, *values)
+    df[spec.line_column] = line
+    df['Signal_Line'] = signal
+    df[f'{spec.line_column}_Histogram'] = line - signal
+
+    previous = state.get('signal', 0) if state is not None else 0
+    position = crossover_positions(line, signal, zero_line=zero_line, previous=previous)
+    return finish_strategy(df, position, initial_capital, stop_loss_pct, daily_df, cost_models, net_of, state)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from ..utils.precision import DEFAULT_PRECISION, get_policy, column_kind
+
+STRATEGY_NAMES = ['MACD', 'MACD Zero-Cross', 'VPVMA', 'VPVMA Zero-Cross']
+
+NET_RETURNS_PREFIX = 'Net_Strategy_Returns_'
+
+class StrategyResult:
+    """
+    Compact backtest result of one strategy on one ETF
+
+    Keeps only the columns used by the reports over a weekly index shared
+    by all strategies of the ETF, in the dtypes of a precision policy
+    (float32/float16 by default). Columns are read with result['Column']
+    as pandas Series, like the strategy frames.
+    """
+
+    __slots__ = ('name', 'index', 'close', 'raw_close', 'high', 'low', 'returns', 'signal_position',
+                 'position', 'position_change', 'strategy_returns', 'portfolio_value', 'net_returns')
+
+    # Column name -> attribute
+    COLUMNS = {
+        'Close': 'close',
+        'Raw_Close': 'raw_close',
+        'High': 'high',
+        'Low': 'low',
+        'Returns': 'returns',
+        'Signal_Position': 'signal_position',
+        'Position': 'position',
+        'Position_Change': 'position_change',
+        'Strategy_Returns': 'strategy_returns',
+        'Portfolio_Value': 'portfolio_value'
+    }
+
+    def __init__(self, name, index, net_returns=None, precision=DEFAULT_PRECISION, **arrays):
+        self.name = name
+        self.index = index
+        policy = get_policy(precision)
+        for column, attribute in self.COLUMNS.items():
+            setattr(self, attribute, np.asarray(arrays[attribute], dtype=policy[column_kind(column)]))
+        self.net_returns = {scenario: np.asarray(values, dtype=policy['returns'])
+                            for scenario, values in (net_returns or {}).items()}
+
+    @classmethod
+    def from_frame(cls, name, df, index=None, precision=DEFAULT_PRECISION):
+        """
+        Build a result from a strategy frame
+
+        Positions are kept as in the frame, including the undefined (NaN)
+        first week before the signal lag, so trade ledgers and stop loss
+        sensitivities read from the result match those of the frame.
+
+        Parameters:
+        -----------
+        name : str
+            Strategy name
+        df : pandas.DataFrame
+            Frame returned by a strategy function
+        index : pandas.DatetimeIndex, optional
+            Index shared with the ETF's other results (must equal df.index)
+        precision : str or dict
+            Precision policy of the stored arrays (see utils.precision)
+        """
+        arrays = {attribute: df[column].to_numpy(dtype=float) for column, attribute in cls.COLUMNS.items()}
+        net_returns = {column[len(NET_RETURNS_PREFIX):]: df[column] for column in df.columns
+                       if column.startswith(NET_RETURNS_PREFIX)}
+        return cls(name, df.index if index is None else index, net_returns=net_returns, precision=precision,
+                   **arrays)
+
+    def append(self, other):
+        """
+        Result over these weeks followed by the (later) weeks of another
+
+        Equals from_frame on the joined frames: arrays keep their dtypes and
+        the first Position_Change of other is taken from this result's last
+        position.
+        """
+        joined = object.__new__(type(self))
+        joined.name = self.name
+        joined.index = self.index.append(other.index)
+        for attribute in self.COLUMNS.values():
+            setattr(joined, attribute, np.concatenate([getattr(self, attribute), getattr(other, attribute)]))
+        if len(self) and len(other):
+            joined.position_change[len(self)] = other.position[0] - self.position[-1]
+        joined.net_returns = {scenario: np.concatenate([values, other.net_returns[scenario]])
+                              for scenario, values in self.net_returns.items()}
+        return joined
+
+    @property
+    def columns(self):
+        """Names of the available columns"""
+        return list(self.COLUMNS) + [NET_RETURNS_PREFIX + scenario for scenario in self.net_returns]
+
+    def __getitem__(self, column):
+        if column.startswith(NET_RETURNS_PREFIX):
+            values = self.net_returns[column[len(NET_RETURNS_PREFIX):]]
+        else:
+            values = getattr(self, self.COLUMNS[column])
+        return pd.Series(values, index=self.index, name=column)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def nbytes(self):
+        """Memory held by the arrays (the shared index is not counted)"""
+        return (sum(getattr(self, attribute).nbytes for attribute in self.COLUMNS.values())
+                + sum(values.nbytes for values in self.net_returns.values()))
+
+    def to_frame(self):
+        """Expand the result into a DataFrame"""
+        return pd.DataFrame({column: self[column] for column in self.columns}, index=self.index)
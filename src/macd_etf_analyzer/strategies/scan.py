@@ -0,0 +1,225 @@
+import numpy as np
+import pandas as pd
+from ..data.bars import resample_bars_many
+from ..utils.position_manager import stop_loss_path
+from . import macd, vpvma  # register the built-in strategies
+from .indicators import ewm_mean, rolling_mean
+from .registry import STRATEGIES
+from .result import STRATEGY_NAMES
+
+# Relative accuracy of the truncated EWMs (share of the starting value still in the mean)
+DEFAULT_TOLERANCE = 1e-8
+
+SCAN_COLUMNS = ['ETF', 'Strategy', 'Date', 'Close', 'Position', 'Signal', 'Last Crossover', 'Distance',
+                'Distance (%)', 'Entry Price', 'Weeks Used']
+
+def ewm_warm_up(span, tol=DEFAULT_TOLERANCE):
+    """Bars after which an EWM started mid-series is within tol (relative) of the full-history EWM"""
+    return int(np.ceil(np.log(tol) / np.log(1 - 2 / (span + 1))))
+
+def warm_up_weeks(strategy, tol=DEFAULT_TOLERANCE, **params):
+    """
+    Trailing weeks needed before a strategy's indicators match the full history
+
+    An adjust=False EWM started at bar k differs from the full-history one
+    by (1 - alpha)^(t - k) times their gap at k, so the MACD needs the slow
+    EWM's and then the signal EWM's decay to reach tol; the VPVMA rolling
+    means are exact once both windows are full.
+    """
+    params = {**STRATEGIES[strategy].parameters, **params}
+    if strategy.startswith('MACD'):
+        return (ewm_warm_up(max(params['fast_span'], params['slow_span']), tol)
+                + ewm_warm_up(params['signal_span'], tol))
+    return params['window'] + params['signal_window'] - 1
+
+def _signal_lines(strategy, close, volume, vix_close, params):
+    """(line, signal line, zero line) of a strategy for (symbols x weeks) matrices, as in compute_macd/compute_vpvma"""
+    if strategy.startswith('MACD'):
+        fast, slow = ewm_mean(close, [params['fast_span'], params['slow_span']])
+        line = fast - slow
+        return line, ewm_mean(line, params['signal_span']), 0
+    volume_price = close * volume * (1 / vix_close)
+    means = rolling_mean(np.concatenate([volume_price, volume]), params['window'])
+    line = means[:len(close)] / means[len(close):]
+    return line, rolling_mean(line, params['signal_window']), close
+
+def _forward_fill(values):
+    """Forward-fill NaNs along the time axis"""
+    filled_at = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+    return values[np.arange(len(values))[:, None], np.maximum.accumulate(filled_at, axis=1)]
+
+def _crossover_positions(line, signal, zero_line, zero_cross, trusted):
+    """
+    Crossover positions (before the signal lag) and where they are determined
+
+    Zero-cross positions hold the last signal, so they are only known from
+    the first signal fired on trusted bars.
+    """
+    if not zero_cross:
+        position = np.where(line > signal, 1.0, np.where(line < signal, -1.0, 0.0))
+        return position, trusted
+    buy = (line > signal) & (line > zero_line)
+    sell = (line < signal) & (line < zero_line)
+    fired = np.where(buy & trusted, 1.0, np.where(sell & trusted, -1.0, np.nan))
+    position = _forward_fill(fired)
+    # Rows that cover the whole history are flat until their first signal
+    determined = ~np.isnan(position) | trusted.all(axis=1)[:, None]
+    return np.nan_to_num(position), determined
+
+def _resolve_stops(lagged, close, low, high, stop_loss_pct, first):
+    """
+    Stop loss state after the last bar, replaying as little history as possible
+
+    The state entering a run of equal lagged positions starting at bar r is
+    either flat (the run is entered at r) or the previous position stopped
+    out at r (the run is entered at r + 1). Replaying both from the latest
+    run start backwards, the first start where they agree fixes the state.
+    Returns None if no run start from `first` on does.
+    """
+    starts = np.flatnonzero(lagged[first + 1:] != lagged[first:-1]) + first + 1
+    for start in starts[::-1]:
+        entered = stop_loss_path(lagged[start:], close[start:], low[start:], high[start:], stop_loss_pct)[4]
+        stopped = stop_loss_path(lagged[start + 1:], close[start + 1:], low[start + 1:], high[start + 1:],
+                                 stop_loss_pct)[4]
+        if entered == stopped:
+            return entered
+    return None
+
+def _bar_arrays(weekly_df, weekly_vix):
+    """Index and float columns of one symbol's weekly bars, with the VIX close aligned to its weeks"""
+    arrays = {name: weekly_df[name].to_numpy(dtype=float) for name in ('Close', 'Low', 'High', 'Volume')}
+    arrays['Index'] = weekly_df.index
+    if weekly_vix is not None:
+        weeks, vix_weeks = weekly_df.index.asi8, weekly_vix.index.asi8
+        at = np.minimum(np.searchsorted(vix_weeks, weeks), len(vix_weeks) - 1)
+        arrays['VIX'] = np.where(vix_weeks[at] == weeks, weekly_vix['Close'].to_numpy(dtype=float)[at], np.nan)
+    return arrays
+
+def _scan_window(strategy, bar_arrays, length, warm_up, params, stop_loss_pct):
+    """Scan symbols on their trailing `length` weeks; returns (rows, symbols that need more history)"""
+    symbols = list(bar_arrays)
+    names = ('Close', 'Low', 'High', 'Volume', 'VIX') if strategy.startswith('VPVMA') else ('Close', 'Low', 'High')
+    columns = {name: np.full((len(symbols), length), np.nan) for name in names}
+    starts = np.zeros(len(symbols), dtype=int)
+    for i, symbol in enumerate(symbols):
+        arrays = bar_arrays[symbol]
+        starts[i] = max(length - len(arrays['Close']), 0)
+        for name in names:
+            columns[name][i, starts[i]:] = arrays[name][-length:]
+
+    # Rows holding a symbol's whole history are exact from its first bar
+    exact = np.array([len(bar_arrays[symbol]['Close']) <= length for symbol in symbols])
+    trusted = exact[:, None] | (np.arange(length) >= warm_up)[None, :]
+
+    line, signal, zero_line = _signal_lines(strategy, columns['Close'], columns.get('Volume'), columns.get('VIX'),
+                                            params)
+    position, determined = _crossover_positions(line, signal, zero_line, strategy.endswith('Zero-Cross'), trusted)
+    lagged = np.full_like(position, np.nan)
+    lagged[:, 1:] = position[:, :-1]
+
+    rows, pending = [], []
+    for i, symbol in enumerate(symbols):
+        close, low, high = columns['Close'][i], columns['Low'][i], columns['High'][i]
+        if exact[i]:
+            # As the full computation: the first bar has no lagged position
+            start = starts[i]
+            state = stop_loss_path(np.r_[np.nan, lagged[i, start + 1:]], close[start:], low[start:], high[start:],
+                                   stop_loss_pct)[4]
+            changes = np.flatnonzero(position[i, start + 1:] != position[i, start:-1]) + start + 1
+        else:
+            known = np.flatnonzero(determined[i])
+            first = known[0] + 1 if len(known) else length
+            state = _resolve_stops(lagged[i], close, low, high, stop_loss_pct, first) if first < length else None
+            changes = np.flatnonzero(position[i, first:] != position[i, first - 1:-1]) + first
+            if state is None or not len(changes):
+                pending.append(symbol)
+                continue
+
+        index = bar_arrays[symbol]['Index'][-length:]
+        last_close = close[-1]
+        distance = line[i, -1] - signal[i, -1]
+        rows.append({
+            'ETF': symbol,
+            'Strategy': strategy,
+            'Date': index[-1],
+            'Close': last_close,
+            'Position': int(state[0]),
+            'Signal': int(position[i, -1]),
+            'Last Crossover': index[changes[-1] - starts[i]] if len(changes) else pd.NaT,
+            'Distance': distance,
+            'Distance (%)': 100 * distance / last_close,
+            'Entry Price': state[1] if state[0] != 0 else np.nan,
+            'Weeks Used': length - starts[i]
+        })
+    return rows, pending
+
+def scan_signals(weekly_bars, weekly_vix=None, strategies=STRATEGY_NAMES, tol=DEFAULT_TOLERANCE, stop_loss_pct=0.05,
+                 params=None, margin=104):
+    """
+    Latest position of many symbols from their trailing weeks only
+
+    Each strategy looks at the last warm_up_weeks() + margin weeks of every
+    symbol, all symbols in one batch of indicator kernels. Bars after the
+    warm-up match the full-history indicators within tol; the stop loss is
+    replayed only from the latest run start that determines its state (see
+    _resolve_stops). Symbols whose state or last crossover is not
+    determined within the window are rescanned on twice the weeks, up to
+    their whole history, so every answer equals the full computation's.
+
+    Parameters:
+    -----------
+    weekly_bars : dict
+        Symbol -> weekly OHLCV bars
+    weekly_vix : pandas.DataFrame, optional
+        Weekly VIX bars with a Close column (required for the VPVMA strategies)
+    strategies : list of str
+        Strategies to scan
+    tol : float
+        Relative accuracy of the truncated EWMs
+    stop_loss_pct : float
+        Stop loss threshold
+    params : dict, optional
+        Strategy name -> indicator parameters overriding the registered defaults
+    margin : int
+        Weeks scanned beyond the warm-up in the first pass
+
+    Returns:
+    --------
+    scan_df : pandas.DataFrame
+        One row per symbol and strategy: last week's date and close, the
+        position held after stops, the current crossover signal, the date
+        of the last crossover, the distance of the line to its signal line
+        (in price units and % of close), the entry price of the open
+        position and the number of weeks used
+    """
+    if weekly_vix is None and any(strategy.startswith('VPVMA') for strategy in strategies):
+        raise ValueError("The VPVMA strategies need weekly VIX bars")
+
+    bar_arrays = {symbol: _bar_arrays(weekly_df, weekly_vix) for symbol, weekly_df in weekly_bars.items()}
+    rows = []
+    for strategy in strategies:
+        strategy_params = {**STRATEGIES[strategy].parameters, **(params or {}).get(strategy, {})}
+        warm_up = warm_up_weeks(strategy, tol, **strategy_params)
+        pending = list(weekly_bars)
+        length = warm_up + margin
+        while pending:
+            found, pending = _scan_window(strategy, {symbol: bar_arrays[symbol] for symbol in pending}, length,
+                                          warm_up, strategy_params, stop_loss_pct)
+            rows.extend(found)
+            length *= 2
+
+    order = {symbol: i for i, symbol in enumerate(weekly_bars)}
+    rows.sort(key=lambda row: (order[row['ETF']], list(strategies).index(row['Strategy'])))
+    return pd.DataFrame(rows, columns=SCAN_COLUMNS)
+
+def scan_daily(frames, vix_df=None, **kwargs):
+    """scan_signals on daily bars (symbol -> frame), resampled to weekly bars together in one pass"""
+    bars = resample_bars_many({**frames, '^VIX': vix_df} if vix_df is not None else frames)
+    weekly_vix = bars.pop('^VIX')[['Close']] if vix_df is not None else None
+    return scan_signals(bars, weekly_vix, **kwargs)
+
+def scan_store(store, symbols=None, **kwargs):
+    """scan_signals on the daily bars of a BarStore (all symbols but ^VIX by default)"""
+    symbols = symbols or [symbol for symbol in store.symbols if symbol != '^VIX']
+    vix_df = store.frame('^VIX') if '^VIX' in store else None
+    return scan_daily(store.frames(symbols), vix_df, **kwargs)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from ..utils.position_manager import apply_stop_loss, apply_intraweek_stops, calculate_strategy_returns
+
+def crossover_positions(line, signal, zero_line=None, previous=0):
+    """
+    Positions (before the signal lag) from a line crossing its signal line
+    
+    Without zero_line: long when line > signal, short when line < signal,
+    flat otherwise. With zero_line the cross must also agree with the line
+    being above/below zero_line, and the previous position is held until a
+    new signal fires (previous before the first one).
+    """
+    if zero_line is None:
+        return pd.Series(np.where(line > signal, 1, np.where(line < signal, -1, 0)), index=line.index)
+    
+    # Buy: above signal line and zero line; Sell: below both; otherwise hold
+    buy = (line > signal) & (line > zero_line)
+    sell = (line < signal) & (line < zero_line)
+    position = pd.Series(np.where(buy, 1.0, np.where(sell, -1.0, np.nan)), index=line.index)
+    return position.ffill().fillna(previous)
+
+def finish_strategy(weekly_df, position, initial_capital=1_000_000, stop_loss_pct=0.05, daily_df=None,
+                    cost_models=None, net_of=None, state=None):
+    """
+    Lag positions, apply the stop loss and compute returns for a weekly strategy frame
+    
+    state, a dict, carries the run over to later bars: it is filled with
+    the last signal, stop loss state, close, position and portfolio
+    growth, and a run on the following bars with the same dict continues
+    from them, giving the rows a run on all bars would.
+    """
+    # Shift positions by 1 week to implement signal lag
+    weekly_df['Position'] = position.shift(1)
+    if state is not None:
+        if 'signal' in state:
+            weekly_df.iloc[0, weekly_df.columns.get_loc('Position')] = state['signal']
+        state['signal'] = float(position.iloc[-1])
+    
+    # Initialize Portfolio Value
+    weekly_df['Portfolio_Value'] = initial_capital
+    
+    # Apply stop loss (5% by default)
+    weekly_df = apply_stop_loss(weekly_df, stop_loss_pct=stop_loss_pct, state=state)
+    
+    # Optionally resolve stop exits on the daily bars
+    if daily_df is not None:
+        weekly_df = apply_intraweek_stops(weekly_df, daily_df, stop_loss_pct=stop_loss_pct)
+    
+    # Recalculate returns after stop loss
+    return calculate_strategy_returns(weekly_df, cost_models=cost_models, net_of=net_of, state=state)
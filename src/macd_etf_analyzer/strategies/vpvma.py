@@ -1,121 +1,88 @@
-import pandas as pd
-from ..utils.position_manager import apply_stop_loss, calculate_strategy_returns
+from ..data.bars import resample_weekly, resample_weekly_close, to_market_time
+from .features import FeatureStore
+from .registry import register_strategy, run_registered
 
-def get_vpvma_signals(df=None, vix_df=None, symbol='^GSPC', start_date='2005-01-01', end_date='2023-12-31', initial_capital=1_000_000):
+VPVMA_PARAMETERS = {'window': 12, 'signal_window': 26}
+VPVMA_FEATURES = [('vpvma', 'window', 'signal_window')]
+
+def compute_vpvma(weekly_df, weekly_vix_close, window=12, signal_window=26):
+    """Return the VIX-adjusted Price Volume Moving Average and its signal line"""
+    features = FeatureStore(weekly_df, weekly_vix_close.to_frame('Close'))
+    return features.get('vpvma', window, signal_window)
+
+@register_strategy('VPVMA', VPVMA_PARAMETERS, VPVMA_FEATURES, 'VPVMA')
+def vpvma_signals(bars, vpvma):
+    """Long above the signal line, short below"""
+    line, signal = vpvma
+    return line, signal, None
+
+@register_strategy('VPVMA Zero-Cross', VPVMA_PARAMETERS, VPVMA_FEATURES, 'VPVMA')
+def vpvma_zero_cross_signals(bars, vpvma):
+    """Entries also need the VPVMA above/below the close"""
+    line, signal = vpvma
+    return line, signal, bars['Close']
+
+def run_vpvma_strategy(weekly_df, weekly_vix, window=12, signal_window=26, zero_cross=False,
+                       initial_capital=1_000_000, stop_loss_pct=0.05, daily_df=None, cost_models=None, net_of=None,
+                       features=None):
+    """
+    Run the VPVMA strategy on precomputed weekly bars
+    
+    Parameters:
+    -----------
+    weekly_df : pandas.DataFrame
+        Weekly OHLCV bars (not modified)
+    weekly_vix : pandas.DataFrame
+        Weekly VIX bars with a Close column
+    window, signal_window : int
+        Rolling windows of the VPVMA and of its signal line
+    zero_cross : bool
+        Require VPVMA above/below the close for entries (zero-crossing variant)
+    initial_capital : float
+        Starting portfolio value
+    stop_loss_pct : float
+        Stop loss threshold
+    daily_df : pandas.DataFrame, optional
+        Daily bars; if given, stop exits are resolved intra-week
+    cost_models, net_of :
+        Transaction cost scenarios passed to calculate_strategy_returns
+    features : FeatureStore, optional
+        Feature store of weekly_df and weekly_vix shared with other strategies
+    
+    Returns:
+    --------
+    weekly_df : pandas.DataFrame
+        Weekly frame with indicators, positions and returns
+    """
+    return run_registered('VPVMA Zero-Cross' if zero_cross else 'VPVMA', weekly_df, weekly_vix, features=features,
+                          initial_capital=initial_capital, stop_loss_pct=stop_loss_pct, daily_df=daily_df,
+                          cost_models=cost_models, net_of=net_of, window=window, signal_window=signal_window)
+
+def get_vpvma_signals(df=None, vix_df=None, symbol='^GSPC', start_date='2005-01-01', end_date='2023-12-31', initial_capital=1_000_000, stop_loss_pct=0.05, intraweek_stops=False, cost_models=None, net_of=None):
     """VPVMA strategy with pre-downloaded data option"""
     if df is None or vix_df is None:
         return None
     
-    # Convert timezone from UTC to US/Eastern
-    df.index = pd.to_datetime(df.index)
-    df.index = df.index.tz_convert('US/Eastern')
-    vix_df.index = pd.to_datetime(vix_df.index)
-    vix_df.index = vix_df.index.tz_convert('US/Eastern')
+    # Convert timezone from UTC to US/Eastern (inputs are not modified)
+    df = to_market_time(df)
+    vix_df = to_market_time(vix_df)
     
     # Resample to weekly data
-    weekly_df = df.resample('W').agg({
-        'Open': 'first',
-        'High': 'max',
-        'Low': 'min',
-        'Close': 'last',
-        'Volume': 'sum'
-    })
-    
-    weekly_vix = vix_df.resample('W').agg({
-        'Close': 'last'
-    })
-    
-    # Calculate VIX-adjusted Price Volume Moving Average (VPVMA)
-    vix_weight = 1 / weekly_vix['Close']
-    volume_price = weekly_df['Close'] * weekly_df['Volume'] * vix_weight
-    vpvma = volume_price.rolling(window=12).mean() / weekly_df['Volume'].rolling(window=12).mean()
-    signal = vpvma.rolling(window=26).mean()
-    
-    # Create signals on weekly data
-    weekly_df['VPVMA'] = vpvma
-    weekly_df['Signal_Line'] = signal
-    weekly_df['VPVMA_Histogram'] = vpvma - signal
-    
-    # Generate buy/sell signals
-    weekly_df['Position'] = 0
-    weekly_df['Position'] = weekly_df['Position'].mask(vpvma > signal, 1)
-    weekly_df['Position'] = weekly_df['Position'].mask(vpvma < signal, -1)
-    
-    # Shift positions by 1 week to implement signal lag
-    weekly_df['Position'] = weekly_df['Position'].shift(1)
-    
-    # Initialize Portfolio Value
-    weekly_df['Portfolio_Value'] = initial_capital
-    
-    # Apply stop loss with 5%
-    weekly_df = apply_stop_loss(weekly_df, stop_loss_pct=0.05)
+    weekly_df = resample_weekly(df)
+    weekly_vix = resample_weekly_close(vix_df)
     
-    # Recalculate returns after stop loss
-    weekly_df = calculate_strategy_returns(weekly_df)
-    
-    return weekly_df
+    return run_vpvma_strategy(weekly_df, weekly_vix, initial_capital=initial_capital, stop_loss_pct=stop_loss_pct,
+                              daily_df=df if intraweek_stops else None, cost_models=cost_models, net_of=net_of)
 
-def get_vpvma_signals_zero_cross(df, vix_df, symbol):
+def get_vpvma_signals_zero_cross(df, vix_df, symbol, stop_loss_pct=0.05, intraweek_stops=False, cost_models=None, net_of=None):
     """VPVMA zero-crossing strategy implementation"""
-    # Convert timezone from UTC to US/Eastern
-    df.index = pd.to_datetime(df.index)
-    df.index = df.index.tz_convert('US/Eastern')
-    vix_df.index = pd.to_datetime(vix_df.index)
-    vix_df.index = vix_df.index.tz_convert('US/Eastern')
+    # Convert timezone from UTC to US/Eastern (inputs are not modified)
+    df = to_market_time(df)
+    vix_df = to_market_time(vix_df)
     
     # Resample to weekly data
-    weekly_df = df.resample('W').agg({
-        'Open': 'first',
-        'High': 'max',
-        'Low': 'min',
-        'Close': 'last',
-        'Volume': 'sum'
-    })
-    
-    weekly_vix = vix_df.resample('W').agg({
-        'Close': 'last'
-    })
-    
-    # Calculate VIX-adjusted Price Volume Moving Average (VPVMA)
-    vix_weight = 1 / weekly_vix['Close']
-    volume_price = weekly_df['Close'] * weekly_df['Volume'] * vix_weight
-    vpvma = volume_price.rolling(window=12).mean() / weekly_df['Volume'].rolling(window=12).mean()
-    signal = vpvma.rolling(window=26).mean()
-    
-    # Create signals on weekly data
-    weekly_df['VPVMA'] = vpvma
-    weekly_df['Signal_Line'] = signal
-    weekly_df['VPVMA_Histogram'] = vpvma - signal
-    
-    # Generate buy/sell signals with zero-line condition
-    weekly_df['Position'] = 0
-    
-    # Previous position to maintain when no new signal
-    prev_position = 0
-    
-    for i in range(len(weekly_df)):
-        # Buy signal: VPVMA crosses above signal line AND VPVMA is above zero
-        if (vpvma.iloc[i] > signal.iloc[i]) and (vpvma.iloc[i] > weekly_df['Close'].iloc[i]):
-            weekly_df.iloc[i, weekly_df.columns.get_loc('Position')] = 1
-            prev_position = 1
-        # Sell signal: VPVMA crosses below signal line AND VPVMA crosses below zero
-        elif (vpvma.iloc[i] < signal.iloc[i]) and (vpvma.iloc[i] < weekly_df['Close'].iloc[i]):
-            weekly_df.iloc[i, weekly_df.columns.get_loc('Position')] = -1
-            prev_position = -1
-        else:
-            # Maintain previous position when no new signal
-            weekly_df.iloc[i, weekly_df.columns.get_loc('Position')] = prev_position
-    
-    # Shift positions by 1 week to implement signal lag
-    weekly_df['Position'] = weekly_df['Position'].shift(1)
-    
-    # Initialize Portfolio Value
-    weekly_df['Portfolio_Value'] = 1_000_000
-    
-    # Apply stop loss with 5%
-    weekly_df = apply_stop_loss(weekly_df, stop_loss_pct=0.05)
-    
-    # Recalculate returns after stop loss
-    weekly_df = calculate_strategy_returns(weekly_df)
+    weekly_df = resample_weekly(df)
+    weekly_vix = resample_weekly_close(vix_df)
     
-    return weekly_df 
\ No newline at end of file
+    return run_vpvma_strategy(weekly_df, weekly_vix, zero_cross=True, stop_loss_pct=stop_loss_pct,
+                              daily_df=df if intraweek_stops else None, cost_models=cost_models, net_of=net_of)
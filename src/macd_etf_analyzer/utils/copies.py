@@ -0,0 +1,45 @@
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Counter of the active count_copies() block, if any
+_COPY_COUNTER = contextvars.ContextVar('copy_counter', default=None)
+
+class CopyCounter:
+    """Number and size of the frame copies made inside a count_copies() block"""
+
+    def __init__(self):
+        self.count = 0
+        self.nbytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, df):
+        with self._lock:
+            self.count += 1
+            self.nbytes += int(df.memory_usage(index=False).sum())
+
+    def __str__(self):
+        return f"{self.count} frame copies ({self.nbytes / 1e6:.2f} MB)"
+
+@contextmanager
+def count_copies(counter=None):
+    """
+    Count the copies made by copy_frame while the block runs
+
+    Worker threads see the counter when their task is submitted through
+    contextvars.copy_context().run. Pass an existing counter to keep
+    adding to it (e.g. across the stages of one symbol).
+    """
+    counter = CopyCounter() if counter is None else counter
+    token = _COPY_COUNTER.set(counter)
+    try:
+        yield counter
+    finally:
+        _COPY_COUNTER.reset(token)
+
+def copy_frame(df):
+    """df.copy(), recorded by the active count_copies() block"""
+    counter = _COPY_COUNTER.get()
+    if counter is not None:
+        counter.add(df)
+    return df.copy()
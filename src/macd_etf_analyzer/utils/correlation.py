@@ -0,0 +1,282 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, leaves_list, linkage
+from scipy.spatial.distance import squareform
+
+def build_return_matrix(etf_results, strategies=None, column='Strategy_Returns', dtype=np.float32):
+    """
+    Build the aligned (weeks x ETF-strategy) matrix of strategy returns
+
+    Parameters:
+    -----------
+    etf_results : dict
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values,
+        where results maps strategy names to StrategyResult
+    strategies : list of str, optional
+        Strategies to include; defaults to every strategy of each ETF
+    column : str
+        Return column to take from each result
+    dtype : numpy dtype
+        Dtype of the matrix
+
+    Returns:
+    --------
+    returns : pandas.DataFrame
+        Weeks as rows and (ETF, Strategy) columns; NaN where an ETF has
+        no data, so short histories do not count as flat weeks
+    """
+    columns = {}
+    for etf, (results, _, _) in etf_results.items():
+        for strategy in strategies or results:
+            if strategy in results:
+                columns[(etf, strategy)] = pd.Series(results[strategy][column], index=results[strategy].index)
+
+    if not columns:
+        return pd.DataFrame(columns=pd.MultiIndex.from_tuples([], names=['ETF', 'Strategy']), dtype=dtype)
+    returns = pd.concat(columns, axis=1, names=['ETF', 'Strategy']).sort_index()
+    return returns.astype(dtype)
+
+def _standardize(values, dtype):
+    """
+    Columns scaled to zero mean and unit variance over their valid rows
+    (0 elsewhere), the validity mask and which columns are constant
+    """
+    valid = ~np.isnan(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+    constant = ~(np.isfinite(std) & (std > 0))
+    z = np.where(valid, (values - mean) / np.where(constant, 1.0, std), 0.0)
+    return z.astype(dtype), valid, constant
+
+def correlation_matrix(returns, block_size=512, min_periods=26, dtype=np.float32):
+    """
+    Pairwise Pearson correlation of every column, computed block by block
+
+    Columns are standardized once; each (block, block) tile of the matrix
+    is then a handful of matrix products over the weeks both columns
+    have data (pairwise-complete like DataFrame.corr, without looping over
+    pairs). Only one tile of intermediates is held at a time, so memory
+    is the result plus O(weeks x block_size), and float32 halves both.
+
+    Parameters:
+    -----------
+    returns : pandas.DataFrame
+        (weeks x columns) returns, NaN where a column has no data
+    block_size : int
+        Columns per tile
+    min_periods : int
+        Minimum number of common weeks for a correlation (NaN otherwise)
+    dtype : numpy dtype
+        Dtype of the computation and the result
+
+    Returns:
+    --------
+    corr : pandas.DataFrame
+        (columns x columns) correlation matrix
+    """
+    z, valid, constant = _standardize(returns.to_numpy(dtype=np.float64), dtype)
+    n_weeks, n = z.shape
+    corr = np.empty((n, n), dtype=dtype)
+
+    if valid.all():
+        # Full overlap: standardized columns give the correlation directly
+        for i0 in range(0, n, block_size):
+            zi = z[:, i0:i0 + block_size]
+            for j0 in range(i0, n, block_size):
+                tile = zi.T @ z[:, j0:j0 + block_size] / n_weeks
+                corr[i0:i0 + block_size, j0:j0 + block_size] = tile
+                corr[j0:j0 + block_size, i0:i0 + block_size] = tile.T
+        if n_weeks < min_periods:
+            corr[:] = np.nan
+    else:
+        mask = valid.astype(dtype)
+        z2 = z * z
+        for i0 in range(0, n, block_size):
+            zi, zi2, mi = z[:, i0:i0 + block_size], z2[:, i0:i0 + block_size], mask[:, i0:i0 + block_size]
+            for j0 in range(i0, n, block_size):
+                zj, zj2, mj = z[:, j0:j0 + block_size], z2[:, j0:j0 + block_size], mask[:, j0:j0 + block_size]
+                # Counts, sums, sums of squares and cross products over the common weeks of each pair
+                count = mi.T @ mj
+                sum_x, sum_y = zi.T @ mj, mi.T @ zj
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    cov = zi.T @ zj - sum_x * sum_y / count
+                    var_x = zi2.T @ mj - sum_x * sum_x / count
+                    var_y = mi.T @ zj2 - sum_y * sum_y / count
+                    tile = cov / np.sqrt(var_x * var_y)
+                tile[count < min_periods] = np.nan
+                corr[i0:i0 + block_size, j0:j0 + block_size] = tile
+                corr[j0:j0 + block_size, i0:i0 + block_size] = tile.T
+
+    np.clip(corr, -1, 1, out=corr)
+    # Constant columns have no correlation, as in DataFrame.corr
+    corr[constant, :] = np.nan
+    corr[:, constant] = np.nan
+    diagonal = np.where((valid.sum(axis=0) >= min_periods) & ~constant, 1, np.nan)
+    corr[np.arange(n), np.arange(n)] = diagonal
+    return pd.DataFrame(corr, index=returns.columns, columns=returns.columns)
+
+def rolling_correlations(returns, window=52, step=13, min_periods=None, block_size=512, dtype=np.float32):
+    """
+    Correlation matrices over trailing windows
+
+    Matrices are yielded one at a time (each is columns x columns), so
+    long histories of thousands of columns never hold more than one.
+
+    Parameters:
+    -----------
+    returns : pandas.DataFrame
+        (weeks x columns) returns
+    window : int
+        Weeks per window
+    step : int
+        Weeks between window ends
+    min_periods : int, optional
+        Minimum common weeks per pair; defaults to half the window
+    block_size, dtype :
+        See correlation_matrix
+
+    Yields:
+    -------
+    (end, corr) : (pandas.Timestamp, pandas.DataFrame)
+        Last week of the window and its correlation matrix
+    """
+    min_periods = min_periods or window // 2
+    for end in range(window, len(returns) + 1, step):
+        yield returns.index[end - 1], correlation_matrix(returns.iloc[end - window:end], block_size, min_periods,
+                                                         dtype)
+
+def mean_correlation(corr):
+    """Average correlation of distinct pairs (NaN pairs ignored)"""
+    values = corr.to_numpy()
+    upper = values[np.triu_indices(len(values), k=1)]
+    return float(np.nanmean(upper)) if np.isfinite(upper).any() else np.nan
+
+def rolling_mean_correlation(returns, window=52, step=13, **kwargs):
+    """Average pairwise correlation of each trailing window (see rolling_correlations)"""
+    means = {end: mean_correlation(corr) for end, corr in rolling_correlations(returns, window, step, **kwargs)}
+    return pd.Series(means, name='Mean Correlation', dtype=float)
+
+def cluster_correlations(corr, method='average', min_correlation=0.7):
+    """
+    Hierarchical clustering of return streams by correlation
+
+    The distance of two columns is sqrt((1 - correlation) / 2), with
+    pairs lacking a correlation treated as uncorrelated. The tree is cut
+    where the linkage distance corresponds to min_correlation.
+
+    Parameters:
+    -----------
+    corr : pandas.DataFrame
+        Correlation matrix (see correlation_matrix)
+    method : str
+        scipy linkage method ('average', 'complete', 'single', 'ward')
+    min_correlation : float
+        Columns merged above this correlation share a cluster
+
+    Returns:
+    --------
+    link : numpy.ndarray
+        scipy linkage matrix
+    order : numpy.ndarray
+        Column positions in dendrogram leaf order
+    clusters : pandas.Series
+        Cluster number of each column, numbered in leaf order from 1
+    """
+    if len(corr) < 2:
+        return np.empty((0, 4)), np.arange(len(corr)), pd.Series(1, index=corr.index, name='Cluster')
+    values = np.nan_to_num(corr.to_numpy(dtype=np.float64), nan=0.0)
+    distance = np.sqrt(np.clip((1 - values) / 2, 0, 1))
+    np.fill_diagonal(distance, 0)
+    link = linkage(squareform(distance, checks=False), method=method)
+    order = leaves_list(link)
+
+    labels = fcluster(link, t=np.sqrt((1 - min_correlation) / 2), criterion='distance')
+    # Renumber clusters in the order they appear along the dendrogram
+    renumber = {label: i + 1 for i, label in enumerate(pd.unique(labels[order]))}
+    clusters = pd.Series([renumber[label] for label in labels], index=corr.index, name='Cluster')
+    return link, order, clusters
+
+def top_correlated_pairs(corr, n=20):
+    """The n most correlated pairs of distinct columns"""
+    values = corr.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    upper = np.nan_to_num(values[rows, cols], nan=-np.inf)
+    top = np.argsort(upper)[::-1][:n]
+    top = top[np.isfinite(upper[top])]
+    labels = [' '.join(map(str, label)) if isinstance(label, tuple) else str(label) for label in corr.index]
+    return pd.DataFrame({'First': [labels[i] for i in rows[top]], 'Second': [labels[j] for j in cols[top]],
+                         'Correlation': upper[top]})
+
+def generate_correlation_report(etf_results, output_dir='data/summary', window=52, step=13, min_correlation=0.7,
+                                block_size=512):
+    """
+    Correlate and cluster the return streams of every ETF and strategy and save the results
+
+    Writes the clustered correlation matrix (return_correlation.csv), the
+    cluster of each stream (return_clusters.csv), the average pairwise
+    correlation of trailing windows (rolling_mean_correlation.csv) and a
+    report of the redundant streams (correlation_report.txt).
+
+    Parameters:
+    -----------
+    etf_results : dict
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values
+    output_dir : str
+        Directory to save the results
+    window, step : int
+        Trailing window and spacing of the rolling correlations, in weeks
+    min_correlation : float
+        Correlation above which streams are clustered together
+    block_size : int
+        Columns per tile of the correlation computations
+
+    Returns:
+    --------
+    corr : pandas.DataFrame
+        Correlation matrix in cluster order
+    clusters : pandas.Series
+        Cluster number of each (ETF, Strategy) stream, in cluster order
+    link : numpy.ndarray
+        scipy linkage matrix (for plot_clustered_correlation)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    returns = build_return_matrix(etf_results)
+    corr = correlation_matrix(returns, block_size)
+    link, order, clusters = cluster_correlations(corr, min_correlation=min_correlation)
+    corr = corr.iloc[order, order]
+    clusters = clusters.iloc[order]
+    rolling = rolling_mean_correlation(returns, window, step, block_size=block_size)
+
+    corr.to_csv(os.path.join(output_dir, 'return_correlation.csv'), float_format='%.4f')
+    clusters.to_csv(os.path.join(output_dir, 'return_clusters.csv'))
+    rolling.rename_axis('Date').to_csv(os.path.join(output_dir, 'rolling_mean_correlation.csv'))
+
+    report_file = os.path.join(output_dir, 'correlation_report.txt')
+    with open(report_file, 'w') as f:
+        f.write("Return Correlation Report\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(f"Return streams: {returns.shape[1]}, Weeks: {returns.shape[0]}\n")
+        f.write(f"Mean pairwise correlation: {mean_correlation(corr):.2f}\n")
+        if len(rolling):
+            f.write(f"Mean pairwise correlation over {window}-week windows: {rolling.min():.2f} to {rolling.max():.2f} "
+                    f"(latest {rolling.iloc[-1]:.2f})\n")
+        f.write(f"Clusters (correlation >= {min_correlation}): {clusters.nunique()}\n")
+
+        f.write("\nRedundant Clusters:\n")
+        f.write("-" * 50 + "\n")
+        for cluster, members in clusters.groupby(clusters, sort=False):
+            if len(members) < 2:
+                continue
+            f.write(f"\nCluster {cluster} (mean correlation {mean_correlation(corr.loc[members.index, members.index]):.2f}):\n")
+            for etf, strategy in members.index:
+                f.write(f"  {etf} {strategy}\n")
+
+        f.write("\nMost Correlated Pairs:\n")
+        f.write("-" * 50 + "\n")
+        f.write(top_correlated_pairs(corr).to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+        f.write("\n")
+
+    print(f"Correlation report saved to {report_file}")
+    return corr, clusters, link
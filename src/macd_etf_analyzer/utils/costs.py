@@ -0,0 +1,58 @@
+import numpy as np
+from collections import namedtuple
+
+# commission_bps : commission per side, in basis points of traded notional
+# spread_fraction : share of the bar's (High - Low) / Close range paid per side (spread proxy)
+# fixed_fee : fixed dollar fee per side traded
+CostModel = namedtuple('CostModel', ['commission_bps', 'spread_fraction', 'fixed_fee'], defaults=(0.0, 0.0, 0.0))
+
+DEFAULT_COST_MODELS = {
+    'Low': CostModel(commission_bps=1.0, spread_fraction=0.02, fixed_fee=0.0),
+    'Base': CostModel(commission_bps=5.0, spread_fraction=0.05, fixed_fee=1.0),
+    'High': CostModel(commission_bps=10.0, spread_fraction=0.10, fixed_fee=5.0)
+}
+
+def transaction_costs(df, cost_models, portfolio_value=None, previous=None):
+    """
+    Transaction costs for a batch of cost scenarios
+
+    Turnover is |Position.diff()| (a long/short flip trades two sides).
+    Each side pays the commission, the spread proxy of its bar and the
+    fixed fee relative to the previous bar's portfolio value. All
+    scenarios are computed with one broadcast over (scenarios x bars).
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Frame with Position, High, Low and Close columns
+    cost_models : dict
+        Scenario name -> CostModel
+    portfolio_value : array-like, optional
+        Portfolio value per bar used to express the fixed fee as a
+        return; defaults to df['Portfolio_Value']
+    previous : tuple, optional
+        (position, portfolio value) of the bar before the first, when df
+        continues earlier bars
+
+    Returns:
+    --------
+    costs : numpy.ndarray
+        (scenarios x bars) costs as a fraction of portfolio value
+    """
+    position = df['Position'].to_numpy(dtype=float)
+    turnover = np.nan_to_num(np.abs(np.diff(position, prepend=np.nan if previous is None else previous[0])))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bar_range = np.nan_to_num(((df['High'] - df['Low']) / df['Close']).to_numpy(dtype=float))
+
+    if portfolio_value is None:
+        portfolio_value = df['Portfolio_Value']
+    portfolio_value = np.asarray(portfolio_value, dtype=float)
+    first_value = portfolio_value[:1] if previous is None else [previous[1]]
+    previous_value = np.concatenate([first_value, portfolio_value[:-1]])
+
+    params = np.array([list(model) for model in cost_models.values()], dtype=float).reshape(-1, 3)
+    commission = params[:, [0]] / 10_000
+    spread_fraction = params[:, [1]]
+    fixed_fee = params[:, [2]]
+
+    return turnover * (commission + spread_fraction * bar_range + fixed_fee / previous_value)
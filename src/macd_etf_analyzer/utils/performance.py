@@ -1,9 +1,18 @@
 import pandas as pd
 import numpy as np
 import os
+from .position_manager import apply_stop_loss_batch, calculate_strategy_returns_batch
 
-def calculate_performance_metrics(df):
-    """Calculate various trading performance metrics"""
+DEFAULT_STOP_LOSS_THRESHOLDS = (0.02, 0.03, 0.05, 0.075, 0.10, 0.15, 0.20)
+
+def performance_values(df, periods_per_year=52):
+    """
+    Performance metrics of a strategy frame as numbers
+    
+    Returns are in %, the win ratio is a fraction and the Sharpe ratio
+    is annualized with periods_per_year bars (52 for weekly bars, see
+    data.bars.periods_per_year).
+    """
     
     # Number of Trades
     trades = df['Position_Change'].fillna(0)
@@ -25,7 +34,7 @@ def calculate_performance_metrics(df):
     # Sharpe Ratio (assuming 0% risk-free rate)
     mean_returns = df['Strategy_Returns'].mean()
     std_returns = df['Strategy_Returns'].std()
-    sharpe_ratio = np.sqrt(52) * mean_returns / std_returns if std_returns != 0 else 0
+    sharpe_ratio = np.sqrt(periods_per_year) * mean_returns / std_returns if std_returns != 0 else 0
     
     # Maximum Drawdown calculation
     portfolio_value = df['Portfolio_Value']
@@ -40,34 +49,116 @@ def calculate_performance_metrics(df):
     
     return {
         'Number of Trades': num_trades,
-        'Win Ratio': f"{win_ratio:.2%}",
-        'Total Return': f"{total_return:.2f}%",
-        'Annual Return': f"{annual_return*100:.2f}%",
-        'Sharpe Ratio': f"{sharpe_ratio:.2f}",
-        'Maximum Drawdown': f"{max_drawdown:.2f}%",
-        'Initial Portfolio Value': f"${initial_value:,.2f}",
-        'Final Portfolio Value': f"${final_value:,.2f}",
-        'Portfolio Return': f"{portfolio_return:.2f}%"
+        'Win Ratio': win_ratio,
+        'Total Return': total_return,
+        'Annual Return': annual_return * 100,
+        'Sharpe Ratio': sharpe_ratio,
+        'Maximum Drawdown': max_drawdown,
+        'Initial Portfolio Value': initial_value,
+        'Final Portfolio Value': final_value,
+        'Portfolio Return': portfolio_return
     }
 
-def get_trade_info(df, strategy_name, ticker):
-    """Extract trade information from the signals DataFrame"""
-    trades = []
-    position = 0
-    entry_price = 0
-    entry_date = None
+def calculate_performance_metrics(df, periods_per_year=52):
+    """Calculate various trading performance metrics"""
+    values = performance_values(df, periods_per_year)
+    return {
+        'Number of Trades': values['Number of Trades'],
+        'Win Ratio': f"{values['Win Ratio']:.2%}",
+        'Total Return': f"{values['Total Return']:.2f}%",
+        'Annual Return': f"{values['Annual Return']:.2f}%",
+        'Sharpe Ratio': f"{values['Sharpe Ratio']:.2f}",
+        'Maximum Drawdown': f"{values['Maximum Drawdown']:.2f}%",
+        'Initial Portfolio Value': f"${values['Initial Portfolio Value']:,.2f}",
+        'Final Portfolio Value': f"${values['Final Portfolio Value']:,.2f}",
+        'Portfolio Return': f"{values['Portfolio Return']:.2f}%"
+    }
+
+def stop_loss_sensitivity(df, thresholds=DEFAULT_STOP_LOSS_THRESHOLDS, periods_per_year=52):
+    """
+    Evaluate a strategy under several stop loss thresholds at once
+    
+    All thresholds are run in one batched pass over (thresholds x weeks)
+    arrays using the pre-stop signal kept by apply_stop_loss.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Strategy frame returned by a strategy function (must contain
+        Signal_Position, Raw_Close, High, Low and Portfolio_Value)
+    thresholds : sequence of float
+        Stop loss thresholds to evaluate
+    periods_per_year : int
+        Bars per year annualizing the Sharpe ratio (52 for weekly bars)
+    
+    Returns:
+    --------
+    sensitivity_df : pandas.DataFrame
+        One row per threshold with total/annual return, Sharpe ratio,
+        maximum drawdown and the number of stops triggered
+    """
+    positions, closes = apply_stop_loss_batch(df['Signal_Position'], df['Raw_Close'],
+                                              df['Low'], df['High'], thresholds)
+    strategy_returns = calculate_strategy_returns_batch(positions, closes)
+    
+    # Sharpe Ratio per threshold (sample std, as pandas)
+    mean_returns = strategy_returns.mean(axis=1)
+    std_returns = strategy_returns.std(axis=1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe_ratio = np.where(std_returns != 0, np.sqrt(periods_per_year) * mean_returns / std_returns, 0)
     
-    for date, row in df.iterrows():
-        if row['Position_Change'] != 0:
+    # Growth and drawdown surfaces
+    growth = np.cumprod(1 + strategy_returns, axis=1)
+    peak = np.maximum.accumulate(growth, axis=1)
+    max_drawdown = ((growth - peak) / peak).min(axis=1) * 100
+    years = (df.index[-1] - df.index[0]).days / 365.25
+    
+    stops_triggered = ((positions == 0) & (df['Signal_Position'].to_numpy() != 0)).sum(axis=1)
+    
+    return pd.DataFrame({
+        'Stop Loss (%)': np.asarray(thresholds) * 100,
+        'Total Return (%)': (growth[:, -1] - 1) * 100,
+        'Annual Return (%)': (growth[:, -1] ** (1 / years) - 1) * 100,
+        'Sharpe Ratio': sharpe_ratio,
+        'Max Drawdown (%)': max_drawdown,
+        'Stops Triggered': stops_triggered
+    })
+
+TRADE_COLUMNS = ['Entry Date', 'Exit Date', 'Position', 'Entry Price', 'Exit Price', 'PnL %']
+
+def trade_path(dates, position_changes, positions, closes, position=0, entry_price=0, entry_date=None):
+    """
+    Run the trade ledger state machine over positional arrays
+    
+    Parameters:
+    -----------
+    dates : sequence
+        Week of each bar
+    position_changes, positions, closes : numpy.ndarray
+        Position_Change, Position and Close of each bar
+    position, entry_price, entry_date :
+        Open trade before the first bar (none by default), e.g. the state
+        returned by an earlier call on the preceding bars
+    
+    Returns:
+    --------
+    trades : list of dict
+        Trades closed on these bars
+    state : tuple
+        (position, entry_price, entry_date) of the trade open after the last bar
+    """
+    trades = []
+    for date, position_change, new_position, close in zip(dates, position_changes, positions, closes):
+        if position_change != 0:
             # Case 1: Opening a new position from neutral
             if position == 0:
-                position = row['Position']
-                entry_price = row['Close']
+                position = new_position
+                entry_price = close
                 entry_date = date
             # Case 2: Direct switch between long and short positions
-            elif (position == 1 and row['Position'] == -1) or (position == -1 and row['Position'] == 1):
+            elif (position == 1 and new_position == -1) or (position == -1 and new_position == 1):
                 # Close current position
-                exit_price = row['Close']
+                exit_price = close
                 pnl = position * (exit_price - entry_price) / entry_price * 100
                 trades.append({
                     'Entry Date': entry_date,
@@ -78,12 +169,12 @@ def get_trade_info(df, strategy_name, ticker):
                     'PnL %': pnl
                 })
                 # Open new position
-                position = row['Position']
-                entry_price = row['Close']
+                position = new_position
+                entry_price = close
                 entry_date = date
             # Case 3: Closing a position to neutral
-            elif row['Position'] == 0:
-                exit_price = row['Close']
+            elif new_position == 0:
+                exit_price = close
                 pnl = position * (exit_price - entry_price) / entry_price * 100
                 trades.append({
                     'Entry Date': entry_date,
@@ -95,7 +186,17 @@ def get_trade_info(df, strategy_name, ticker):
                 })
                 position = 0
     
-    trades_df = pd.DataFrame(trades)
+    return trades, (position, entry_price, entry_date)
+
+def extract_trades(df):
+    """Extract the list of closed trades from a signals DataFrame or StrategyResult"""
+    trades, _ = trade_path(df.index, df['Position_Change'].to_numpy(), df['Position'].to_numpy(),
+                           df['Close'].to_numpy())
+    return pd.DataFrame(trades, columns=TRADE_COLUMNS)
+
+def get_trade_info(df, strategy_name, ticker):
+    """Extract trade information from the signals DataFrame"""
+    trades_df = extract_trades(df)
     
     # Create ticker-specific directory
     ticker_dir = os.path.join('data', ticker)
@@ -105,4 +206,10 @@ def get_trade_info(df, strategy_name, ticker):
     output_file = os.path.join(ticker_dir, f'trade_info_{strategy_name}.csv')
     trades_df.to_csv(output_file, index=False)
     
-    return trades_df 
\ No newline at end of file
+    return trades_df 
+
+def append_trade_info(trades_df, strategy_name, ticker):
+    """Append newly closed trades to the trade information CSV written by get_trade_info"""
+    output_file = os.path.join('data', ticker, f'trade_info_{strategy_name}.csv')
+    trades_df.to_csv(output_file, mode='a', header=not os.path.exists(output_file), index=False)
+    return trades_df
@@ -0,0 +1,202 @@
+import os
+import numpy as np
+import pandas as pd
+from ..data.universe import get_category
+
+DEFAULT_CATEGORY_CAPS = {'Country/Region': 0.5, 'Sector': 0.4, 'Bond': 0.4}
+
+def build_signal_matrix(etf_results, strategy=None):
+    """
+    Build aligned (weeks x ETFs) position and return matrices
+
+    Parameters:
+    -----------
+    etf_results : dict
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values
+    strategy : str, optional
+        Strategy to take signals from; defaults to each ETF's best strategy
+
+    Returns:
+    --------
+    positions : pandas.DataFrame
+        Lagged strategy positions (-1, 0, 1), 0 where an ETF has no data
+    returns : pandas.DataFrame
+        Weekly ETF returns, NaN where an ETF has no data
+    """
+    positions = {}
+    returns = {}
+    for etf, (results, best_strategy, _) in etf_results.items():
+        df = results[strategy or best_strategy]
+        positions[etf] = df['Position']
+        returns[etf] = df['Returns']
+
+    positions = pd.DataFrame(positions).sort_index().fillna(0)
+    returns = pd.DataFrame(returns).reindex(positions.index)
+    return positions, returns
+
+def allocation_weights(positions, returns, method='equal', vol_lookback=26, category_caps=None):
+    """
+    Signed portfolio weights for every week
+
+    Parameters:
+    -----------
+    positions : pandas.DataFrame
+        (weeks x ETFs) positions from build_signal_matrix
+    returns : pandas.DataFrame
+        (weeks x ETFs) returns from build_signal_matrix
+    method : str
+        'equal' (1/N of active ETFs) or 'inverse_vol' (proportional to
+        1 / trailing volatility, estimated from the valid weeks before
+        each week; missing weeks don't count as flat ones)
+    vol_lookback : int
+        Weeks of history used for the volatility estimate
+    category_caps : dict, optional
+        Category -> maximum gross weight; excess weight is held as cash
+
+    Returns:
+    --------
+    weights : pandas.DataFrame
+        (weeks x ETFs) signed weights, gross exposure <= 1
+    """
+    position = positions.to_numpy(dtype=float)
+    active = position != 0
+
+    if method == 'equal':
+        raw = active.astype(float)
+    elif method == 'inverse_vol':
+        vol = returns.rolling(vol_lookback, min_periods=max(vol_lookback // 2, 2)).std().shift(1).to_numpy()
+        with np.errstate(divide='ignore'):
+            raw = np.where(active & (vol > 0), 1 / vol, 0.0)
+    else:
+        raise ValueError(f"Unknown allocation method: {method}")
+
+    total = raw.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = np.where(total > 0, raw / total, 0.0) * np.sign(position)
+
+    if category_caps:
+        # One-hot (ETFs x categories) map turns per-category sums into one matmul
+        categories = list(category_caps)
+        membership = np.array([[get_category(etf) == c for c in categories] for etf in positions.columns], dtype=float)
+        caps = np.array([category_caps[c] for c in categories])
+        gross_by_category = np.abs(weights) @ membership
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(gross_by_category > caps, caps / gross_by_category, 1.0)
+        # ETFs outside every capped category keep a scale of 1
+        etf_scale = scale @ membership.T + (1 - membership.sum(axis=1))
+        weights = weights * etf_scale
+
+    return pd.DataFrame(weights, index=positions.index, columns=positions.columns)
+
+def run_portfolio_backtest(positions, returns, method='equal', vol_lookback=26, category_caps=None, initial_capital=1_000_000):
+    """
+    Backtest a weekly-rebalanced portfolio over the whole ETF universe
+
+    Parameters:
+    -----------
+    positions : pandas.DataFrame
+        (weeks x ETFs) positions from build_signal_matrix
+    returns : pandas.DataFrame
+        (weeks x ETFs) returns from build_signal_matrix
+    method : str
+        Allocation method passed to allocation_weights
+    vol_lookback : int
+        Lookback for the inverse-volatility allocation
+    category_caps : dict, optional
+        Category -> maximum gross weight
+    initial_capital : float
+        Starting portfolio value
+
+    Returns:
+    --------
+    portfolio_df : pandas.DataFrame
+        Weekly portfolio returns, value, turnover and exposure
+    weights : pandas.DataFrame
+        (weeks x ETFs) weights used
+    """
+    weights = allocation_weights(positions, returns, method, vol_lookback, category_caps)
+    w = weights.to_numpy()
+    # Weeks an ETF has no data carry no weight, so they add nothing
+    r = np.nan_to_num(returns.to_numpy(dtype=float))
+
+    portfolio_returns = (w * r).sum(axis=1)
+    turnover = np.abs(np.diff(w, axis=0, prepend=0)).sum(axis=1)
+
+    portfolio_df = pd.DataFrame({
+        'Portfolio_Returns': portfolio_returns,
+        'Portfolio_Value': initial_capital * np.cumprod(1 + portfolio_returns),
+        'Turnover': turnover,
+        'Gross_Exposure': np.abs(w).sum(axis=1),
+        'Net_Exposure': w.sum(axis=1),
+        'Long_Exposure': np.clip(w, 0, None).sum(axis=1),
+        'Short_Exposure': -np.clip(w, None, 0).sum(axis=1),
+        'Active_Positions': (w != 0).sum(axis=1)
+    }, index=positions.index)
+
+    return portfolio_df, weights
+
+def portfolio_metrics(portfolio_df, periods_per_year=52):
+    """Summary metrics of a portfolio backtest (periods_per_year: rebalances per year, 52 for weekly bars)"""
+    returns = portfolio_df['Portfolio_Returns']
+    value = portfolio_df['Portfolio_Value']
+    years = (portfolio_df.index[-1] - portfolio_df.index[0]).days / 365.25
+    peak = value.expanding(min_periods=1).max()
+
+    return {
+        'Sharpe Ratio': np.sqrt(periods_per_year) * returns.mean() / returns.std() if returns.std() != 0 else 0,
+        'Total Return (%)': (value.iloc[-1] / value.iloc[0] - 1) * 100,
+        'Annual Return (%)': ((value.iloc[-1] / value.iloc[0]) ** (1 / years) - 1) * 100,
+        'Max Drawdown (%)': ((value - peak) / peak).min() * 100,
+        'Annual Turnover': portfolio_df['Turnover'].mean() * periods_per_year,
+        'Average Gross Exposure': portfolio_df['Gross_Exposure'].mean(),
+        'Average Net Exposure': portfolio_df['Net_Exposure'].mean()
+    }
+
+def generate_portfolio_report(etf_results, output_dir='data/summary', category_caps=DEFAULT_CATEGORY_CAPS):
+    """
+    Backtest the combined book under each allocation rule and save a report
+
+    Parameters:
+    -----------
+    etf_results : dict
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values
+    output_dir : str
+        Directory to save the portfolio report
+    category_caps : dict
+        Category -> maximum gross weight for the capped variants
+
+    Returns:
+    --------
+    metrics_df : pandas.DataFrame
+        Metrics per allocation rule
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    positions, returns = build_signal_matrix(etf_results)
+
+    allocations = {
+        'Equal Weight': {'method': 'equal'},
+        'Inverse Volatility': {'method': 'inverse_vol'},
+        'Equal Weight (Category Caps)': {'method': 'equal', 'category_caps': category_caps},
+        'Inverse Volatility (Category Caps)': {'method': 'inverse_vol', 'category_caps': category_caps}
+    }
+
+    metrics = {}
+    values = {}
+    for name, kwargs in allocations.items():
+        portfolio_df, _ = run_portfolio_backtest(positions, returns, **kwargs)
+        metrics[name] = portfolio_metrics(portfolio_df)
+        values[name] = portfolio_df['Portfolio_Value']
+        portfolio_df.to_csv(os.path.join(output_dir, f"portfolio_{name.lower().replace(' ', '_').replace('(', '').replace(')', '')}.csv"))
+
+    metrics_df = pd.DataFrame(metrics).T
+    report_file = os.path.join(output_dir, 'portfolio_report.txt')
+    with open(report_file, 'w') as f:
+        f.write("Portfolio Backtest Report\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(f"ETFs: {positions.shape[1]}, Weeks: {positions.shape[0]}, Rebalance: weekly\n")
+        f.write(f"Category caps: {category_caps}\n\n")
+        f.write(metrics_df.to_string(float_format=lambda x: f"{x:.2f}"))
+        f.write("\n")
+
+    print(f"Portfolio report saved to {report_file}")
+    return metrics_df
@@ -1,62 +1,295 @@
 import pandas as pd
+import numpy as np
+from .copies import copy_frame
+from .costs import transaction_costs
 
-def apply_stop_loss(df, stop_loss_pct=0.03):
+def stop_loss_path(positions, closes, lows, highs, stop_loss_pct=0.03, position=0, entry_price=0):
     """
-    Apply stop loss to positions immediately when threshold is breached
-    Uses intraweek high/low prices to check for stop loss triggers
-    Returns a new DataFrame with stop loss applied
+    Run the stop loss state machine over positional arrays
+
+    Parameters:
+    -----------
+    positions, closes, lows, highs : numpy.ndarray
+        Lagged signal positions and weekly prices
+    stop_loss_pct : float
+        Stop loss threshold
+    position, entry_price : float
+        State of the machine before the first bar (flat by default), e.g.
+        the state returned by an earlier call on the preceding bars
+
+    Returns:
+    --------
+    positions, closes : numpy.ndarray
+        Positions after stops and closes with stop weeks filled at the stop price
+    stop_sides, stop_entry_prices : numpy.ndarray
+        Side (1 long, -1 short) and entry price of the position stopped out each week
+    state : tuple
+        (position, entry_price) after the last bar
     """
-    # Create a copy of the input DataFrame
-    result_df = df.copy()
-    
-    position = 0
-    entry_price = 0
-    portfolio_value = result_df['Portfolio_Value'].iloc[0]
+    positions = np.array(positions, dtype=float)
+    closes = np.array(closes, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    highs = np.asarray(highs, dtype=float)
+    stop_sides = np.zeros(len(positions), dtype=np.int64)
+    stop_entry_prices = np.full(len(positions), np.nan)
     
-    for i in range(len(result_df)):
-        if result_df['Position'].iloc[i] != 0 and position == 0:
+    for i in range(len(positions)):
+        if positions[i] != 0 and position == 0:
             # Enter new position
-            position = result_df['Position'].iloc[i]
-            entry_price = result_df['Close'].iloc[i]
-            portfolio_value = result_df['Portfolio_Value'].iloc[i]
+            position = positions[i]
+            entry_price = closes[i]
         elif position != 0:
             # Check for stop loss using High and Low prices
             if position == 1:  # Long position
-                lowest_price = result_df['Low'].iloc[i]
-                loss_pct = (lowest_price - entry_price) / entry_price
+                loss_pct = (lows[i] - entry_price) / entry_price
                 if loss_pct < -stop_loss_pct:
                     # Stop loss triggered - use the stop loss price for return calculation
-                    stop_price = entry_price * (1 - stop_loss_pct)
-                    result_df.loc[result_df.index[i], 'Close'] = stop_price  # Assume execution at stop price
-                    result_df.loc[result_df.index[i], 'Position'] = 0
+                    closes[i] = entry_price * (1 - stop_loss_pct)  # Assume execution at stop price
+                    positions[i] = 0
+                    stop_sides[i], stop_entry_prices[i] = 1, entry_price
                     position = 0
                     entry_price = 0
                     
             else:  # Short position
-                highest_price = result_df['High'].iloc[i]
-                loss_pct = (entry_price - highest_price) / entry_price
+                loss_pct = (entry_price - highs[i]) / entry_price
                 if loss_pct < -stop_loss_pct:
                     # Stop loss triggered - use the stop loss price for return calculation
-                    stop_price = entry_price * (1 + stop_loss_pct)
-                    result_df.loc[result_df.index[i], 'Close'] = stop_price  # Assume execution at stop price
-                    result_df.loc[result_df.index[i], 'Position'] = 0
+                    closes[i] = entry_price * (1 + stop_loss_pct)  # Assume execution at stop price
+                    positions[i] = 0
+                    stop_sides[i], stop_entry_prices[i] = -1, entry_price
                     position = 0
                     entry_price = 0
             
             # Check for regular position change
-            if result_df['Position'].iloc[i] != position and position != 0:
-                position = result_df['Position'].iloc[i]
-                entry_price = result_df['Close'].iloc[i] if position != 0 else 0
-                portfolio_value = result_df['Portfolio_Value'].iloc[i]
+            if positions[i] != position and position != 0:
+                position = positions[i]
+                entry_price = closes[i] if position != 0 else 0
+    
+    return positions, closes, stop_sides, stop_entry_prices, (position, entry_price)
+
+def apply_stop_loss(df, stop_loss_pct=0.03, state=None):
+    """
+    Apply stop loss to positions immediately when threshold is breached
+    Uses intraweek high/low prices to check for stop loss triggers
+    Returns a new DataFrame with stop loss applied
+    
+    With state (see finish_strategy) the stop loss continues from its
+    'stop' entry, the (position, entry price) after the preceding bars,
+    which is then set to the state after the last bar.
+    """
+    # Create a copy of the input DataFrame, keeping the pre-stop signal and close
+    result_df = copy_frame(df)
+    result_df['Signal_Position'] = df['Position']
+    result_df['Raw_Close'] = df['Close']
+    
+    # Work on positional arrays: no label lookups into an index that may be
+    # shared with other strategies running in parallel
+    state = {} if state is None else state
+    positions, closes, stop_sides, stop_entry_prices, state['stop'] = stop_loss_path(
+        df['Position'].to_numpy(dtype=float), df['Close'].to_numpy(dtype=float),
+        df['Low'].to_numpy(dtype=float), df['High'].to_numpy(dtype=float), stop_loss_pct,
+        *state.get('stop', (0, 0)))
+    
+    result_df['Close'] = closes
+    result_df['Position'] = positions
+    result_df['Stop_Side'] = stop_sides
+    result_df['Stop_Entry_Price'] = stop_entry_prices
+    return result_df
+
+def apply_intraweek_stops(weekly_df, daily_df, stop_loss_pct=0.05):
+    """
+    Resolve weekly stop loss exits on the daily bars of the stop week
+    
+    apply_stop_loss decides which weeks stop out from the weekly Low/High.
+    This maps every daily bar onto its week, tracks the running low/high
+    within each stopped week (group cummin/cummax) and takes the first
+    day that breaches the stop as the exit. The fill is the stop price,
+    or the day's Open if the market gapped through the stop.
+    
+    Parameters:
+    -----------
+    weekly_df : pandas.DataFrame
+        Output of apply_stop_loss
+    daily_df : pandas.DataFrame
+        Daily OHLC bars the weekly frame was resampled from
+    stop_loss_pct : float
+        Stop loss threshold used for apply_stop_loss
+    
+    Returns:
+    --------
+    result_df : pandas.DataFrame
+        Copy of weekly_df with Close set to the exact exit price on stop
+        weeks and Stop_Date / Stop_Exit_Price columns added
+    """
+    result_df = copy_frame(weekly_df)
+    result_df['Stop_Date'] = pd.Series(pd.NaT, index=result_df.index, dtype=daily_df.index.dtype)
+    result_df['Stop_Exit_Price'] = np.nan
+    
+    stop_side = result_df['Stop_Side'].to_numpy()
+    if not (stop_side != 0).any():
+        return result_df
+    
+    # Week id of every daily bar (weekly labels close their bin on the right)
+    week_id = result_df.index.searchsorted(daily_df.index, side='left')
+    in_stop_week = np.append(stop_side != 0, False)[week_id]
+    rows = np.flatnonzero(in_stop_week)
+    week = week_id[rows]
+    
+    side = stop_side[week]
+    entry_price = result_df['Stop_Entry_Price'].to_numpy()[week]
+    running_low = daily_df['Low'].iloc[rows].groupby(week).cummin().to_numpy()
+    running_high = daily_df['High'].iloc[rows].groupby(week).cummax().to_numpy()
+    
+    # Same breach test as apply_stop_loss, evaluated on the running extremes
+    with np.errstate(divide='ignore', invalid='ignore'):
+        breach = np.where(side == 1,
+                          (running_low - entry_price) / entry_price < -stop_loss_pct,
+                          (entry_price - running_high) / entry_price < -stop_loss_pct)
+    breach_rows = rows[breach]
+    stop_weeks, first = np.unique(week[breach], return_index=True)
+    exit_rows = breach_rows[first]
+    
+    # Fill at the stop price unless the day opened beyond it
+    side = stop_side[stop_weeks]
+    entry_price = result_df['Stop_Entry_Price'].to_numpy()[stop_weeks]
+    stop_price = entry_price * (1 - side * stop_loss_pct)
+    day_open = daily_df['Open'].to_numpy()[exit_rows]
+    exit_price = np.where(side == 1, np.fmin(stop_price, day_open), np.fmax(stop_price, day_open))
+    
+    close_col = result_df.columns.get_loc('Close')
+    result_df.iloc[stop_weeks, close_col] = exit_price
+    result_df.iloc[stop_weeks, result_df.columns.get_loc('Stop_Exit_Price')] = exit_price
+    result_df.iloc[stop_weeks, result_df.columns.get_loc('Stop_Date')] = daily_df.index[exit_rows]
     
     return result_df
 
-def calculate_strategy_returns(df):
-    """Calculate strategy returns with position changes"""
-    df['Returns'] = df['Close'].pct_change()
+def _growth(returns, previous=None):
+    """Cumulative growth of returns, continuing the growth of the preceding bars when given"""
+    if previous is None:
+        return (1 + returns).cumprod()
+    return pd.Series(np.cumprod(np.r_[previous, 1 + returns.to_numpy()])[1:], index=returns.index)
+
+def calculate_strategy_returns(df, cost_models=None, net_of=None, state=None):
+    """
+    Calculate strategy returns with position changes
+    
+    With cost_models (scenario name -> CostModel), transaction costs for all
+    scenarios are derived from Position.diff() in one vectorized step and
+    Gross_Strategy_Returns plus one Net_Strategy_Returns_<name> column per
+    scenario are added. Strategy_Returns stays gross unless net_of names
+    the scenario to use for Strategy_Returns and Portfolio_Value.
+    
+    With state (see finish_strategy) the bars continue a run on the
+    preceding bars: returns, costs and the portfolio value start from its
+    'close', 'position', 'growth' and 'gross_growth' entries, which are
+    then set to those of the last bar.
+    """
+    state = {} if state is None else state
+    # Missing closes carry the last close forward (no return over the gap)
+    close = df['Close'].ffill()
+    if 'close' in state:
+        close = close.fillna(state['close'])
+    df['Returns'] = close / close.shift(1, fill_value=state.get('close', np.nan)) - 1
     df['Strategy_Returns'] = df['Position'] * df['Returns']
     df['Strategy_Returns'] = df['Strategy_Returns'].fillna(0)
+    initial_value = df['Portfolio_Value'].iloc[0]
+    
+    if cost_models:
+        gross_growth = _growth(df['Strategy_Returns'], state.get('gross_growth'))
+        previous = None
+        if state.get('gross_growth') is not None:
+            previous = (state['position'], initial_value * state['gross_growth'])
+        costs = transaction_costs(df, cost_models, initial_value * gross_growth, previous)
+        df['Gross_Strategy_Returns'] = df['Strategy_Returns']
+        for name, scenario_costs in zip(cost_models, costs):
+            df[f'Net_Strategy_Returns_{name}'] = df['Gross_Strategy_Returns'] - scenario_costs
+        if net_of is not None:
+            df['Strategy_Returns'] = df[f'Net_Strategy_Returns_{net_of}']
+        state['gross_growth'] = gross_growth.iloc[-1]
+    
     df['Portfolio_Returns'] = df['Strategy_Returns']
-    df['Portfolio_Value'] = df['Portfolio_Value'].iloc[0] * (1 + df['Portfolio_Returns']).cumprod()
+    growth = _growth(df['Portfolio_Returns'], state.get('growth'))
+    df['Portfolio_Value'] = initial_value * growth
     df['Position_Change'] = df['Position'].diff()
-    return df 
\ No newline at end of file
+    if 'position' in state:
+        df.iloc[0, df.columns.get_loc('Position_Change')] = df['Position'].iloc[0] - state['position']
+    state.update({'close': close.iloc[-1], 'position': df['Position'].iloc[-1], 'growth': growth.iloc[-1]})
+    return df
+
+def apply_stop_loss_batch(position, close, low, high, stop_loss_pcts):
+    """
+    Apply several stop loss thresholds in one pass over the weeks
+    
+    Vectorized over thresholds: the path-dependent position/entry state is
+    kept as one array element per threshold and stepped week by week, with
+    exactly the same rules as apply_stop_loss.
+    
+    Parameters:
+    -----------
+    position : array-like
+        Signal position per week (before stop loss), may contain NaN
+    close, low, high : array-like
+        Weekly Close, Low and High prices
+    stop_loss_pcts : array-like
+        Stop loss thresholds to evaluate (e.g. [0.03, 0.05, 0.1])
+    
+    Returns:
+    --------
+    positions : numpy.ndarray
+        (thresholds x weeks) positions after stop loss
+    closes : numpy.ndarray
+        (thresholds x weeks) closes with stop prices substituted
+    """
+    signal = np.asarray(position, dtype=float)
+    close = np.asarray(close, dtype=float)
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    stops = np.asarray(stop_loss_pcts, dtype=float)
+    n_weeks = len(signal)
+    
+    positions = np.tile(signal, (len(stops), 1))
+    closes = np.tile(close, (len(stops), 1))
+    
+    held = np.zeros(len(stops))
+    entry_price = np.zeros(len(stops))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in range(n_weeks):
+            # Enter new position
+            enter = (signal[i] != 0) & (held == 0)
+            in_position = ~enter & (held != 0)
+            
+            # Check for stop loss using High and Low prices
+            long_stop = in_position & (held == 1) & ((low[i] - entry_price) / entry_price < -stops)
+            short_stop = in_position & (held != 1) & ((entry_price - high[i]) / entry_price < -stops)
+            stopped = long_stop | short_stop
+            closes[long_stop, i] = entry_price[long_stop] * (1 - stops[long_stop])
+            closes[short_stop, i] = entry_price[short_stop] * (1 + stops[short_stop])
+            positions[stopped, i] = 0
+            
+            # Check for regular position change
+            change = in_position & ~stopped & (signal[i] != held)
+            
+            held = np.where(enter | change, signal[i], np.where(stopped, 0.0, held))
+            entry_price = np.where(enter, close[i], entry_price)
+            entry_price = np.where(change, close[i] if signal[i] != 0 else 0.0, entry_price)
+            entry_price = np.where(stopped, 0.0, entry_price)
+    
+    return positions, closes
+
+def calculate_strategy_returns_batch(positions, closes):
+    """
+    Strategy returns for a (scenarios x weeks) batch of positions and closes
+    
+    Matches calculate_strategy_returns row by row: closes are forward-filled
+    before the percentage change and missing returns count as zero.
+    """
+    closes = np.asarray(closes, dtype=float)
+    valid = ~np.isnan(closes)
+    last_valid = np.maximum.accumulate(np.where(valid, np.arange(closes.shape[1]), 0), axis=1)
+    filled = np.take_along_axis(closes, last_valid, axis=1)
+    
+    returns = np.full(closes.shape, np.nan)
+    returns[:, 1:] = filled[:, 1:] / filled[:, :-1] - 1
+    strategy_returns = positions * returns
+    return np.where(np.isnan(strategy_returns), 0.0, strategy_returns)
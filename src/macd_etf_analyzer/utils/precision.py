@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Storage dtype per kind of column of stored results. Strategies always
+# compute in float64 and results are cast only when stored: 'compact'
+# keeps prices, indicators and returns as float32 and positions as float16
+# (exact for -1, 0 and 1, and NaN for the first week before the signal
+# lag), 'full' keeps float64. Portfolio values stay float64 in both, so
+# the reported values keep their cents.
+PRECISION_POLICIES = {
+    'full': {'price': np.float64, 'value': np.float64, 'indicator': np.float64, 'returns': np.float64,
+             'position': np.float64},
+    'compact': {'price': np.float32, 'value': np.float64, 'indicator': np.float32, 'returns': np.float32,
+                'position': np.float16}
+}
+
+DEFAULT_PRECISION = 'compact'
+
+COLUMN_KINDS = {
+    'Open': 'price',
+    'High': 'price',
+    'Low': 'price',
+    'Close': 'price',
+    'Raw_Close': 'price',
+    'Portfolio_Value': 'value',
+    'MACD': 'indicator',
+    'VPVMA': 'indicator',
+    'Signal_Line': 'indicator',
+    'MACD_Histogram': 'indicator',
+    'VPVMA_Histogram': 'indicator',
+    'Returns': 'returns',
+    'Strategy_Returns': 'returns',
+    'Signal_Position': 'position',
+    'Position': 'position',
+    'Position_Change': 'position'
+}
+
+def get_policy(precision=DEFAULT_PRECISION):
+    """Kind -> dtype of a policy given by name ('full', 'compact') or as a dict"""
+    if isinstance(precision, dict):
+        return {**PRECISION_POLICIES['full'], **precision}
+    if precision not in PRECISION_POLICIES:
+        raise ValueError(f"Unknown precision policy: {precision}")
+    return PRECISION_POLICIES[precision]
+
+def column_kind(column):
+    """Kind of a frame column ('price', 'value', 'indicator', 'returns', 'position'), None if not covered"""
+    if column.startswith('Net_Strategy_Returns_'):
+        return 'returns'
+    return COLUMN_KINDS.get(column)
+
+def apply_precision(df, precision=DEFAULT_PRECISION):
+    """
+    Cast the columns of a strategy frame to a precision policy for storage
+
+    Columns not covered by the policy (e.g. Volume) keep their dtype. The
+    undefined positions of integer policies (the first week before the
+    signal lag) become flat.
+
+    Returns:
+    --------
+    df : pandas.DataFrame
+        New frame with the cast columns
+    """
+    policy = get_policy(precision)
+    columns = {}
+    for column in df.columns:
+        kind = column_kind(column)
+        if kind is None or df[column].dtype == policy[kind]:
+            continue
+        values = df[column]
+        if np.issubdtype(policy[kind], np.integer):
+            values = values.fillna(0)
+        columns[column] = values.astype(policy[kind])
+    return df.assign(**columns) if columns else df
+
+def categorize(df, columns):
+    """Store label columns (symbols, strategies) as categoricals, categories in order of appearance"""
+    return df.assign(**{column: pd.Categorical(df[column], categories=pd.unique(df[column]))
+                        for column in columns if column in df.columns})
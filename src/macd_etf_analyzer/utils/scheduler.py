@@ -0,0 +1,145 @@
+import os
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+class Lane:
+    """
+    Bounded worker pool for one kind of work (I/O or CPU)
+
+    At most max_workers tasks run and max_queue more wait; submit blocks
+    while the lane is full, so producers cannot run ahead of the workers.
+    Tasks run in a copy of the submitter's contextvars context.
+    """
+
+    def __init__(self, name, max_workers, max_queue):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{name}-lane')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.queued = 0
+        self.running = 0
+        self.max_queue_depth = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def in_flight(self):
+        """Tasks queued or running"""
+        return self.queued + self.running
+
+    def has_capacity(self):
+        """True if submit would not block"""
+        return self.in_flight < self.max_workers + self.max_queue
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs), blocking while the lane is full"""
+        self._slots.acquire()
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        try:
+            return self._executor.submit(contextvars.copy_context().run, self._run, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self.submitted -= 1
+                self.queued -= 1
+            self._slots.release()
+            raise
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.busy_seconds += time.perf_counter() - start
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+            self._slots.release()
+
+    def stats(self):
+        """Counters of the lane; utilization is busy worker time over available worker time"""
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            return {
+                'Workers': self.max_workers,
+                'Submitted': self.submitted,
+                'Completed': self.completed,
+                'Failed': self.failed,
+                'Queue Depth': self.queued,
+                'Max Queue Depth': self.max_queue_depth,
+                'Running': self.running,
+                'Busy (s)': self.busy_seconds,
+                'Utilization (%)': 100 * self.busy_seconds / (self.max_workers * elapsed) if elapsed > 0 else 0.0
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+class Scheduler:
+    """
+    Process-wide scheduler with separate I/O and CPU lanes
+
+    Downloads and other blocking I/O go to the 'io' lane, indicator and
+    backtest work to the 'cpu' lane. Tasks must not wait on other tasks of
+    their own lane; stages are chained by the submitting thread instead.
+    """
+
+    def __init__(self, io_workers=8, cpu_workers=None, queue_factor=2):
+        cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.lanes = {
+            'io': Lane('io', io_workers, io_workers * queue_factor),
+            'cpu': Lane('cpu', cpu_workers, cpu_workers * queue_factor)
+        }
+
+    def lane(self, name):
+        return self.lanes[name]
+
+    def submit(self, lane, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs) on a lane ('io' or 'cpu')"""
+        return self.lanes[lane].submit(fn, *args, **kwargs)
+
+    def stats(self):
+        """Lane name -> counters"""
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+    def report(self):
+        """One line of counters per lane"""
+        lines = []
+        for name, stats in self.stats().items():
+            lines.append(f"{name} lane: {stats['Workers']} workers, {stats['Completed']}/{stats['Submitted']} tasks done "
+                         f"({stats['Failed']} failed), queue depth {stats['Queue Depth']} "
+                         f"(max {stats['Max Queue Depth']}), utilization {stats['Utilization (%)']:.1f}%")
+        return "\n".join(lines)
+
+    def shutdown(self, wait=True):
+        for lane in self.lanes.values():
+            lane.shutdown(wait=wait)
+
+_SCHEDULER = None
+_SCHEDULER_LOCK = threading.Lock()
+
+def get_scheduler():
+    """The process-wide scheduler, created on first use"""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = Scheduler()
+        return _SCHEDULER
@@ -0,0 +1,389 @@
+import os
+import json
+import time
+import pickle
+import socket
+import threading
+import traceback
+import uuid
+from collections import namedtuple
+
+# Directories of a queue, one per shard state; a shard file lives in
+# exactly one of pending/ and claimed/ until a result or failure is recorded
+PENDING, CLAIMED, DONE, FAILED = 'pending', 'claimed', 'done', 'failed'
+MANIFEST_FILE = 'queue.json'
+
+# id : shard id (zero-padded, so shards are claimed in creation order)
+# symbols : ETF symbols of the shard
+# options : run options shared by every shard of the queue
+# token : identifies this claim of the shard (renew/complete/fail only act on the claim they hold)
+Shard = namedtuple('Shard', ['id', 'symbols', 'options', 'token'])
+
+def make_shards(symbols, shard_size):
+    """Split symbols into consecutive shards of at most shard_size"""
+    return [list(symbols[i:i + shard_size]) for i in range(0, len(symbols), shard_size)]
+
+def _replace(path, data):
+    """Write a file through a temporary file and an atomic rename"""
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class ShardQueue:
+    """
+    Work queue of symbol shards in a shared directory
+
+    The coordinator writes one file per shard to pending/. A worker
+    claims a shard by renaming its file to claimed/; the rename is
+    atomic, so exactly one of several competing workers (on this or any
+    host sharing the directory) gets it. The claim's modification time is
+    its lease: the worker renews it while the shard runs, and a claim not
+    renewed for lease_seconds is moved back to pending/ by reclaim_expired
+    so another worker picks up the shards of a crashed one. Leases are
+    compared against the local clock, so on a network filesystem they
+    must be much longer than the clock skew between hosts.
+
+    Each claim carries a random token, stored in the claim file. A worker
+    that lost its lease can still finish, but its renew, complete and
+    fail calls no longer match the claim file, so they are ignored rather
+    than releasing the claim of the worker that took the shard over. To
+    release a claim, the worker first renames the claim file to a
+    private name. Only then does it check the token and record the
+    result, so a reclaim cannot happen in between. Shards run at least
+    once: a worker that crashes before recording its result leaves a
+    claim that expires.
+
+    Parameters:
+    -----------
+    path : str
+        Queue directory
+    lease_seconds : float
+        Time after which an unrenewed claim expires
+    """
+
+    def __init__(self, path, lease_seconds=600):
+        self.path = path
+        self.lease_seconds = lease_seconds
+
+    def _file(self, state, shard_id, suffix='.json'):
+        return os.path.join(self.path, state, f'{shard_id}{suffix}')
+
+    def _ids(self, state):
+        directory = os.path.join(self.path, state)
+        return sorted(name.split('.')[0] for name in os.listdir(directory) if not name.endswith(('.tmp', '.held')))
+
+    def _owns(self, path, token):
+        """True if the claim file at path holds the given token"""
+        try:
+            with open(path) as f:
+                return json.load(f).get('token') == token
+        except FileNotFoundError:
+            return False
+
+    @property
+    def exists(self):
+        return os.path.exists(os.path.join(self.path, MANIFEST_FILE))
+
+    def create(self, shards, options=None):
+        """
+        Write the shards of a new queue
+
+        Parameters:
+        -----------
+        shards : list of list of str
+            Symbols of each shard (see make_shards)
+        options : dict, optional
+            JSON-serializable run options passed to every shard
+
+        Returns:
+        --------
+        shard_ids : list of str
+        """
+        for state in (PENDING, CLAIMED, DONE, FAILED):
+            os.makedirs(os.path.join(self.path, state), exist_ok=True)
+        shard_ids = [f'{i:05d}' for i in range(len(shards))]
+        for shard_id, symbols in zip(shard_ids, shards):
+            _replace(self._file(PENDING, shard_id), json.dumps({'symbols': list(symbols)}).encode())
+        # Written last: workers wait for the manifest before claiming
+        manifest = {'shards': dict(zip(shard_ids, map(list, shards))), 'options': options or {}}
+        _replace(os.path.join(self.path, MANIFEST_FILE), json.dumps(manifest).encode())
+        return shard_ids
+
+    def manifest(self):
+        with open(os.path.join(self.path, MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def claim(self, name=None):
+        """Claim the next pending shard for the named worker, or None if there is none"""
+        options = self.manifest()['options']
+        for shard_id in self._ids(PENDING):
+            pending = self._file(PENDING, shard_id)
+            try:
+                # Start the lease before the rename, so the claim is never seen expired
+                os.utime(pending)
+                os.rename(pending, self._file(CLAIMED, shard_id))
+            except FileNotFoundError:
+                continue  # claimed by another worker
+            if os.path.exists(self._file(DONE, shard_id, '.pkl')):
+                _remove(self._file(CLAIMED, shard_id))  # finished by a worker whose lease had expired
+                continue
+            with open(self._file(CLAIMED, shard_id)) as f:
+                symbols = json.load(f)['symbols']
+            token = uuid.uuid4().hex
+            _replace(self._file(CLAIMED, shard_id),
+                     json.dumps({'symbols': symbols, 'worker': name, 'token': token}).encode())
+            return Shard(shard_id, symbols, options, token)
+        return None
+
+    def renew(self, shard_id, token):
+        """Extend the lease of a claimed shard; False if the claim was lost"""
+        claimed = self._file(CLAIMED, shard_id)
+        if not self._owns(claimed, token):
+            return False
+        try:
+            os.utime(claimed)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _release(self, shard_id, token, record):
+        """
+        Record the outcome of a claim the caller still holds and drop it
+
+        The claim file is first renamed to a private name, so nobody can
+        reclaim it while its token is checked and record() writes the
+        outcome. Another worker's claim is put back untouched. Returns
+        False (nothing recorded) if the claim was lost.
+        """
+        claimed = self._file(CLAIMED, shard_id)
+        held = self._file(CLAIMED, shard_id, f'.{token}.held')
+        try:
+            os.rename(claimed, held)
+        except FileNotFoundError:
+            return False
+        if not self._owns(held, token):
+            os.rename(held, claimed)
+            return False
+        os.utime(held)  # the lease runs on while the outcome is written
+        record()
+        _remove(held)
+        return True
+
+    def complete(self, shard_id, result, token):
+        """Record the result of a shard and release its claim; False (ignored) if the claim was lost"""
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        return self._release(shard_id, token, lambda: _replace(self._file(DONE, shard_id, '.pkl'), data))
+
+    def fail(self, shard_id, error, token):
+        """Record that a shard failed (it is not retried) and release its claim; False if the claim was lost"""
+        data = json.dumps({'error': error}).encode()
+        return self._release(shard_id, token, lambda: _replace(self._file(FAILED, shard_id), data))
+
+    def reclaim_expired(self):
+        """Move claims whose lease expired back to pending; returns their shard ids"""
+        reclaimed = []
+        now = time.time()
+        directory = os.path.join(self.path, CLAIMED)
+        # Held claims of workers that died while recording their outcome expire too
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.tmp'):
+                continue
+            shard_id = name.split('.')[0]
+            claimed = os.path.join(directory, name)
+            try:
+                if now - os.stat(claimed).st_mtime <= self.lease_seconds:
+                    continue
+                os.rename(claimed, self._file(PENDING, shard_id))
+            except FileNotFoundError:
+                continue  # completed or reclaimed meanwhile
+            reclaimed.append(shard_id)
+        return reclaimed
+
+    def status(self):
+        """Number of shards in each state"""
+        done = set(self._ids(DONE))
+        failed = set(self._ids(FAILED)) - done
+        return {PENDING: len(set(self._ids(PENDING)) - done), CLAIMED: len(set(self._ids(CLAIMED)) - done),
+                DONE: len(done), FAILED: len(failed)}
+
+    def finished(self):
+        """True once every shard has a result or a failure"""
+        recorded = set(self._ids(DONE)) | set(self._ids(FAILED))
+        return recorded >= set(self.manifest()['shards'])
+
+    def results(self):
+        """Shard id -> recorded result"""
+        results = {}
+        for shard_id in self._ids(DONE):
+            with open(self._file(DONE, shard_id, '.pkl'), 'rb') as f:
+                results[shard_id] = pickle.load(f)
+        return results
+
+    def failures(self):
+        """Shard id -> error of the failed shards without a result"""
+        failures = {}
+        for shard_id in sorted(set(self._ids(FAILED)) - set(self._ids(DONE))):
+            with open(self._file(FAILED, shard_id)) as f:
+                failures[shard_id] = json.load(f)['error']
+        return failures
+
+def merge_results(queue, symbols=None):
+    """
+    Merge the per-shard results of a queue into one symbol -> result dict
+
+    Parameters:
+    -----------
+    queue : ShardQueue
+        Finished queue whose shards return dicts keyed by symbol
+    symbols : list of str, optional
+        Order of the merged results; defaults to the shard order
+
+    Returns:
+    --------
+    results : dict
+        Symbol -> result for every symbol with a result
+    """
+    merged = {}
+    for result in queue.results().values():
+        merged.update(result)
+    symbols = symbols or [s for shard in queue.manifest()['shards'].values() for s in shard]
+    return {symbol: merged[symbol] for symbol in symbols if symbol in merged}
+
+def default_worker_name():
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+def _renew_while(queue, shard, stop):
+    """Renew a lease every third of its length until stopped or lost"""
+    while not stop.wait(queue.lease_seconds / 3):
+        if not queue.renew(shard.id, shard.token):
+            print(f"Lost the lease of shard {shard.id}")
+            return
+
+def run_worker(queue_dir, run_shard, lease_seconds=600, poll_seconds=5.0, name=None, max_shards=None):
+    """
+    Claim and run shards until every shard of the queue is finished
+
+    Each shard runs as run_shard(symbols, **options) while a background
+    thread renews its lease; the returned dict (symbol -> result) is
+    recorded for the coordinator, and an exception fails the shard.
+    While no shard is pending the worker reclaims expired leases and
+    waits, since a crashed worker's shards come back to the queue.
+
+    Parameters:
+    -----------
+    queue_dir : str
+        Queue directory shared with the coordinator
+    run_shard : callable
+        run_shard(symbols, **options) -> dict of symbol -> result (picklable)
+    lease_seconds : float
+        Lease length; must match the coordinator's
+    poll_seconds : float
+        Wait between polls of an empty queue
+    name : str, optional
+        Worker name for the log; defaults to <host>-<pid>
+    max_shards : int, optional
+        Stop after this many shards
+
+    Returns:
+    --------
+    shard_ids : list of str
+        Shards this worker ran
+    """
+    queue = ShardQueue(queue_dir, lease_seconds)
+    name = name or default_worker_name()
+    while not queue.exists:
+        time.sleep(poll_seconds)
+
+    ran = []
+    while max_shards is None or len(ran) < max_shards:
+        shard = queue.claim(name)
+        if shard is None:
+            if queue.finished():
+                break
+            queue.reclaim_expired()
+            time.sleep(poll_seconds)
+            continue
+
+        print(f"{name} running shard {shard.id}: {', '.join(shard.symbols)}")
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=_renew_while, args=(queue, shard, stop), daemon=True)
+        heartbeat.start()
+        try:
+            result = run_shard(shard.symbols, **shard.options)
+        except Exception:
+            if queue.fail(shard.id, traceback.format_exc(), shard.token):
+                print(f"{name} failed shard {shard.id}")
+            else:
+                print(f"{name} lost the lease of shard {shard.id}; its failure is ignored")
+        else:
+            if not queue.complete(shard.id, result, shard.token):
+                print(f"{name} lost the lease of shard {shard.id}; its result is ignored")
+        finally:
+            stop.set()
+            heartbeat.join()
+        ran.append(shard.id)
+    return ran
+
+def run_coordinator(queue_dir, symbols, shard_size, options=None, lease_seconds=600, poll_seconds=5.0):
+    """
+    Split symbols into a shard queue, wait for the workers and merge their results
+
+    An existing queue in queue_dir is resumed instead of recreated, so a
+    restarted coordinator picks up the shards already finished; it must
+    have been created for the same symbols and options, otherwise
+    ValueError is raised rather than mixing the results of two runs.
+    While waiting the coordinator reclaims expired leases and prints
+    progress.
+
+    Parameters:
+    -----------
+    queue_dir : str
+        Queue directory shared with the workers
+    symbols : list of str
+        ETF symbols
+    shard_size : int
+        Symbols per shard
+    options : dict, optional
+        JSON-serializable options passed to every shard
+    lease_seconds, poll_seconds : float
+        See run_worker
+
+    Returns:
+    --------
+    results : dict
+        Symbol -> result, in the order of symbols
+    failures : dict
+        Shard id -> error of the shards that failed
+    """
+    queue = ShardQueue(queue_dir, lease_seconds)
+    if not queue.exists:
+        queue.create(make_shards(symbols, shard_size), options)
+    else:
+        manifest = queue.manifest()
+        queued = [symbol for shard in manifest['shards'].values() for symbol in shard]
+        # Options are compared as they were stored, i.e. after a JSON round trip
+        if queued != list(symbols) or manifest['options'] != json.loads(json.dumps(options or {})):
+            raise ValueError(f"Queue {queue_dir} was created for other symbols or options; "
+                             "use a new queue directory for a new sweep")
+
+    last = None
+    while not queue.finished():
+        for shard_id in queue.reclaim_expired():
+            print(f"Lease of shard {shard_id} expired; returned it to the queue")
+        status = queue.status()
+        if status != last:
+            print("Shards: " + ", ".join(f"{count} {state}" for state, count in status.items()))
+            last = status
+        time.sleep(poll_seconds)
+
+    failures = queue.failures()
+    for shard_id, error in failures.items():
+        print(f"Shard {shard_id} failed:\n{error}")
+    return merge_results(queue, list(symbols)), failures
@@ -0,0 +1,212 @@
+import os
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from scipy import stats
+
+EULER_GAMMA = 0.5772156649015329
+
+def _sharpe(returns, periods_per_year):
+    """Annualized Sharpe ratio along the last axis (sample std, 0 if flat)"""
+    mean = returns.mean(axis=-1)
+    std = returns.std(axis=-1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 0, np.sqrt(periods_per_year) * mean / std, 0.0)
+
+def stationary_bootstrap_indices(n, n_resamples, mean_block=None, rng=None):
+    """
+    Index array for the stationary block bootstrap (Politis & Romano)
+
+    Blocks start at random positions and have geometric lengths with the
+    given mean, wrapping around the end of the sample. All resamples are
+    generated at once as a (n_resamples x n) array.
+
+    Parameters:
+    -----------
+    n : int
+        Sample length
+    n_resamples : int
+        Number of bootstrap resamples
+    mean_block : float, optional
+        Expected block length, defaults to n ** (1/3)
+    rng : numpy.random.Generator, optional
+        Random generator
+
+    Returns:
+    --------
+    indices : numpy.ndarray
+        (n_resamples x n) int32 indices into the sample
+    """
+    rng = rng or np.random.default_rng()
+    mean_block = mean_block or max(n ** (1 / 3), 1.0)
+
+    new_block = rng.random((n_resamples, n)) < 1 / mean_block
+    new_block[:, 0] = True
+    starts = rng.integers(0, n, size=(n_resamples, n), dtype=np.int32)
+
+    # Position at which the current block began, carried forward
+    steps = np.arange(n, dtype=np.int32)
+    block_begin = np.maximum.accumulate(np.where(new_block, steps, 0), axis=1)
+    block_start = np.take_along_axis(starts, block_begin, axis=1)
+    return (block_start + steps - block_begin) % n
+
+def bootstrap_sharpe_pvalue(returns, n_resamples=5000, mean_block=None, rng=None):
+    """
+    One-sided p-value of a Sharpe ratio against a zero-mean null
+
+    Returns are demeaned to impose the null, resampled with the
+    stationary block bootstrap (preserving autocorrelation) and the
+    observed Sharpe is compared with the resampled distribution. The
+    comparison is scale-free, so per-period Sharpe ratios are used.
+    """
+    returns = np.asarray(returns, dtype=float)
+    observed = _sharpe(returns, 1)
+    indices = stationary_bootstrap_indices(len(returns), n_resamples, mean_block, rng)
+    null_sharpes = _sharpe((returns - returns.mean())[indices], 1)
+    return (1 + np.sum(null_sharpes >= observed)) / (n_resamples + 1)
+
+def random_entry_pvalue(positions, market_returns, n_resamples=5000, rng=None):
+    """
+    One-sided p-value of a strategy against randomly timed entries
+
+    The position series is circularly shifted by a random offset for each
+    resample, keeping the number, length and direction of trades but
+    breaking their timing relative to the market. Per-period Sharpe
+    ratios are compared, as in bootstrap_sharpe_pvalue.
+    """
+    positions = np.asarray(positions, dtype=float)
+    market_returns = np.asarray(market_returns, dtype=float)
+    rng = rng or np.random.default_rng()
+    n = len(positions)
+
+    observed = _sharpe(positions * market_returns, 1)
+    shifts = rng.integers(1, max(n, 2), size=(n_resamples, 1))
+    shifted = positions[(np.arange(n) + shifts) % n]
+    null_sharpes = _sharpe(shifted * market_returns, 1)
+    return (1 + np.sum(null_sharpes >= observed)) / (n_resamples + 1)
+
+def deflated_sharpe_ratio(returns, trial_sharpes):
+    """
+    Deflated Sharpe ratio (Bailey & Lopez de Prado)
+
+    Probability that the true Sharpe exceeds the maximum expected from
+    selecting the best of several trials by chance, accounting for the
+    skewness and kurtosis of the returns.
+
+    Parameters:
+    -----------
+    returns : array-like
+        Periodic returns of the selected strategy
+    trial_sharpes : array-like
+        Per-period (non-annualized) Sharpe ratios of all trials
+
+    Returns:
+    --------
+    dsr : float
+        Deflated Sharpe ratio in [0, 1]
+    """
+    returns = np.asarray(returns, dtype=float)
+    trial_sharpes = np.asarray(trial_sharpes, dtype=float)
+    n_trials = len(trial_sharpes)
+    sharpe = _sharpe(returns, periods_per_year=1)
+
+    if n_trials > 1:
+        expected_max = np.sqrt(trial_sharpes.var(ddof=1)) * (
+            (1 - EULER_GAMMA) * stats.norm.ppf(1 - 1 / n_trials)
+            + EULER_GAMMA * stats.norm.ppf(1 - 1 / (n_trials * np.e)))
+    else:
+        expected_max = 0.0
+
+    skew = stats.skew(returns)
+    kurtosis = stats.kurtosis(returns, fisher=False)
+    denominator = 1 - skew * sharpe + (kurtosis - 1) / 4 * sharpe ** 2
+    if not np.isfinite(denominator) or denominator <= 0:
+        return np.nan
+    return stats.norm.cdf((sharpe - expected_max) * np.sqrt(len(returns) - 1) / np.sqrt(denominator))
+
+def _symbol_significance(etf, arrays, n_resamples, seed, periods_per_year):
+    """Significance tests for every strategy of one ETF (runs in a worker process)"""
+    rng = np.random.default_rng(seed)
+    trial_sharpes = [_sharpe(returns, periods_per_year=1) for returns, _, _ in arrays.values()]
+
+    rows = []
+    for strategy, (returns, positions, market_returns) in arrays.items():
+        rows.append({
+            'ETF': etf,
+            'Strategy': strategy,
+            'Sharpe Ratio': float(_sharpe(returns, periods_per_year)),
+            'Bootstrap p-value': bootstrap_sharpe_pvalue(returns, n_resamples, rng=rng),
+            'Random-Entry p-value': random_entry_pvalue(positions, market_returns, n_resamples, rng=rng),
+            'Deflated Sharpe': deflated_sharpe_ratio(returns, trial_sharpes)
+        })
+    return rows
+
+def run_significance_tests(etf_results, n_resamples=5000, max_workers=None, seed=0, output_dir='data/summary',
+                           periods_per_year=52):
+    """
+    Bootstrap and Monte Carlo significance of every strategy's Sharpe ratio
+
+    Symbols are spread across worker processes; only the weekly return and
+    position arrays are sent to the workers. The workers are spawned rather
+    than forked: the reports run after the scheduler's thread pools and the
+    fetcher's event loop have started, and forking a threaded process can
+    copy locks those threads hold.
+
+    Parameters:
+    -----------
+    etf_results : dict
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values
+    n_resamples : int
+        Resamples for both the bootstrap and the random-entry test
+    max_workers : int, optional
+        Number of worker processes
+    seed : int
+        Base random seed (each symbol gets its own stream)
+    output_dir : str
+        Directory to save the significance report
+    periods_per_year : int
+        Bars per year annualizing the reported Sharpe ratios (52 for
+        weekly bars); the p-values do not depend on it
+
+    Returns:
+    --------
+    significance_df : pandas.DataFrame
+        One row per (ETF, strategy) with Sharpe, p-values and deflated Sharpe
+    """
+    jobs = {}
+    for etf, (results, _, _) in etf_results.items():
+        jobs[etf] = {
+            strategy: (df['Strategy_Returns'].to_numpy(dtype=float),
+                       df['Position'].fillna(0).to_numpy(dtype=float),
+                       df['Returns'].fillna(0).to_numpy(dtype=float))
+            for strategy, df in results.items()
+        }
+
+    seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [executor.submit(_symbol_significance, etf, arrays, n_resamples, symbol_seed,
+                                   periods_per_year)
+                   for (etf, arrays), symbol_seed in zip(jobs.items(), seeds)]
+        for future in futures:
+            rows.extend(future.result())
+    significance_df = pd.DataFrame(rows)
+
+    os.makedirs(output_dir, exist_ok=True)
+    csv_file = os.path.join(output_dir, 'sharpe_significance.csv')
+    significance_df.to_csv(csv_file, index=False)
+
+    report_file = os.path.join(output_dir, 'sharpe_significance_report.txt')
+    with open(report_file, 'w') as f:
+        f.write("Sharpe Ratio Significance Report\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(f"Resamples: {n_resamples} (stationary block bootstrap and random-entry Monte Carlo)\n")
+        f.write("Deflated Sharpe: probability the Sharpe beats the best-of-4-strategies selection bias\n\n")
+        for etf, etf_df in significance_df.groupby('ETF', sort=False):
+            f.write(f"{etf}:\n")
+            f.write(etf_df.drop(columns='ETF').to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+            f.write("\n\n")
+
+    print(f"Significance report saved to {report_file}")
+    return significance_df
@@ -2,6 +2,9 @@ import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from ..data.universe import get_category
+from .performance import TRADE_COLUMNS, extract_trades
+from .precision import categorize
 
 def generate_etf_summary(etf_results):
     """
@@ -10,7 +13,8 @@ def generate_etf_summary(etf_results):
     Parameters:
     -----------
     etf_results : dict
-        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values,
+        where results maps strategy names to StrategyResult
     
     Returns:
     --------
@@ -20,16 +24,8 @@ def generate_etf_summary(etf_results):
     summary_data = []
     
     for etf, (results, best_strategy, sharpe_ratios) in etf_results.items():
-        # Extract data for each strategy
-        strategy_metrics = {
-            'MACD': results[0],
-            'MACD Zero-Cross': results[1],
-            'VPVMA': results[2],
-            'VPVMA Zero-Cross': results[3]
-        }
-        
         # Get metrics for the best strategy
-        best_df = strategy_metrics[best_strategy]
+        best_df = results[best_strategy]
         
         # Calculate key metrics
         total_return = (best_df['Portfolio_Value'].iloc[-1] / best_df['Portfolio_Value'].iloc[0] - 1) * 100
@@ -47,8 +43,8 @@ def generate_etf_summary(etf_results):
         num_trades = len(position_changes[position_changes != 0])
         
         # Win ratio
-        position_change_indices = best_df[best_df['Position_Change'] != 0].index
-        winning_trades = len(best_df.loc[position_change_indices][best_df.loc[position_change_indices, 'Strategy_Returns'] > 0])
+        position_change_rows = best_df['Position_Change'] != 0
+        winning_trades = int((best_df['Strategy_Returns'][position_change_rows] > 0).sum())
         win_ratio = winning_trades / num_trades if num_trades > 0 else 0
         
         # Add to summary data
@@ -126,102 +122,143 @@ def save_summary_report(summary_df, output_dir='data/summary'):
             f.write(f"  Annual Return: {row['Annual Return (%)']:.2f}%\n")
             f.write(f"  Max Drawdown: {row['Max Drawdown (%)']:.2f}%\n")
             f.write(f"  Trades: {row['Number of Trades']} (Win Ratio: {row['Win Ratio (%)']:.2f}%)\n")
+            if 'Bootstrap p-value' in row:
+                f.write(f"  Sharpe p-values: bootstrap {row['Bootstrap p-value']:.3f}, "
+                        f"random entry {row['Random-Entry p-value']:.3f} (Deflated Sharpe: {row['Deflated Sharpe']:.3f})\n")
     
     print(f"Summary report saved to {report_file}")
     print(f"Summary CSV saved to {csv_file}")
     
     return report_file, csv_file
 
+def collect_trades(etf_results):
+    """
+    Closed trades of each ETF's best strategy
+    
+    Parameters:
+    -----------
+    etf_results : dict
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values,
+        where results maps strategy names to StrategyResult
+    
+    Returns:
+    --------
+    trades_df : pandas.DataFrame
+        One row per trade with ETF, Strategy (as categoricals), the trade
+        ledger columns and Duration (days)
+    """
+    frames = []
+    for etf, (results, best_strategy, _) in etf_results.items():
+        trades = extract_trades(results[best_strategy])
+        if len(trades):
+            frames.append(trades.assign(ETF=etf, Strategy=best_strategy))
+    
+    trades_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['ETF', 'Strategy'] + TRADE_COLUMNS)
+    trades_df = trades_df[['ETF', 'Strategy'] + TRADE_COLUMNS]
+    trades_df['Duration (days)'] = (pd.to_datetime(trades_df['Exit Date']) - pd.to_datetime(trades_df['Entry Date'])).dt.days
+    return categorize(trades_df, ['ETF', 'Strategy'])
+
+def _trade_stats(groups):
+    """Statistics rows from additive aggregates (counts, sums, extremes) of trade groups"""
+    return pd.DataFrame({
+        'Total Trades': groups['Trades'],
+        'Winning Trades': groups['Wins'],
+        'Losing Trades': groups['Losses'],
+        'Win Rate (%)': groups['Wins'] / groups['Trades'] * 100,
+        'Average PnL %': groups['PnL Sum'] / groups['Priced'],
+        'Best Trade %': groups['Best'],
+        'Worst Trade %': groups['Worst'],
+        'Average Duration (days)': groups['Duration Sum'] / groups['Trades']
+    })
+
+def trade_statistics(trades_df):
+    """
+    Trade statistics overall and by ETF, strategy and ETF category
+    
+    The trades are aggregated once per (ETF, Strategy) group into counts,
+    sums and extremes; the ETF, strategy, category and overall rows are
+    rolled up from those group aggregates, so the trades are scanned a
+    single time however many ETFs there are.
+    
+    Parameters:
+    -----------
+    trades_df : pandas.DataFrame
+        Trades as returned by collect_trades
+    
+    Returns:
+    --------
+    stats_df : pandas.DataFrame
+        Indexed by (Level, Group), Level being 'Overall', 'ETF', 'Strategy'
+        or 'Category', with trade counts, win rate, average, best and
+        worst PnL % and average duration; groups keep the order in which
+        they first appear
+    """
+    pnl = trades_df['PnL %'].astype(float)
+    # A trade opened in the undefined first week has no PnL: it counts as a trade but neither wins nor loses
+    groups = trades_df.assign(Win=pnl > 0, Loss=pnl <= 0, PnL=pnl).groupby(
+        ['ETF', 'Strategy'], sort=False, observed=True).agg(
+        **{'Trades': ('PnL', 'size'), 'Wins': ('Win', 'sum'), 'Losses': ('Loss', 'sum'), 'Priced': ('PnL', 'count'),
+           'PnL Sum': ('PnL', 'sum'), 'Best': ('PnL', 'max'), 'Worst': ('PnL', 'min'),
+           'Duration Sum': ('Duration (days)', 'sum')}).reset_index()
+    groups['ETF'] = groups['ETF'].astype(str)
+    groups['Strategy'] = groups['Strategy'].astype(str)
+    groups['Category'] = groups['ETF'].map(get_category)
+    
+    rollup = {'Trades': 'sum', 'Wins': 'sum', 'Losses': 'sum', 'Priced': 'sum', 'PnL Sum': 'sum', 'Best': 'max', 'Worst': 'min', 'Duration Sum': 'sum'}
+    levels = {'Overall': groups.assign(Overall='All').groupby('Overall', sort=False).agg(rollup)}
+    for level in ('ETF', 'Strategy', 'Category'):
+        levels[level] = groups.groupby(level, sort=False).agg(rollup)
+    stats_df = pd.concat({level: _trade_stats(level_groups) for level, level_groups in levels.items()},
+                         names=['Level', 'Group'])
+    return stats_df
+
+def _format_trade_stats(row, fields, indent=''):
+    """Report lines of one statistics row"""
+    lines = {
+        'trades': f"Total Trades: {row['Total Trades']:.0f}",
+        'wins': f"Winning Trades: {row['Winning Trades']:.0f} ({row['Win Rate (%)']:.2f}%)",
+        'losses': f"Losing Trades: {row['Losing Trades']:.0f} ({row['Losing Trades'] / row['Total Trades'] * 100:.2f}%)",
+        'pnl': f"Average PnL: {row['Average PnL %']:.2f}%",
+        'best': f"Best Trade: {row['Best Trade %']:.2f}%",
+        'worst': f"Worst Trade: {row['Worst Trade %']:.2f}%",
+        'duration': f"Average Duration: {row['Average Duration (days)']:.2f} days"
+    }
+    return ''.join(f"{indent}{lines[field]}\n" for field in fields)
+
 def generate_trade_logs_summary(etf_results, output_dir='data/summary'):
     """
     Generate a summary of trade logs across all ETFs
     
+    Writes every trade (all_trades_summary.csv), the statistics table of
+    trade_statistics (trade_statistics.csv) and the report text rendered
+    from that table (trade_statistics_report.txt).
+    
     Parameters:
     -----------
     etf_results : dict
-        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values,
+        where results maps strategy names to StrategyResult
     output_dir : str
         Directory to save the trade logs summary
     """
     # Create summary directory
     os.makedirs(output_dir, exist_ok=True)
     
-    # Collect all trade logs
-    all_trades = []
-    
-    for etf, (results, best_strategy, _) in etf_results.items():
-        # Get the index of the best strategy
-        strategy_index = {
-            'MACD': 0,
-            'MACD Zero-Cross': 1,
-            'VPVMA': 2,
-            'VPVMA Zero-Cross': 3
-        }[best_strategy]
-        
-        # Get the DataFrame for the best strategy
-        best_df = results[strategy_index]
-        
-        # Extract trade information
-        trades = []
-        position = 0
-        entry_price = 0
-        entry_date = None
-        
-        for date, row in best_df.iterrows():
-            if row['Position_Change'] != 0:
-                # Case 1: Opening a new position from neutral
-                if position == 0:
-                    position = row['Position']
-                    entry_price = row['Close']
-                    entry_date = date
-                # Case 2: Direct switch between long and short positions
-                elif (position == 1 and row['Position'] == -1) or (position == -1 and row['Position'] == 1):
-                    # Close current position
-                    exit_price = row['Close']
-                    pnl = position * (exit_price - entry_price) / entry_price * 100
-                    trades.append({
-                        'ETF': etf,
-                        'Strategy': best_strategy,
-                        'Entry Date': entry_date,
-                        'Exit Date': date,
-                        'Position': 'Long' if position == 1 else 'Short',
-                        'Entry Price': entry_price,
-                        'Exit Price': exit_price,
-                        'PnL %': pnl,
-                        'Duration (days)': (date - entry_date).days
-                    })
-                    # Open new position
-                    position = row['Position']
-                    entry_price = row['Close']
-                    entry_date = date
-                # Case 3: Closing a position to neutral
-                elif row['Position'] == 0:
-                    exit_price = row['Close']
-                    pnl = position * (exit_price - entry_price) / entry_price * 100
-                    trades.append({
-                        'ETF': etf,
-                        'Strategy': best_strategy,
-                        'Entry Date': entry_date,
-                        'Exit Date': date,
-                        'Position': 'Long' if position == 1 else 'Short',
-                        'Entry Price': entry_price,
-                        'Exit Price': exit_price,
-                        'PnL %': pnl,
-                        'Duration (days)': (date - entry_date).days
-                    })
-                    position = 0
-        
-        all_trades.extend(trades)
-    
-    # Create DataFrame with all trades
-    trades_df = pd.DataFrame(all_trades)
-    
-    # Save to CSV
+    trades_df = collect_trades(etf_results)
     csv_file = os.path.join(output_dir, 'all_trades_summary.csv')
     trades_df.to_csv(csv_file, index=False)
     
+    stats_df = trade_statistics(trades_df)
+    stats_file = os.path.join(output_dir, 'trade_statistics.csv')
+    stats_df.to_csv(stats_file)
+    
     # Generate trade statistics report
     report_file = os.path.join(output_dir, 'trade_statistics_report.txt')
+    sections = [
+        ('ETF', 'Trade Statistics by ETF', ['trades', 'wins', 'pnl', 'best', 'worst']),
+        ('Strategy', 'Trade Statistics by Strategy', ['trades', 'wins', 'pnl', 'duration']),
+        ('Category', 'Trade Statistics by Category', ['trades', 'wins', 'pnl', 'best', 'worst', 'duration'])
+    ]
     
     with open(report_file, 'w') as f:
         f.write("Trade Statistics Summary Report\n")
@@ -230,34 +267,21 @@ def generate_trade_logs_summary(etf_results, output_dir='data/summary'):
         
         f.write("Overall Trade Statistics:\n")
         f.write("-" * 50 + "\n")
-        f.write(f"Total Trades: {len(trades_df)}\n")
-        f.write(f"Winning Trades: {len(trades_df[trades_df['PnL %'] > 0])} ({len(trades_df[trades_df['PnL %'] > 0])/len(trades_df)*100:.2f}%)\n")
-        f.write(f"Losing Trades: {len(trades_df[trades_df['PnL %'] <= 0])} ({len(trades_df[trades_df['PnL %'] <= 0])/len(trades_df)*100:.2f}%)\n")
-        f.write(f"Average PnL: {trades_df['PnL %'].mean():.2f}%\n")
-        f.write(f"Average Duration: {trades_df['Duration (days)'].mean():.2f} days\n")
-        
-        f.write("\nTrade Statistics by ETF:\n")
-        f.write("-" * 50 + "\n")
-        for etf in trades_df['ETF'].unique():
-            etf_trades = trades_df[trades_df['ETF'] == etf]
-            f.write(f"\n{etf}:\n")
-            f.write(f"  Total Trades: {len(etf_trades)}\n")
-            f.write(f"  Winning Trades: {len(etf_trades[etf_trades['PnL %'] > 0])} ({len(etf_trades[etf_trades['PnL %'] > 0])/len(etf_trades)*100:.2f}%)\n")
-            f.write(f"  Average PnL: {etf_trades['PnL %'].mean():.2f}%\n")
-            f.write(f"  Best Trade: {etf_trades['PnL %'].max():.2f}%\n")
-            f.write(f"  Worst Trade: {etf_trades['PnL %'].min():.2f}%\n")
+        if 'Overall' in stats_df.index:
+            f.write(_format_trade_stats(stats_df.loc[('Overall', 'All')], ['trades', 'wins', 'losses', 'pnl', 'duration']))
+        else:
+            f.write("Total Trades: 0\n")
         
-        f.write("\nTrade Statistics by Strategy:\n")
-        f.write("-" * 50 + "\n")
-        for strategy in trades_df['Strategy'].unique():
-            strategy_trades = trades_df[trades_df['Strategy'] == strategy]
-            f.write(f"\n{strategy}:\n")
-            f.write(f"  Total Trades: {len(strategy_trades)}\n")
-            f.write(f"  Winning Trades: {len(strategy_trades[strategy_trades['PnL %'] > 0])} ({len(strategy_trades[strategy_trades['PnL %'] > 0])/len(strategy_trades)*100:.2f}%)\n")
-            f.write(f"  Average PnL: {strategy_trades['PnL %'].mean():.2f}%\n")
-            f.write(f"  Average Duration: {strategy_trades['Duration (days)'].mean():.2f} days\n")
+        for level, title, fields in sections:
+            f.write(f"\n{title}:\n")
+            f.write("-" * 50 + "\n")
+            if level in stats_df.index:
+                for group, row in stats_df.loc[level].iterrows():
+                    f.write(f"\n{group}:\n")
+                    f.write(_format_trade_stats(row, fields, indent='  '))
     
     print(f"Trade statistics report saved to {report_file}")
+    print(f"Trade statistics table saved to {stats_file}")
     print(f"All trades summary saved to {csv_file}")
     
-    return report_file, csv_file 
\ No newline at end of file
+    return report_file, csv_file
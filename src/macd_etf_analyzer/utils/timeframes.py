@@ -0,0 +1,87 @@
+import os
+import pandas as pd
+from ..data.bars import periods_per_year, resample_timeframes, to_market_time
+from ..strategies.features import FeatureStore
+from ..strategies.result import STRATEGY_NAMES
+from .performance import performance_values
+from .scheduler import get_scheduler
+from .walk_forward import run_strategy
+
+# Bar frequencies evaluated by default: daily, weekly and monthly
+DEFAULT_TIMEFRAMES = ('D', 'W', 'ME')
+
+def _evaluate(strategy, bars, vix_bars, annualization, **kwargs):
+    """Performance values of one strategy on one timeframe's bars"""
+    return performance_values(run_strategy(strategy, bars, vix_bars, **kwargs), annualization)
+
+def run_timeframes(frames, vix_df=None, freqs=DEFAULT_TIMEFRAMES, strategies=None, scheduler=None, **kwargs):
+    """
+    Evaluate every strategy of many ETFs on several bar frequencies
+
+    All timeframes are aggregated from the daily bars in one pass
+    (resample_timeframes) and every (timeframe, ETF, strategy) run is a
+    task on the scheduler's CPU lane; the strategies of one (timeframe,
+    ETF) share a FeatureStore of its bars. The strategies run unchanged on
+    each timeframe's bars (the signal lag and stop loss act per bar) and
+    Sharpe ratios are annualized with the timeframe's bars per year.
+
+    Parameters:
+    -----------
+    frames : dict
+        ETF symbol -> daily OHLCV bars
+    vix_df : pandas.DataFrame, optional
+        Daily VIX bars (required for the VPVMA strategies)
+    freqs : sequence of str
+        Bar frequencies ('D', 'W', 'ME', ...)
+    strategies : list of str, optional
+        Strategies to run; defaults to all (only MACD ones without vix_df)
+    scheduler : Scheduler, optional
+        Defaults to the process-wide scheduler
+    **kwargs :
+        Strategy options (initial_capital, stop_loss_pct, cost_models, ...)
+
+    Returns:
+    --------
+    timeframe_df : pandas.DataFrame
+        One row per (Timeframe, ETF, Strategy) with the number of bars,
+        the bars per year and the performance values
+    """
+    scheduler = scheduler or get_scheduler()
+    strategies = strategies or [s for s in STRATEGY_NAMES if vix_df is not None or not s.startswith('VPVMA')]
+    daily = {symbol: to_market_time(df) for symbol, df in frames.items()}
+    if vix_df is not None:
+        daily['^VIX'] = to_market_time(vix_df)
+    bars = resample_timeframes(daily, freqs)
+
+    tasks = []
+    for freq in freqs:
+        annualization = periods_per_year(freq)
+        vix_bars = bars[freq]['^VIX'][['Close']] if vix_df is not None else None
+        for symbol in frames:
+            symbol_bars = bars[freq][symbol]
+            features = FeatureStore(symbol_bars, vix_bars)
+            for strategy in strategies:
+                task = scheduler.submit('cpu', _evaluate, strategy, symbol_bars, vix_bars, annualization,
+                                        features=features, **kwargs)
+                tasks.append(({'Timeframe': freq, 'ETF': symbol, 'Strategy': strategy, 'Bars': len(symbol_bars),
+                               'Periods Per Year': annualization}, task))
+
+    rows = [{**row, **task.result()} for row, task in tasks]
+    return pd.DataFrame(rows).set_index(['Timeframe', 'ETF', 'Strategy'])
+
+def generate_timeframe_report(symbol, df, vix_df=None, freqs=DEFAULT_TIMEFRAMES, **kwargs):
+    """
+    Evaluate the strategies of one ETF on several bar frequencies and save the table
+
+    Results go to data/<symbol>/timeframe_comparison.csv; see run_timeframes
+    for the parameters.
+    """
+    ticker_dir = os.path.join('data', symbol.replace('^', ''))
+    os.makedirs(ticker_dir, exist_ok=True)
+
+    timeframe_df = run_timeframes({symbol: df}, vix_df, freqs, **kwargs)
+    timeframe_df.to_csv(os.path.join(ticker_dir, 'timeframe_comparison.csv'))
+    print(f"{symbol} Sharpe ratio by timeframe:")
+    sharpe = timeframe_df['Sharpe Ratio'].unstack('Strategy').reindex(list(freqs), level='Timeframe')
+    print(sharpe.round(2).to_string())
+    return timeframe_df
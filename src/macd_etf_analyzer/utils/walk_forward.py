@@ -0,0 +1,217 @@
+import os
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from ..data.bars import resample_weekly, resample_weekly_close
+from ..strategies import macd, vpvma  # register the built-in strategies
+from ..strategies.features import FeatureStore
+from ..strategies.registry import run_registered
+from .position_manager import apply_stop_loss_batch, calculate_strategy_returns_batch
+
+PARAMETER_GRIDS = {
+    'MACD': {'fast_span': [8, 12, 16], 'slow_span': [21, 26, 34], 'signal_span': [6, 9, 12],
+             'stop_loss_pct': [0.03, 0.05, 0.10]},
+    'MACD Zero-Cross': {'fast_span': [8, 12, 16], 'slow_span': [21, 26, 34], 'signal_span': [6, 9, 12],
+                        'stop_loss_pct': [0.03, 0.05, 0.10]},
+    'VPVMA': {'window': [8, 12, 16], 'signal_window': [20, 26, 34], 'stop_loss_pct': [0.03, 0.05, 0.10]},
+    'VPVMA Zero-Cross': {'window': [8, 12, 16], 'signal_window': [20, 26, 34], 'stop_loss_pct': [0.03, 0.05, 0.10]}
+}
+
+# Feature kind -> grid parameters whose values are its arguments, prefetched for a whole sweep in one batched call
+SWEEP_FEATURES = {'ema': ('fast_span', 'slow_span'), 'vpvma_line': ('window',)}
+
+# Weekly bars shared by all folds of a worker process (set once by _init_worker)
+_WEEKLY = {}
+
+def _init_worker(weekly_df, weekly_vix):
+    """Keep the precomputed weekly bars in the worker for every fold"""
+    _WEEKLY['bars'] = weekly_df
+    _WEEKLY['vix'] = weekly_vix
+
+def run_strategy(strategy, weekly_df, weekly_vix, features=None, **params):
+    """Run a registered strategy on weekly bars with the given parameters (features: their shared FeatureStore)"""
+    return run_registered(strategy, weekly_df, weekly_vix, features=features, **params)
+
+def _sharpe(returns, periods_per_year=52):
+    """Annualized Sharpe ratio of periodic returns"""
+    return np.sqrt(periods_per_year) * returns.mean() / returns.std() if returns.std() != 0 else 0
+
+def walk_forward_folds(n_weeks, train_weeks=260, test_weeks=52):
+    """
+    Rolling (train, test) windows over a weekly history
+
+    Returns:
+    --------
+    folds : list of tuple
+        (train_start, train_end, test_end) positions; the test window
+        is [train_end, test_end)
+    """
+    folds = []
+    train_start = 0
+    while train_start + train_weeks < n_weeks:
+        train_end = train_start + train_weeks
+        folds.append((train_start, train_end, min(train_end + test_weeks, n_weeks)))
+        train_start += test_weeks
+    return folds
+
+def search_grid(strategy, history, weekly_vix, grid, train_start=0, features=None, periods_per_year=52):
+    """
+    Best parameters of a strategy on the train window [train_start, len(history)) of its history
+
+    Indicators are computed on the whole history, so the train window is
+    scored with warmed-up indicators and no look-ahead. Every grid point
+    shares one FeatureStore of the history, whose EMAs (or VPVMA rolling
+    means) of all the sweep's spans are computed up front in one batched
+    kernel call (SWEEP_FEATURES). Stop loss thresholds are scored together
+    in one batched pass.
+
+    Returns:
+    --------
+    best_params : dict
+        Indicator parameters and stop_loss_pct of the best train Sharpe
+    best_sharpe : float
+        Its annualized train Sharpe ratio
+    """
+    features = features if features is not None else FeatureStore(history, weekly_vix)
+    for kind, names in SWEEP_FEATURES.items():
+        values = sorted({value for name in names for value in grid.get(name, [])})
+        if values:
+            features.prefetch(kind, [(value,) for value in values])
+    indicator_grid = {name: values for name, values in grid.items() if name != 'stop_loss_pct'}
+    stops = np.asarray(grid.get('stop_loss_pct', [0.05]), dtype=float)
+    best_params, best_sharpe = None, -np.inf
+    for values in itertools.product(*indicator_grid.values()):
+        params = dict(zip(indicator_grid, values))
+        df = run_strategy(strategy, history, weekly_vix, features=features, stop_loss_pct=stops[0], **params)
+        positions, closes = apply_stop_loss_batch(df['Signal_Position'], df['Raw_Close'], df['Low'], df['High'], stops)
+        train_returns = calculate_strategy_returns_batch(positions, closes)[:, train_start:]
+        mean_returns = train_returns.mean(axis=1)
+        std_returns = train_returns.std(axis=1, ddof=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpes = np.where(std_returns != 0, np.sqrt(periods_per_year) * mean_returns / std_returns, 0)
+        best = int(np.argmax(sharpes))
+        if sharpes[best] > best_sharpe:
+            best_params, best_sharpe = {**params, 'stop_loss_pct': float(stops[best])}, float(sharpes[best])
+    return best_params, best_sharpe
+
+def _run_fold(strategy, fold, grid, periods_per_year=52):
+    """Optimize on the train window and evaluate on the following test window"""
+    weekly_df, weekly_vix = _WEEKLY['bars'], _WEEKLY['vix']
+    train_start, train_end, test_end = fold
+
+    best_params, best_sharpe = search_grid(strategy, weekly_df.iloc[:train_end], weekly_vix, grid, train_start,
+                                           periods_per_year=periods_per_year)
+
+    test_df = run_strategy(strategy, weekly_df.iloc[:test_end], weekly_vix, **best_params)
+    test_returns = test_df['Strategy_Returns'].iloc[train_end:]
+
+    fold_info = {
+        'Train Start': weekly_df.index[train_start],
+        'Train End': weekly_df.index[train_end - 1],
+        'Test Start': weekly_df.index[train_end],
+        'Test End': weekly_df.index[test_end - 1],
+        'Train Sharpe': best_sharpe,
+        'Test Sharpe': _sharpe(test_returns, periods_per_year),
+        **best_params
+    }
+    return fold_info, test_returns
+
+def run_walk_forward(weekly_df, weekly_vix=None, strategy='MACD', grid=None, train_weeks=260, test_weeks=52,
+                     max_workers=None, initial_capital=1_000_000, periods_per_year=52):
+    """
+    Walk-forward optimization of one strategy over weekly bars
+
+    Folds are scheduled on a process pool; each worker receives the
+    weekly bars once at start-up and reuses them for every fold.
+
+    Parameters:
+    -----------
+    weekly_df : pandas.DataFrame
+        Weekly OHLCV bars
+    weekly_vix : pandas.DataFrame, optional
+        Weekly VIX bars (required for the VPVMA strategies)
+    strategy : str
+        Strategy name ('MACD', 'MACD Zero-Cross', 'VPVMA', 'VPVMA Zero-Cross')
+    grid : dict, optional
+        Parameter name -> candidate values; defaults to PARAMETER_GRIDS
+    train_weeks, test_weeks : int
+        Length of the train and test windows (the window rolls by test_weeks)
+    max_workers : int, optional
+        Number of worker processes
+    initial_capital : float
+        Starting value of the stitched out-of-sample equity curve
+    periods_per_year : int
+        Bars per year annualizing the Sharpe ratios (52 for weekly bars)
+
+    Returns:
+    --------
+    oos_df : pandas.DataFrame
+        Stitched out-of-sample Strategy_Returns and Portfolio_Value
+    folds_df : pandas.DataFrame
+        Chosen parameters and train/test Sharpe per fold
+    """
+    grid = grid or PARAMETER_GRIDS[strategy]
+    folds = walk_forward_folds(len(weekly_df), train_weeks, test_weeks)
+    if not folds:
+        raise ValueError(f"Need more than {train_weeks} weeks of history, got {len(weekly_df)}")
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(weekly_df, weekly_vix)) as executor:
+        futures = [executor.submit(_run_fold, strategy, fold, grid, periods_per_year) for fold in folds]
+        fold_results = [future.result() for future in futures]
+
+    folds_df = pd.DataFrame([info for info, _ in fold_results])
+    oos_returns = pd.concat([returns for _, returns in fold_results])
+    oos_df = pd.DataFrame({
+        'Strategy_Returns': oos_returns,
+        'Portfolio_Value': initial_capital * (1 + oos_returns).cumprod()
+    })
+    return oos_df, folds_df
+
+def generate_walk_forward_report(symbol, df, vix_df=None, strategies=None, train_weeks=260, test_weeks=52, max_workers=None):
+    """
+    Walk-forward every strategy of one ETF and save the results
+
+    The daily bars are resampled to weekly bars once and shared by all
+    strategies and folds.
+
+    Parameters:
+    -----------
+    symbol : str
+        ETF symbol (results go to data/<symbol>)
+    df : pandas.DataFrame
+        Daily OHLCV bars
+    vix_df : pandas.DataFrame, optional
+        Daily VIX bars (required for the VPVMA strategies)
+    strategies : list of str, optional
+        Strategies to run; defaults to all in PARAMETER_GRIDS
+    train_weeks, test_weeks : int
+        Length of the train and test windows
+    max_workers : int, optional
+        Number of worker processes
+
+    Returns:
+    --------
+    summary : dict
+        Strategy name -> (oos_df, folds_df)
+    """
+    ticker_dir = os.path.join('data', symbol.replace('^', ''))
+    os.makedirs(ticker_dir, exist_ok=True)
+
+    weekly_df = resample_weekly(df)
+    weekly_vix = resample_weekly_close(vix_df) if vix_df is not None else None
+    strategies = strategies or [s for s in PARAMETER_GRIDS if weekly_vix is not None or not s.startswith('VPVMA')]
+
+    summary = {}
+    for strategy in strategies:
+        oos_df, folds_df = run_walk_forward(weekly_df, weekly_vix, strategy, train_weeks=train_weeks,
+                                            test_weeks=test_weeks, max_workers=max_workers)
+        file_name = strategy.replace(' ', '_')
+        oos_df.to_csv(os.path.join(ticker_dir, f'walk_forward_equity_{file_name}.csv'))
+        folds_df.to_csv(os.path.join(ticker_dir, f'walk_forward_folds_{file_name}.csv'), index=False)
+        summary[strategy] = (oos_df, folds_df)
+        print(f"{symbol} {strategy} walk-forward: out-of-sample Sharpe {_sharpe(oos_df['Strategy_Returns']):.2f} "
+              f"over {len(folds_df)} folds")
+
+    return summary
@@ -0,0 +1,54 @@
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy.cluster.hierarchy import dendrogram
+
+def plot_clustered_correlation(corr, link, output_file='data/summary/return_correlation_heatmap.png', max_labels=60):
+    """
+    Plot a correlation matrix in cluster order with its dendrogram
+
+    The matrix is drawn as one image (not one patch per cell), so it
+    stays cheap for thousands of return streams; stream labels are only
+    drawn up to max_labels.
+
+    Parameters:
+    -----------
+    corr : pandas.DataFrame
+        Correlation matrix in the leaf order of link (see
+        utils.correlation.generate_correlation_report)
+    link : numpy.ndarray
+        scipy linkage matrix of the clustering
+    output_file : str
+        Image file to write
+    max_labels : int
+        Largest number of streams whose labels are drawn
+    """
+    n = len(corr)
+    labels = [' '.join(map(str, label)) if isinstance(label, tuple) else str(label) for label in corr.index]
+    fig, (ax_tree, ax_heat) = plt.subplots(1, 2, figsize=(16, 12), width_ratios=[1, 5])
+
+    if len(link):
+        dendrogram(link, orientation='left', no_labels=True, ax=ax_tree, color_threshold=0,
+                   above_threshold_color='gray')
+        # Leaves run bottom-up in the dendrogram and top-down in the image
+        ax_tree.set_ylim(10 * n, 0)
+    ax_tree.axis('off')
+
+    image = ax_heat.imshow(np.ma.masked_invalid(corr.to_numpy(dtype=float)), cmap='RdBu_r', vmin=-1, vmax=1,
+                           interpolation='nearest', aspect='auto')
+    if n <= max_labels:
+        ax_heat.set_xticks(range(n))
+        ax_heat.set_xticklabels(labels, rotation=90, fontsize=7)
+        ax_heat.set_yticks(range(n))
+        ax_heat.set_yticklabels(labels, fontsize=7)
+    else:
+        ax_heat.set_xticks([])
+        ax_heat.set_yticks([])
+    ax_heat.set_title(f'Strategy Return Correlation ({n} streams, clustered)', fontsize=14)
+    fig.colorbar(image, ax=ax_heat, fraction=0.04, label='Correlation')
+
+    plt.tight_layout()
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    plt.savefig(output_file, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    print(f"Correlation heatmap saved to {output_file}")
@@ -0,0 +1,262 @@
+import os
+import json
+import base64
+import numpy as np
+import pandas as pd
+from .downsample import minmax_indices
+from ..strategies.result import STRATEGY_NAMES
+from ..utils.performance import trade_path
+
+_NS_PER_DAY = 86_400_000_000_000
+
+def _pack(values, dtype):
+    """Encode an array as a base64 little-endian typed-array blob"""
+    array = np.ascontiguousarray(np.asarray(values), dtype=np.dtype(dtype).newbyteorder('<'))
+    return {'dtype': np.dtype(dtype).str.lstrip('<|'), 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+
+def _epoch_days(index):
+    """Convert a DatetimeIndex to int32 days since 1970-01-01"""
+    return (pd.DatetimeIndex(index).asi8 // _NS_PER_DAY).astype(np.int32)
+
+def _pack_summary(summary_df):
+    """Serialize the summary table column by column"""
+    columns = []
+    for name in summary_df.columns:
+        series = summary_df[name]
+        if pd.api.types.is_integer_dtype(series):
+            columns.append({'name': name, 'values': _pack(series, np.int32)})
+        elif pd.api.types.is_float_dtype(series):
+            columns.append({'name': name, 'values': _pack(series, np.float32)})
+        else:
+            columns.append({'name': name, 'values': series.astype(str).tolist()})
+    return columns
+
+def _pack_curves(strategy_frames, origin, max_points):
+    """Downsample and serialize the equity curves (growth of $1) of one ETF"""
+    n_buckets = max(max_points // 4, 1)
+    curves = {}
+    for name in STRATEGY_NAMES:
+        df = strategy_frames[name]
+        value = df['Portfolio_Value'].to_numpy(dtype=float)
+        value = value / value[0]
+        keep = minmax_indices(value, n_buckets)
+        curves[name] = {
+            't': _pack(_epoch_days(df.index[keep]) - origin, np.uint16),
+            'v': _pack(value[keep], np.float32)
+        }
+    return curves
+
+def _pack_trades(strategy_frames, origin):
+    """Serialize the trade ledgers of one ETF as columnar typed arrays"""
+    ledgers = {}
+    for name in STRATEGY_NAMES:
+        df = strategy_frames[name]
+        # The ledger of extract_trades, run on day offsets rather than Timestamps
+        days = _epoch_days(df.index) - origin
+        trades, _ = trade_path(days, df['Position_Change'].to_numpy(), df['Position'].to_numpy(),
+                               df['Close'].to_numpy())
+        trades = [trade for trade in trades if not np.isnan(trade['PnL %'])]
+        column = lambda key: [trade[key] for trade in trades]
+        ledgers[name] = {
+            'entry': _pack(column('Entry Date'), np.uint16),
+            'exit': _pack(column('Exit Date'), np.uint16),
+            'side': _pack([1 if side == 'Long' else -1 for side in column('Position')], np.int8),
+            'entry_price': _pack(column('Entry Price'), np.float32),
+            'exit_price': _pack(column('Exit Price'), np.float32)
+        }
+    return ledgers
+
+def decode_blob(blob):
+    """Decode a typed-array blob written by the dashboard (as the page's decode())"""
+    return np.frombuffer(base64.b64decode(blob['data']), dtype=np.dtype(blob['dtype']).newbyteorder('<'))
+
+def build_dashboard_payload(etf_results, summary_df, max_points=200):
+    """
+    Build the compact JSON payload rendered by the dashboard
+
+    Parameters:
+    -----------
+    etf_results : dict
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values
+    summary_df : pandas.DataFrame
+        DataFrame with summary statistics for all ETFs
+    max_points : int
+        Upper bound on the number of points kept per equity curve
+
+    Returns:
+    --------
+    payload : dict
+        JSON-serializable payload with base64 typed-array blobs
+    """
+    etfs = {}
+    for etf, (results, best_strategy, _) in etf_results.items():
+        # Dates are stored as uint16 day offsets from each ETF's first bar
+        origin = int(_epoch_days(results[STRATEGY_NAMES[0]].index[:1])[0])
+        etfs[etf] = {
+            'best': best_strategy,
+            'origin': origin,
+            'curves': _pack_curves(results, origin, max_points),
+            'trades': _pack_trades(results, origin)
+        }
+
+    return {
+        'strategies': STRATEGY_NAMES,
+        'summary': _pack_summary(summary_df),
+        'etfs': etfs
+    }
+
+def generate_dashboard(etf_results, summary_df, output_file='data/summary/dashboard.html', max_points=200):
+    """
+    Write a self-contained HTML dashboard for all ETFs
+
+    The summary table, downsampled equity curves and trade ledgers are
+    embedded as compact typed-array JSON and rendered client-side, so
+    the file opens from disk without a server.
+
+    Parameters:
+    -----------
+    etf_results : dict
+        Dictionary with ETF symbols as keys and (results, best_strategy, sharpe_ratios) as values
+    summary_df : pandas.DataFrame
+        DataFrame with summary statistics for all ETFs
+    output_file : str
+        Path of the HTML file to write
+    max_points : int
+        Upper bound on the number of points kept per equity curve
+
+    Returns:
+    --------
+    output_file : str
+        Path of the written dashboard
+    """
+    payload = build_dashboard_payload(etf_results, summary_df, max_points)
+    # Escape "</" so the payload cannot terminate the script tag
+    payload_json = json.dumps(payload, separators=(',', ':')).replace('</', '<\\/')
+
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    with open(output_file, 'w') as f:
+        f.write(_TEMPLATE.replace('__PAYLOAD__', payload_json))
+
+    print(f"Dashboard saved to {output_file}")
+    return output_file
+
+_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>ETF Strategy Dashboard</title>
+<style>
+body { font-family: sans-serif; margin: 0; display: flex; height: 100vh; }
+#left { width: 45%; overflow: auto; border-right: 1px solid #ccc; }
+#right { flex: 1; overflow: auto; padding: 8px; }
+table { border-collapse: collapse; width: 100%; font-size: 12px; }
+th, td { padding: 3px 6px; border-bottom: 1px solid #eee; text-align: right; white-space: nowrap; }
+th { position: sticky; top: 0; background: #f4f4f4; cursor: pointer; }
+td:first-child, th:first-child { text-align: left; }
+tr.sel { background: #dde8ff; }
+#filter { width: 95%; margin: 6px; }
+canvas { width: 100%; height: 320px; }
+.legend span { margin-right: 12px; font-size: 12px; }
+</style>
+</head>
+<body>
+<div id="left"><input id="filter" placeholder="Filter ETFs..."><table id="summary"></table></div>
+<div id="right"><h3 id="title">Select an ETF</h3><div class="legend" id="legend"></div>
+<canvas id="chart" width="1000" height="320"></canvas>
+<select id="strategy"></select><table id="trades"></table></div>
+<script type="application/json" id="payload">__PAYLOAD__</script>
+<script>
+const P = JSON.parse(document.getElementById('payload').textContent);
+const TYPES = {f4: Float32Array, i4: Int32Array, u2: Uint16Array, i1: Int8Array};
+function decode(blob) {
+  const bin = atob(blob.data), bytes = new Uint8Array(bin.length);
+  for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+  return new TYPES[blob.dtype](bytes.buffer);
+}
+function day(d) { return new Date(d * 86400000).toISOString().slice(0, 10); }
+const COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728'];
+const cols = P.summary.map(c => ({name: c.name, values: Array.isArray(c.values) ? c.values : Array.from(decode(c.values))}));
+const nRows = cols.length ? cols[0].values.length : 0;
+let order = [...Array(nRows).keys()], sortCol = -1, sortAsc = true, current = null;
+
+// Data strings (symbols, strategies) only ever go through textContent, never innerHTML
+function el(tag, text, attrs) {
+  const node = document.createElement(tag);
+  if (text !== undefined) node.textContent = text;
+  for (const [k, v] of Object.entries(attrs || {})) node.setAttribute(k, v);
+  return node;
+}
+function row(tag, cells, attrs) {
+  const tr = el('tr', undefined, attrs);
+  cells.forEach((text, i) => tr.appendChild(el(tag, text, tag === 'th' ? {'data-i': i} : {})));
+  return tr;
+}
+function renderSummary() {
+  const q = document.getElementById('filter').value.toUpperCase();
+  const fmt = v => typeof v === 'number' ? String(Number.isInteger(v) ? v : v.toFixed(2)) : String(v);
+  const table = document.getElementById('summary');
+  table.replaceChildren(row('th', cols.map(c => c.name)));
+  for (const r of order) {
+    const etf = String(cols[0].values[r]);
+    if (q && !etf.toUpperCase().includes(q)) continue;
+    const tr = row('td', cols.map(c => fmt(c.values[r])));
+    tr.dataset.etf = etf;
+    if (etf === current) tr.className = 'sel';
+    table.appendChild(tr);
+  }
+}
+document.getElementById('summary').addEventListener('click', e => {
+  const th = e.target.closest('th'), tr = e.target.closest('tr[data-etf]');
+  if (th) {
+    const i = +th.dataset.i;
+    sortAsc = sortCol === i ? !sortAsc : true; sortCol = i;
+    const v = cols[i].values;
+    order.sort((a, b) => (v[a] < v[b] ? -1 : v[a] > v[b] ? 1 : 0) * (sortAsc ? 1 : -1));
+    renderSummary();
+  } else if (tr) { current = tr.dataset.etf; renderSummary(); showEtf(current); }
+});
+document.getElementById('filter').addEventListener('input', renderSummary);
+
+function drawChart(etf) {
+  const c = document.getElementById('chart'), g = c.getContext('2d');
+  const ts = P.strategies.map(s => decode(etf.curves[s].t)), series = P.strategies.map(s => decode(etf.curves[s].v));
+  g.clearRect(0, 0, c.width, c.height);
+  let lo = Infinity, hi = -Infinity, t1 = 1;
+  for (const s of series) for (const v of s) { if (v < lo) lo = v; if (v > hi) hi = v; }
+  for (const t of ts) t1 = Math.max(t1, t[t.length - 1]);
+  const pad = 40, x = d => pad + d / t1 * (c.width - 2 * pad);
+  const y = v => c.height - pad - (v - lo) / Math.max(hi - lo, 1e-9) * (c.height - 2 * pad);
+  g.strokeStyle = '#999'; g.strokeRect(pad, pad, c.width - 2 * pad, c.height - 2 * pad);
+  g.fillStyle = '#333'; g.font = '11px sans-serif';
+  g.fillText(hi.toFixed(2), 2, pad + 4); g.fillText(lo.toFixed(2), 2, c.height - pad);
+  g.fillText(day(etf.origin), pad, c.height - pad + 14); g.fillText(day(etf.origin + t1), c.width - pad - 60, c.height - pad + 14);
+  series.forEach((s, k) => {
+    const t = ts[k]; g.strokeStyle = COLORS[k]; g.beginPath();
+    for (let i = 0; i < s.length; i++) i ? g.lineTo(x(t[i]), y(s[i])) : g.moveTo(x(t[i]), y(s[i]));
+    g.stroke();
+  });
+  document.getElementById('legend').replaceChildren(...P.strategies.map((s, k) => el('span', '\\u25a0 ' + s, {style: 'color:' + COLORS[k]})));
+}
+function drawTrades(etf, strategy) {
+  const L = etf.trades[strategy], e = decode(L.entry), x = decode(L.exit), side = decode(L.side);
+  const ep = decode(L.entry_price), xp = decode(L.exit_price), o = etf.origin;
+  const table = document.getElementById('trades');
+  table.replaceChildren(row('th', ['Entry Date', 'Exit Date', 'Position', 'Entry Price', 'Exit Price', 'PnL %']));
+  for (let i = 0; i < e.length; i++)
+    table.appendChild(row('td', [day(o + e[i]), day(o + x[i]), side[i] > 0 ? 'Long' : 'Short', ep[i].toFixed(2),
+                                 xp[i].toFixed(2), (side[i] * (xp[i] - ep[i]) / ep[i] * 100).toFixed(2)]));
+}
+function showEtf(name) {
+  const etf = P.etfs[name]; if (!etf) return;
+  document.getElementById('title').textContent = `${name} (best: ${etf.best})`;
+  const sel = document.getElementById('strategy');
+  sel.replaceChildren(...P.strategies.map(s => el('option', s)));
+  sel.value = etf.best;
+  sel.onchange = () => drawTrades(etf, sel.value);
+  drawChart(etf); drawTrades(etf, etf.best);
+}
+renderSummary();
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,174 @@
+import numpy as np
+import matplotlib as mpl
+import matplotlib.dates as mdates
+from matplotlib.collections import PolyCollection
+
+def output_dpi(fig):
+    """
+    Resolution a figure is rendered at
+
+    The larger of the figure's own dpi (screen) and savefig.dpi (saved
+    images), so buckets are fine enough for either output.
+    """
+    savefig_dpi = mpl.rcParams['savefig.dpi']
+    return max(fig.dpi, fig.dpi if savefig_dpi == 'figure' else float(savefig_dpi))
+
+def target_buckets(ax, dpi=None):
+    """
+    Number of horizontal pixels available to an axes in the output
+
+    Each pixel column becomes one downsampling bucket, so the rendered
+    line is indistinguishable from the full-resolution one. The axes
+    width is measured in inches and converted at the output resolution,
+    not at the figure's screen dpi, so a figure saved at a higher dpi
+    gets as many buckets as it has pixel columns.
+
+    Parameters:
+    -----------
+    ax : matplotlib.axes.Axes
+        Axes the series will be drawn on
+    dpi : float, optional
+        Output resolution (default: output_dpi of the axes' figure)
+
+    Returns:
+    --------
+    n_buckets : int
+        Width of the axes in output pixels
+    """
+    fig = ax.figure
+    width_inches = ax.get_window_extent().width / fig.dpi
+    return max(int(width_inches * (dpi or output_dpi(fig))), 1)
+
+def minmax_indices(values, n_buckets):
+    """
+    Shape-preserving (first/min/max/last per bucket) downsampling indices
+
+    The series is split into ``n_buckets`` equal-sized buckets and, for
+    each bucket, the positions of its first, lowest, highest and last
+    points are kept. Drawing those points reproduces the rasterized line
+    exactly, including spikes that a plain stride would drop. Buckets
+    containing a NaN also keep the position of their first NaN, so
+    broken lines stay broken.
+
+    Parameters:
+    -----------
+    values : array-like
+        1-D series to downsample
+    n_buckets : int
+        Number of buckets (usually the axes width in pixels)
+
+    Returns:
+    --------
+    indices : numpy.ndarray
+        Sorted unique positions into ``values`` to keep
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n_buckets <= 0 or n <= 4 * n_buckets:
+        return np.arange(n)
+
+    size = int(np.ceil(n / n_buckets))
+    n_buckets = int(np.ceil(n / size))
+
+    # Pad to a (buckets x size) block so all reductions are one call each
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(n_buckets, size)
+    missing = np.isnan(blocks)
+
+    offsets = np.arange(n_buckets) * size
+    lows = np.where(missing, np.inf, blocks).argmin(axis=1) + offsets
+    highs = np.where(missing, -np.inf, blocks).argmax(axis=1) + offsets
+    lasts = np.minimum(offsets + size - 1, n - 1)
+    # First NaN of each bucket with one (the padding of the last bucket is dropped below)
+    gaps = (missing.argmax(axis=1) + offsets)[missing.any(axis=1)]
+
+    indices = np.unique(np.concatenate([offsets, lows, highs, lasts, gaps]))
+    return indices[indices < n]
+
+def downsample(x, y, ax=None, n_buckets=None, dpi=None):
+    """
+    Downsample a series for plotting on a given axes
+
+    Parameters:
+    -----------
+    x : array-like or pandas.Index
+        X values (e.g. a DatetimeIndex)
+    y : array-like or pandas.Series
+        Y values aligned with ``x``
+    ax : matplotlib.axes.Axes, optional
+        Axes used to derive the bucket count from its pixel width
+    n_buckets : int, optional
+        Explicit bucket count, overrides ``ax``
+    dpi : float, optional
+        Output resolution used with ``ax`` (see target_buckets)
+
+    Returns:
+    --------
+    x_ds : same type as ``x``
+        Downsampled x values
+    y_ds : numpy.ndarray
+        Downsampled y values
+    """
+    if not hasattr(x, 'take'):
+        x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if n_buckets is None:
+        n_buckets = target_buckets(ax, dpi) if ax is not None else 0
+    indices = minmax_indices(y, n_buckets)
+    return x.take(indices), y[indices]
+
+def bar_collection(ax, x, heights, n_buckets=None, width_fraction=0.8, dpi=None, **kwargs):
+    """
+    Draw a bar series as a single PolyCollection
+
+    Replaces ``ax.bar``, which creates one Rectangle artist per bar.
+    Bars are downsampled with the same bucketing as line series.
+
+    Parameters:
+    -----------
+    ax : matplotlib.axes.Axes
+        Axes to draw on
+    x : pandas.DatetimeIndex or array-like
+        Bar positions
+    heights : array-like
+        Bar heights
+    n_buckets : int, optional
+        Explicit bucket count, defaults to the axes width in output pixels
+    width_fraction : float
+        Bar width as a fraction of the median spacing between bars
+    dpi : float, optional
+        Output resolution the bucket count is sized for (see target_buckets)
+    **kwargs
+        Passed through to PolyCollection (color, alpha, label, ...)
+
+    Returns:
+    --------
+    collection : matplotlib.collections.PolyCollection
+        The added collection
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64) or x.dtype == object:
+        x = mdates.date2num(x)
+    x = x.astype(float)
+    heights = np.nan_to_num(np.asarray(heights, dtype=float))
+
+    spacing = np.median(np.diff(x)) if len(x) > 1 else 1.0
+    half_width = spacing * width_fraction / 2
+
+    if n_buckets is None:
+        n_buckets = target_buckets(ax, dpi)
+    indices = minmax_indices(heights, n_buckets)
+    x, heights = x[indices], heights[indices]
+
+    # (n_bars, 4 corners, xy) vertices built in one shot
+    verts = np.empty((len(x), 4, 2))
+    verts[:, [0, 1], 0] = (x - half_width)[:, None]
+    verts[:, [2, 3], 0] = (x + half_width)[:, None]
+    verts[:, [0, 3], 1] = 0.0
+    verts[:, [1, 2], 1] = heights[:, None]
+
+    collection = PolyCollection(verts, **kwargs)
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
@@ -1,14 +1,15 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+from .downsample import downsample, bar_collection
 
 def plot_macd_signals(df):
     """Plot MACD signals and price movements"""
     # Create figure with secondary y-axis
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10), height_ratios=[2, 1])
     
-    # Plot price
-    ax1.plot(df.index, df['Close'], label='Price', color='blue', alpha=0.6)
+    # Plot price (downsampled to the axes pixel width)
+    ax1.plot(*downsample(df.index, df['Close'], ax=ax1), label='Price', color='blue', alpha=0.6)
     
     # Plot buy/sell signals
     buy_signals = df[df['Position_Change'] == 1].index
@@ -21,9 +22,9 @@ def plot_macd_signals(df):
     ax1.legend()
     
     # Plot MACD
-    ax2.plot(df.index, df['MACD'], label='MACD', color='blue')
-    ax2.plot(df.index, df['Signal_Line'], label='Signal Line', color='orange')
-    ax2.bar(df.index, df['MACD_Histogram'], label='MACD Histogram', color='gray', alpha=0.3)
+    ax2.plot(*downsample(df.index, df['MACD'], ax=ax2), label='MACD', color='blue')
+    ax2.plot(*downsample(df.index, df['Signal_Line'], ax=ax2), label='Signal Line', color='orange')
+    bar_collection(ax2, df.index, df['MACD_Histogram'], label='MACD Histogram', color='gray', alpha=0.3)
     ax2.set_title('MACD Indicator')
     ax2.legend()
     
@@ -37,8 +38,8 @@ def plot_performance(df):
     # Cumulative returns comparison
     strategy_cum_returns = (1 + df['Strategy_Returns']).cumprod()
     market_cum_returns = (1 + df['Returns']).cumprod()
-    ax1.plot(df.index, strategy_cum_returns, label='Strategy Returns', color='blue')
-    ax1.plot(df.index, market_cum_returns, label='Market Returns', color='gray', alpha=0.6)
+    ax1.plot(*downsample(df.index, strategy_cum_returns, ax=ax1), label='Strategy Returns', color='blue')
+    ax1.plot(*downsample(df.index, market_cum_returns, ax=ax1), label='Market Returns', color='gray', alpha=0.6)
     ax1.set_title('Cumulative Returns')
     ax1.legend()
     
@@ -50,7 +51,7 @@ def plot_performance(df):
     # Rolling Sharpe ratio (252-day)
     rolling_sharpe = (df['Strategy_Returns'].rolling(252).mean() / 
                      df['Strategy_Returns'].rolling(252).std() * np.sqrt(252))
-    ax3.plot(df.index, rolling_sharpe)
+    ax3.plot(*downsample(df.index, rolling_sharpe, ax=ax3))
     ax3.axhline(y=0, color='r', linestyle='--')
     ax3.set_title('Rolling Sharpe Ratio (252-day)')
     
@@ -58,7 +59,7 @@ def plot_performance(df):
     strategy_cum_returns = (1 + df['Strategy_Returns']).cumprod()
     rolling_max = strategy_cum_returns.expanding().max()
     drawdowns = (strategy_cum_returns - rolling_max) / rolling_max
-    ax4.fill_between(df.index, drawdowns, 0, color='red', alpha=0.3)
+    ax4.fill_between(*downsample(df.index, drawdowns, ax=ax4), 0, color='red', alpha=0.3)
     ax4.set_title('Drawdown Analysis')
     
     plt.tight_layout()
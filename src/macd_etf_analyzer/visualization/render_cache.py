@@ -0,0 +1,126 @@
+import os
+import json
+import types
+import hashlib
+import pandas as pd
+
+def plot_inputs(columns, filename, extra=None):
+    """
+    Declare the inputs and output file of a summary plot function
+
+    Parameters:
+    -----------
+    columns : list of str
+        Summary columns the plot reads
+    filename : str
+        Name of the image the plot writes into its output directory
+    extra : object, optional
+        Any other JSON-serializable input the plot depends on (e.g. a
+        category mapping)
+    """
+    def decorator(plot_func):
+        plot_func.plot_columns = list(columns)
+        plot_func.plot_filename = filename
+        plot_func.plot_extra = extra
+        return plot_func
+    return decorator
+
+# Module-level data a plot may read (e.g. a category mapping); hashed by value
+_DATA_TYPES = (dict, list, tuple, str, int, float, bool)
+
+def _hash_code(code, namespace, digest, seen):
+    """
+    Hash a code object, its constants (nested functions, lambdas and
+    comprehensions recursively) and the package helpers and module data
+    it refers to by name
+    """
+    digest.update(code.co_code)
+    digest.update(json.dumps(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _hash_code(const, namespace, digest, seen)
+        elif isinstance(const, frozenset):
+            digest.update(repr(sorted(map(repr, const))).encode())  # set order varies between runs
+        else:
+            digest.update(repr(const).encode())
+    package = __name__.split('.')[0]
+    for name in code.co_names:
+        value = namespace.get(name)
+        if isinstance(value, types.FunctionType) and value.__module__.split('.')[0] == package:
+            if value not in seen:
+                seen.add(value)
+                _hash_function(value, digest, seen)
+        elif isinstance(value, _DATA_TYPES):
+            try:
+                digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+            except TypeError:  # e.g. tuple keys
+                digest.update(repr(value).encode())
+
+def _hash_function(func, digest, seen):
+    """Hash a function's code, defaults and (recursively) the helpers it calls"""
+    digest.update(func.__qualname__.encode())
+    digest.update(repr((func.__defaults__, func.__kwdefaults__)).encode())
+    _hash_code(func.__code__, func.__globals__, digest, seen)
+
+class RenderCache:
+    """
+    Skip re-rendering figures whose inputs have not changed
+
+    A fingerprint of the declared input columns, the plot parameters and
+    the plot function's code is stored per figure in a JSON manifest in
+    the output directory. The code covers the function's nested code and
+    constants and, by name, the package functions it calls (e.g.
+    add_category_column and in turn get_category) and the module-level
+    data they read (e.g. ETF_CATEGORIES). A figure is rebuilt only when its fingerprint
+    changes or its image is missing.
+    """
+
+    MANIFEST = '.render_cache.json'
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.manifest_file = os.path.join(output_dir, self.MANIFEST)
+        self.rebuilt = []
+        self.skipped = []
+        try:
+            with open(self.manifest_file) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def fingerprint(self, plot_func, df, **params):
+        """Hash the declared inputs and parameters of a plot"""
+        digest = hashlib.sha256()
+        _hash_function(plot_func, digest, {plot_func})
+        digest.update(json.dumps(plot_func.plot_columns).encode())
+        digest.update(pd.util.hash_pandas_object(df[plot_func.plot_columns], index=False).values.tobytes())
+        digest.update(json.dumps([plot_func.plot_extra, params], sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def render(self, plot_func, df, force=False, **params):
+        """
+        Render a plot unless an up-to-date image already exists
+
+        Returns:
+        --------
+        rebuilt : bool
+            True if the plot function was called
+        """
+        filename = plot_func.plot_filename
+        fingerprint = self.fingerprint(plot_func, df, **params)
+        output_file = os.path.join(self.output_dir, filename)
+
+        if not force and self.manifest.get(filename) == fingerprint and os.path.exists(output_file):
+            self.skipped.append(filename)
+            return False
+
+        plot_func(df, self.output_dir, **params)
+        self.manifest[filename] = fingerprint
+        self.rebuilt.append(filename)
+        return True
+
+    def save(self):
+        """Write the manifest back to the output directory"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self.manifest_file, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
@@ -3,7 +3,14 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import numpy as np
+from ..data.universe import ETF_CATEGORIES, get_category
+from .render_cache import RenderCache, plot_inputs
 
+def add_category_column(summary_df):
+    """Return a copy of the summary with a Category column (input is not modified)"""
+    return summary_df.assign(Category=summary_df['ETF'].map(get_category))
+
+@plot_inputs(['Best Strategy'], 'strategy_distribution.png')
 def plot_strategy_distribution(summary_df, output_dir='data/summary'):
     """
     Plot the distribution of best strategies across ETFs
@@ -29,6 +36,7 @@ def plot_strategy_distribution(summary_df, output_dir='data/summary'):
     plt.savefig(os.path.join(output_dir, 'strategy_distribution.png'), dpi=300, bbox_inches='tight')
     plt.close()
 
+@plot_inputs(['ETF', 'Best Strategy', 'Sharpe Ratio'], 'performance_comparison.png')
 def plot_performance_comparison(summary_df, output_dir='data/summary'):
     """
     Plot performance comparison of ETFs
@@ -74,6 +82,7 @@ def plot_performance_comparison(summary_df, output_dir='data/summary'):
     plt.savefig(os.path.join(output_dir, 'performance_comparison.png'), dpi=300, bbox_inches='tight')
     plt.close()
 
+@plot_inputs(['ETF', 'Best Strategy', 'Annual Return (%)', 'Max Drawdown (%)'], 'returns_vs_drawdown.png')
 def plot_returns_vs_drawdown(summary_df, output_dir='data/summary'):
     """
     Plot returns vs drawdown scatter plot
@@ -122,6 +131,7 @@ def plot_returns_vs_drawdown(summary_df, output_dir='data/summary'):
     plt.savefig(os.path.join(output_dir, 'returns_vs_drawdown.png'), dpi=300, bbox_inches='tight')
     plt.close()
 
+@plot_inputs(['ETF', 'Best Strategy', 'Sharpe Ratio', 'Number of Trades', 'Win Ratio (%)'], 'win_ratio_vs_trades.png')
 def plot_win_ratio_vs_trades(summary_df, output_dir='data/summary'):
     """
     Plot win ratio vs number of trades
@@ -171,6 +181,8 @@ def plot_win_ratio_vs_trades(summary_df, output_dir='data/summary'):
     plt.savefig(os.path.join(output_dir, 'win_ratio_vs_trades.png'), dpi=300, bbox_inches='tight')
     plt.close()
 
+@plot_inputs(['ETF', 'Sharpe Ratio', 'Annual Return (%)', 'Max Drawdown (%)', 'Win Ratio (%)'],
+             'category_performance.png', extra=ETF_CATEGORIES)
 def plot_category_performance(summary_df, output_dir='data/summary'):
     """
     Plot performance comparison by ETF category (Country, Sector, Bond)
@@ -184,17 +196,8 @@ def plot_category_performance(summary_df, output_dir='data/summary'):
     """
     plt.figure(figsize=(14, 10))
     
-    # Define ETF categories
-    country_etfs = ['EEM', 'VWO', 'FXI', 'AAXJ', 'EWJ', 'ACWX', 'CHIX', 'CQQQ', 
-                   'EWZ', 'ERUS', 'EWC', 'EWU', 'VGK', 'VPL']
-    sector_etfs = ['XLF', 'XLE', 'XLK', 'XLV', 'XLI', 'XLP', 'XLY', 'XLB', 'XLU', 'XLRE']
-    bond_etfs = ['AGG', 'BND', 'TLT', 'IEF', 'SHY', 'LQD', 'HYG', 'MUB', 'EMB', 'BNDX']
-    
-    # Add category column to DataFrame
-    summary_df['Category'] = 'Unknown'
-    summary_df.loc[summary_df['ETF'].isin(country_etfs), 'Category'] = 'Country/Region'
-    summary_df.loc[summary_df['ETF'].isin(sector_etfs), 'Category'] = 'Sector'
-    summary_df.loc[summary_df['ETF'].isin(bond_etfs), 'Category'] = 'Bond'
+    # Add category column to a copy of the DataFrame
+    summary_df = add_category_column(summary_df)
     
     # Calculate average metrics by category
     category_metrics = summary_df.groupby('Category').agg({
@@ -234,6 +237,7 @@ def plot_category_performance(summary_df, output_dir='data/summary'):
     plt.savefig(os.path.join(output_dir, 'category_performance.png'), dpi=300, bbox_inches='tight')
     plt.close()
 
+@plot_inputs(['ETF', 'Best Strategy'], 'strategy_by_category.png', extra=ETF_CATEGORIES)
 def plot_strategy_by_category(summary_df, output_dir='data/summary'):
     """
     Plot strategy distribution by ETF category
@@ -247,17 +251,8 @@ def plot_strategy_by_category(summary_df, output_dir='data/summary'):
     """
     plt.figure(figsize=(12, 8))
     
-    # Define ETF categories
-    country_etfs = ['EEM', 'VWO', 'FXI', 'AAXJ', 'EWJ', 'ACWX', 'CHIX', 'CQQQ', 
-                   'EWZ', 'ERUS', 'EWC', 'EWU', 'VGK', 'VPL']
-    sector_etfs = ['XLF', 'XLE', 'XLK', 'XLV', 'XLI', 'XLP', 'XLY', 'XLB', 'XLU', 'XLRE']
-    bond_etfs = ['AGG', 'BND', 'TLT', 'IEF', 'SHY', 'LQD', 'HYG', 'MUB', 'EMB', 'BNDX']
-    
-    # Add category column to DataFrame
-    summary_df['Category'] = 'Unknown'
-    summary_df.loc[summary_df['ETF'].isin(country_etfs), 'Category'] = 'Country/Region'
-    summary_df.loc[summary_df['ETF'].isin(sector_etfs), 'Category'] = 'Sector'
-    summary_df.loc[summary_df['ETF'].isin(bond_etfs), 'Category'] = 'Bond'
+    # Add category column to a copy of the DataFrame
+    summary_df = add_category_column(summary_df)
     
     # Create a cross-tabulation of Category vs Best Strategy
     strategy_by_category = pd.crosstab(summary_df['Category'], summary_df['Best Strategy'])
@@ -282,31 +277,51 @@ def plot_strategy_by_category(summary_df, output_dir='data/summary'):
     plt.savefig(os.path.join(output_dir, 'strategy_by_category.png'), dpi=300, bbox_inches='tight')
     plt.close()
 
-def generate_summary_visualizations(summary_csv='data/summary/etf_strategy_summary.csv', output_dir='data/summary'):
+SUMMARY_PLOTS = [
+    plot_strategy_distribution,
+    plot_performance_comparison,
+    plot_returns_vs_drawdown,
+    plot_win_ratio_vs_trades,
+    plot_category_performance,
+    plot_strategy_by_category
+]
+
+def generate_summary_visualizations(summary_csv='data/summary/etf_strategy_summary.csv', output_dir='data/summary', force=False):
     """
     Generate all summary visualizations
     
+    Plots whose declared inputs are unchanged since the last run are
+    skipped (see RenderCache).
+    
     Parameters:
     -----------
     summary_csv : str
         Path to the summary CSV file
     output_dir : str
         Directory to save the plots
+    force : bool
+        Re-render every plot regardless of the cache
+    
+    Returns:
+    --------
+    rebuilt : list of str
+        File names of the figures that were re-rendered
     """
     # Load summary data
     summary_df = pd.read_csv(summary_csv)
     
-    # Generate plots
-    plot_strategy_distribution(summary_df, output_dir)
-    plot_performance_comparison(summary_df, output_dir)
-    plot_returns_vs_drawdown(summary_df, output_dir)
-    plot_win_ratio_vs_trades(summary_df, output_dir)
-    
-    # Generate category-based visualizations
-    plot_category_performance(summary_df, output_dir)
-    plot_strategy_by_category(summary_df, output_dir)
+    # Generate plots (summary and category-based), skipping unchanged ones
+    cache = RenderCache(output_dir)
+    for plot_func in SUMMARY_PLOTS:
+        cache.render(plot_func, summary_df, force=force)
+    cache.save()
     
     print(f"Summary visualizations saved to {output_dir}")
+    print(f"Rebuilt {len(cache.rebuilt)} figure(s): {', '.join(cache.rebuilt) or 'none'}")
+    if cache.skipped:
+        print(f"Up to date, skipped: {', '.join(cache.skipped)}")
+    
+    return cache.rebuilt
 
 if __name__ == "__main__":
     generate_summary_visualizations() 
\ No newline at end of file
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+def make_bars(seed, periods=2000, start='2010-01-01', end=None, volatility=0.01, open_noise=0.0, high_low=None,
+              volume=(1000, 10000), missing=0.0):
+    """
+    Synthetic daily OHLCV bars: a geometric random walk on business days in market time
+
+    Parameters:
+    -----------
+    seed : int or numpy.random.Generator
+        Seed of the random walk (a generator is used as is, to share its stream)
+    periods : int
+        Number of business days, unless end is given
+    start, end : str
+        First day and, optionally, last day of the bars
+    volatility : float
+        Daily standard deviation of the log returns
+    open_noise : float
+        Standard deviation of the open around the close (0: open at the close)
+    high_low : float, optional
+        Standard deviation of the high and low around the close (default: a fixed 1%)
+    volume : tuple
+        Range of the random volumes
+    missing : float
+        Share of the days dropped at random
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start=start, end=end, periods=None if end else periods, tz='US/Eastern')
+    if missing:
+        dates = dates[rng.random(len(dates)) > missing]
+    n = len(dates)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+    open_ = close * (1 + rng.normal(0, open_noise, n)) if open_noise else close
+    if high_low:
+        high = close * (1 + np.abs(rng.normal(0, high_low, n)))
+        low = close * (1 - np.abs(rng.normal(0, high_low, n)))
+    else:
+        high, low = close * 1.01, close * 0.99
+    return pd.DataFrame({
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': rng.integers(*volume, n)
+    }, index=dates)
@@ -0,0 +1,156 @@
+import json
+import time
+import asyncio
+import threading
+import unittest
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.data.async_fetcher import AsyncFetcher, HttpChartProvider, FetchError, TokenBucket
+
+def chart_payload(symbol, period1, period2):
+    dates = pd.bdate_range(pd.Timestamp(period1, unit='s'), pd.Timestamp(period2, unit='s'), inclusive='left')
+    timestamps = (dates.tz_localize('America/New_York') + pd.Timedelta(hours=9, minutes=30)).asi8 // 10**9
+    close = 100 + np.arange(len(dates), dtype=float)
+    return {'chart': {'result': [{
+        'meta': {'symbol': symbol, 'exchangeTimezoneName': 'America/New_York'},
+        'timestamp': timestamps.tolist(),
+        'indicators': {
+            'quote': [{'open': close.tolist(), 'high': (close + 1).tolist(), 'low': (close - 1).tolist(),
+                       'close': close.tolist(), 'volume': [1000] * len(dates)}],
+            'adjclose': [{'adjclose': (close / 2).tolist()}]
+        }
+    }], 'error': None}}
+
+class ChartHandler(BaseHTTPRequestHandler):
+    """Chart endpoint that fails each symbol's first request with 503 and knows no 'MISSING'"""
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        symbol = urllib.parse.unquote(url.path.rsplit('/', 1)[-1])
+        query = urllib.parse.parse_qs(url.query)
+        with self.server.lock:
+            self.server.hits[symbol] = self.server.hits.get(symbol, 0) + 1
+            first = self.server.hits[symbol] == 1
+
+        if symbol == 'MISSING':
+            self.send_error(404)
+        elif first:
+            self.send_error(503)
+        else:
+            body = json.dumps(chart_payload(symbol, int(query['period1'][0]), int(query['period2'][0]))).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestAsyncFetcher(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ChartHandler)
+        self.server.hits = {}
+        self.server.lock = threading.Lock()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        provider = HttpChartProvider(f'http://127.0.0.1:{self.server.server_port}/chart', timeout=5)
+        self.fetcher = AsyncFetcher(provider, rate=100, burst=10, max_concurrency=4, timeout=5, retries=2,
+                                    backoff=0.01, seed=0).start()
+
+    def tearDown(self):
+        self.fetcher.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fetch_with_retries(self):
+        symbols = ['SPY', 'QQQ', 'MISSING']
+        futures = {symbol: self.fetcher.submit(symbol, '2020-01-01', '2020-03-01') for symbol in symbols}
+
+        df, vix_df = futures['SPY'].result(timeout=30)
+        self.assertEqual(str(df.index.tz), 'US/Eastern')
+        self.assertEqual(len(df), len(pd.bdate_range('2020-01-01', '2020-03-01', inclusive='left')))
+        self.assertEqual(df.index[0], pd.Timestamp('2020-01-01', tz='US/Eastern'))
+        # Prices are adjusted by adjclose / close
+        self.assertAlmostEqual(df['Close'].iloc[0], 50.0)
+        self.assertAlmostEqual(df['High'].iloc[0], 50.5)
+        self.assertEqual(df['Volume'].dtype, np.int64)
+        self.assertIs(futures['QQQ'].result(timeout=30)[1], vix_df)
+
+        with self.assertRaises(FetchError) as error:
+            futures['MISSING'].result(timeout=30)
+        self.assertFalse(error.exception.retryable)
+
+        # 503 retried once per symbol, VIX fetched once, 404 not retried
+        self.assertEqual(self.server.hits, {'SPY': 2, 'QQQ': 2, '^VIX': 2, 'MISSING': 1})
+        self.assertEqual(self.fetcher.stats['Retries'], 3)
+        self.assertEqual(self.fetcher.stats['Completed'], 3)
+        self.assertEqual(self.fetcher.stats['Failed'], 1)
+
+    def test_shared_downloads(self):
+        futures = [self.fetcher.submit(symbol, '2020-01-01', '2020-03-01') for symbol in ['SPY', 'SPY', '^VIX']]
+        spy, _ = futures[0].result(timeout=30)
+        self.assertIs(futures[1].result(timeout=30)[0], spy)
+        vix_df, none = futures[2].result(timeout=30)
+        self.assertIsNone(none)
+        self.assertIs(futures[0].result()[1], vix_df)
+        # One download each (after the 503 retry)
+        self.assertEqual(self.server.hits, {'SPY': 2, '^VIX': 2})
+
+        results = self.fetcher.fetch_many({'SPY': ('2020-01-01', '2020-02-01'),
+                                           'MISSING': ('2020-01-01', '2020-02-01')})
+        self.assertEqual(len(results['SPY']), len(pd.bdate_range('2020-01-01', '2020-02-01', inclusive='left')))
+        self.assertIsInstance(results['MISSING'], FetchError)
+
+    def test_provider_errors_are_retried_on_bounded_threads(self):
+        class SlowFlakyProvider:
+            def __init__(self):
+                self.calls = {}
+                self.threads = set()
+
+            def _history(self, symbol):
+                self.threads.add(threading.current_thread().name)
+                self.calls[symbol] = self.calls.get(symbol, 0) + 1
+                if symbol == 'SLOW':
+                    time.sleep(0.3)
+                if symbol == 'BAD' or (symbol == 'SPY' and self.calls[symbol] == 1):
+                    raise KeyError('chart')
+                return pd.DataFrame({'Close': [1.0]}, index=pd.DatetimeIndex(['2020-01-02'], tz='UTC'))
+
+            async def fetch(self, symbol, start_date, end_date):
+                return await asyncio.to_thread(self._history, symbol)
+
+        provider = SlowFlakyProvider()
+        with AsyncFetcher(provider, rate=100, burst=10, max_concurrency=2, timeout=0.1, retries=1,
+                          backoff=0.01) as fetcher:
+            results = fetcher.fetch_many({symbol: ('2020-01-01', '2020-02-01')
+                                          for symbol in ['SPY', 'BAD', 'SLOW', 'QQQ']})
+            stats = dict(fetcher.stats)
+        self.assertEqual(len(results['SPY']), 1)
+        self.assertEqual(len(results['QQQ']), 1)
+        self.assertIn('KeyError', str(results['BAD']))
+        self.assertIn('Timed out', str(results['SLOW']))
+        self.assertEqual(stats['Failed'], 2)
+        self.assertEqual(stats['Timeouts'], 2)
+        # Provider exceptions are retried like other transient errors
+        self.assertEqual(stats['Retries'], 3)
+        self.assertEqual(provider.calls['BAD'], 2)
+        self.assertLessEqual(len(provider.threads), 2)
+
+    def test_token_bucket_rate(self):
+        async def acquire_all(bucket, n):
+            for _ in range(n):
+                await bucket.acquire()
+
+        async def run():
+            bucket = TokenBucket(rate=50, capacity=5)
+            start = time.monotonic()
+            await acquire_all(bucket, 15)
+            return time.monotonic() - start
+
+        # 5 tokens are available at once, the other 10 arrive at 50 per second
+        self.assertGreaterEqual(asyncio.run(run()), 0.18)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import pandas as pd
+import numpy as np
+from macd_etf_analyzer.data.bars import (BAR_AGGREGATION, periods_per_year, resample_bars, resample_bars_many,
+                                         resample_timeframes)
+from helpers import make_bars
+
+class TestBarAggregation(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+
+        # A whole week without trading days and a missing value
+        self.df = make_bars(rng, start='2015-01-01', end='2019-12-31', missing=0.1)
+        self.df = self.df[(self.df.index < '2016-03-07') | (self.df.index >= '2016-03-12')]
+        self.df.iloc[3, 0] = np.nan
+        self.other = make_bars(rng, start='2016-06-01', end='2020-06-30', missing=0.1)
+
+    def test_matches_pandas(self):
+        for freq in ['W', 'ME', '5D']:
+            expected = self.df.resample(freq).agg(BAR_AGGREGATION)
+            pd.testing.assert_frame_equal(resample_bars(self.df, freq), expected, check_freq=False)
+
+    def test_many_symbols(self):
+        bars = resample_bars_many({'A': self.df, 'B': self.other}, 'W')
+        for symbol, df in [('A', self.df), ('B', self.other)]:
+            expected = df.resample('W').agg(BAR_AGGREGATION)
+            pd.testing.assert_frame_equal(bars[symbol], expected, check_freq=False)
+
+        # The empty week is kept with NaN prices and zero volume
+        empty_week = bars['A'].loc['2016-03-13']
+        self.assertTrue(np.isnan(empty_week['Close']))
+        self.assertEqual(empty_week['Volume'], 0)
+
+    def test_timeframes(self):
+        bars = resample_timeframes({'A': self.df, 'B': self.other}, ['D', 'W', 'ME', '5D'])
+        for freq in ['W', 'ME', '5D']:
+            expected = resample_bars_many({'A': self.df, 'B': self.other}, freq)
+            for symbol in ['A', 'B']:
+                pd.testing.assert_frame_equal(bars[freq][symbol], expected[symbol])
+
+        # Daily bars are the trading days, not every calendar day
+        pd.testing.assert_frame_equal(bars['D']['B'], self.other, check_freq=False)
+        self.assertEqual(len(bars['D']['A']), len(self.df))
+        self.assertEqual([periods_per_year(freq) for freq in ['D', 'W', 'ME']], [252, 52, 12])
+
+if __name__ == '__main__':
+    unittest.main()
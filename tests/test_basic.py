@@ -3,7 +3,9 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from macd_etf_analyzer.strategies.macd import get_macd_signals
+from macd_etf_analyzer.strategies.vpvma import get_vpvma_signals
 from macd_etf_analyzer.utils.position_manager import apply_stop_loss, calculate_strategy_returns
+from macd_etf_analyzer.utils.copies import count_copies
 
 class TestBasicFunctionality(unittest.TestCase):
     def setUp(self):
@@ -34,6 +36,23 @@ class TestBasicFunctionality(unittest.TestCase):
         positions = result['Position'].dropna().unique()
         self.assertTrue(all(p in [-1, 0, 1] for p in positions))
 
+    def test_inputs_not_modified(self):
+        # Strategies must not touch the caller's frames (e.g. convert their index in place)
+        df = self.df.tz_convert('UTC')
+        vix_df = self.df[['Close']].tz_convert('UTC')
+        expected_df, expected_vix = df.copy(), vix_df.copy()
+        
+        with count_copies() as copies:
+            get_macd_signals(df=df, symbol='TEST')
+            get_vpvma_signals(df=df, vix_df=vix_df, symbol='TEST')
+        
+        pd.testing.assert_frame_equal(df, expected_df)
+        pd.testing.assert_frame_equal(vix_df, expected_vix)
+        self.assertEqual(str(df.index.tz), 'UTC')
+        
+        # Only the weekly frames are copied: one strategy frame and one stop loss frame each
+        self.assertEqual(copies.count, 4)
+
     def test_stop_loss(self):
         # Create a DataFrame with a known pattern
         df = self.df.copy()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.utils.correlation import (build_return_matrix, cluster_correlations, correlation_matrix,
+                                                 generate_correlation_report, rolling_correlations)
+from macd_etf_analyzer.visualization.correlation_plots import plot_clustered_correlation
+
+def make_returns(n_groups=4, per_group=5, weeks=300, seed=0):
+    """Returns of n_groups clusters of per_group streams sharing a common factor"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2010-01-01', periods=weeks, freq='W-FRI')
+    columns = {}
+    for group in range(n_groups):
+        factor = rng.normal(0, 0.02, weeks)
+        for member in range(per_group):
+            columns[(f'G{group}', f'S{member}')] = factor + rng.normal(0, 0.005, weeks)
+    return pd.DataFrame(columns, index=dates).rename_axis(columns=['ETF', 'Strategy'])
+
+class TestCorrelation(unittest.TestCase):
+    def test_blocked_correlation_matches_pandas(self):
+        returns = make_returns()
+        returns.iloc[:120, 3] = np.nan   # short history
+        returns.iloc[50:60, 7] = np.nan  # gap
+        returns.iloc[:, 11] = 0.0        # never traded
+        expected = returns.corr(min_periods=26)
+
+        for block_size in (3, 7, 512):
+            corr = correlation_matrix(returns, block_size=block_size, dtype=np.float64)
+            np.testing.assert_allclose(corr.to_numpy(), expected.to_numpy(), atol=1e-10)
+        corr32 = correlation_matrix(returns, block_size=6)
+        self.assertEqual(corr32.to_numpy().dtype, np.float32)
+        np.testing.assert_allclose(corr32.to_numpy(), expected.to_numpy(), atol=1e-4)
+
+        full = returns.drop(columns=returns.columns[[3, 7, 11]])
+        np.testing.assert_allclose(correlation_matrix(full, block_size=4).to_numpy(), full.corr().to_numpy(),
+                                   atol=1e-5)
+
+    def test_rolling_windows(self):
+        returns = make_returns(weeks=200)
+        windows = list(rolling_correlations(returns, window=52, step=26, dtype=np.float64))
+        self.assertEqual([end for end, _ in windows], list(returns.index[51::26]))
+        np.testing.assert_allclose(windows[2][1].to_numpy(), returns.iloc[52:104].corr().to_numpy(), atol=1e-10)
+
+    def test_clusters_recover_groups(self):
+        returns = make_returns()
+        shuffled = returns.sample(frac=1.0, axis=1, random_state=1)
+        corr = correlation_matrix(shuffled)
+        link, order, clusters = cluster_correlations(corr, min_correlation=0.7)
+        self.assertEqual(len(link), len(corr) - 1)
+        self.assertEqual(sorted(order), list(range(len(corr))))
+        self.assertEqual(clusters.nunique(), 4)
+        for _, members in clusters.groupby(clusters.index.get_level_values('ETF')):
+            self.assertEqual(members.nunique(), 1)
+        # Leaf order keeps each cluster contiguous
+        ordered = clusters.iloc[order].to_numpy()
+        self.assertEqual((np.diff(ordered) != 0).sum(), 3)
+
+    def test_report_from_results(self):
+        returns = make_returns(n_groups=3, per_group=2)
+        etf_results = {}
+        for etf in ['G0', 'G1', 'G2']:
+            results = {strategy: pd.DataFrame({'Strategy_Returns': returns[(etf, strategy)]})
+                       for strategy in ['S0', 'S1']}
+            etf_results[etf] = (results, 'S0', {})
+        self.assertEqual(build_return_matrix(etf_results).shape, (300, 6))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            corr, clusters, link = generate_correlation_report(etf_results, tmp)
+            heatmap = os.path.join(tmp, 'return_correlation_heatmap.png')
+            plot_clustered_correlation(corr, link, heatmap)
+            self.assertTrue(os.path.exists(heatmap))
+            with open(os.path.join(tmp, 'correlation_report.txt')) as f:
+                report = f.read()
+            saved = pd.read_csv(os.path.join(tmp, 'return_clusters.csv'), index_col=[0, 1])
+        self.assertEqual(clusters.nunique(), 3)
+        self.assertEqual(saved['Cluster'].tolist(), clusters.tolist())
+        self.assertIn("  G1 S0\n  G1 S1\n", report)
+
+if __name__ == '__main__':
+    unittest.main()
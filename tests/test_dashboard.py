@@ -0,0 +1,95 @@
+import os
+import re
+import json
+import time
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.data.bars import resample_bars_many
+from macd_etf_analyzer.strategies.result import STRATEGY_NAMES, StrategyResult
+from macd_etf_analyzer.utils.performance import extract_trades
+from macd_etf_analyzer.utils.walk_forward import run_strategy
+from macd_etf_analyzer.visualization.dashboard import build_dashboard_payload, decode_blob, generate_dashboard
+from helpers import make_bars
+
+BARS = {'start': '2005-01-03', 'volatility': 0.015}
+
+def make_results(seed):
+    bars = resample_bars_many({'AAA': make_bars(seed, 4800, **BARS), '^VIX': make_bars(99, 4800, **BARS)})
+    weekly_df, weekly_vix = bars['AAA'], bars['^VIX'][['Close']]
+    return {name: StrategyResult.from_frame(name, run_strategy(name, weekly_df, weekly_vix), index=weekly_df.index)
+            for name in STRATEGY_NAMES}
+
+def make_summary(etfs):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'ETF': etfs, 'Best Strategy': 'MACD', 'Sharpe Ratio': rng.normal(size=len(etfs)),
+                         'Number of Trades': rng.integers(0, 100, len(etfs))})
+
+class TestDashboard(unittest.TestCase):
+    def test_payload_round_trip(self):
+        etf_results = {etf: (make_results(seed), 'VPVMA', {}) for seed, etf in enumerate(['XLF', 'TLT'])}
+        summary_df = make_summary(list(etf_results))
+        payload = json.loads(json.dumps(build_dashboard_payload(etf_results, summary_df, max_points=200)))
+
+        summary = {column['name']: column['values'] for column in payload['summary']}
+        self.assertEqual(summary['ETF'], ['XLF', 'TLT'])
+        np.testing.assert_array_equal(decode_blob(summary['Sharpe Ratio']),
+                                      summary_df['Sharpe Ratio'].astype(np.float32))
+        np.testing.assert_array_equal(decode_blob(summary['Number of Trades']), summary_df['Number of Trades'])
+
+        for etf, (results, _, _) in etf_results.items():
+            packed = payload['etfs'][etf]
+            self.assertEqual(packed['best'], 'VPVMA')
+            origin = pd.Timestamp(packed['origin'], unit='D')
+            for name, result in results.items():
+                # Curves: at most max_points samples of the growth of $1, on the result's weeks
+                days = decode_blob(packed['curves'][name]['t'])
+                values = decode_blob(packed['curves'][name]['v'])
+                self.assertLessEqual(len(days), 200)
+                value = result['Portfolio_Value'] / result['Portfolio_Value'].iloc[0]
+                weeks = (result.index.tz_localize(None).normalize() - origin).days
+                at = np.searchsorted(weeks, days)
+                np.testing.assert_array_equal(weeks[at], days)
+                np.testing.assert_array_equal(values, value.to_numpy()[at].astype(np.float32))
+                self.assertEqual(values.max(), np.float32(value.max()))
+
+                # Trades: the priced trades of the ledger
+                trades = extract_trades(result).dropna(subset=['PnL %'])
+                ledger = packed['trades'][name]
+                entry = origin + pd.to_timedelta(decode_blob(ledger['entry']).astype(int), unit='D')
+                np.testing.assert_array_equal(entry, pd.DatetimeIndex(trades['Entry Date']).tz_localize(None).normalize())
+                np.testing.assert_array_equal(decode_blob(ledger['side']),
+                                              np.where(trades['Position'] == 'Long', 1, -1))
+                np.testing.assert_array_equal(decode_blob(ledger['exit_price']),
+                                              trades['Exit Price'].astype(np.float32))
+
+    def test_names_are_not_markup(self):
+        name = '<img src=x onerror=alert(1)></script>'
+        results = make_results(0)
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = generate_dashboard({name: (results, 'MACD', {})}, make_summary([name]),
+                                             os.path.join(tmp, 'dashboard.html'))
+            with open(output_file) as f:
+                html = f.read()
+        self.assertNotIn(name, html)
+        self.assertEqual(html.count('</script>'), 2)
+        self.assertNotIn('.innerHTML', html)
+        payload = re.search(r'id="payload">(.*?)</script>', html, re.S).group(1)
+        self.assertIn(name, json.loads(payload)['etfs'])
+
+    def test_thousand_symbols(self):
+        # One artifact for a 1,000-symbol universe: about 10 kB per symbol, built in seconds
+        results = make_results(0)
+        etfs = [f'S{i:04d}' for i in range(1000)]
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            output_file = generate_dashboard({etf: (results, 'MACD', {}) for etf in etfs}, make_summary(etfs),
+                                             os.path.join(tmp, 'dashboard.html'))
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(output_file)
+        self.assertLess(size, 12_000_000)
+        self.assertLess(elapsed, 30)
+
+if __name__ == '__main__':
+    unittest.main()
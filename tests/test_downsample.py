@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from macd_etf_analyzer.visualization.downsample import downsample, minmax_indices, target_buckets
+
+class TestDownsample(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = np.cumsum(rng.normal(0, 1, 10_000))
+
+    def test_buckets_keep_extremes_and_ends(self):
+        indices = minmax_indices(self.values, 100)
+        self.assertLessEqual(len(indices), 400)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], len(self.values) - 1)
+        for bucket in np.array_split(np.arange(len(self.values)), 100):
+            self.assertIn(bucket[np.argmin(self.values[bucket])], indices)
+            self.assertIn(bucket[np.argmax(self.values[bucket])], indices)
+        # Short series are kept whole
+        np.testing.assert_array_equal(minmax_indices(self.values[:300], 100), np.arange(300))
+
+    def test_nan_gaps_stay_broken(self):
+        values = self.values.copy()
+        gaps = [1234, 5000, 5001, 9998]
+        values[gaps] = np.nan
+        indices = minmax_indices(values, 100)
+        kept = values[indices]
+        # Every bucket with a gap keeps one of its NaNs
+        for start in range(0, len(values), 100):
+            if np.isnan(values[start:start + 100]).any():
+                self.assertTrue(np.isnan(kept[(indices >= start) & (indices < start + 100)]).any())
+        self.assertIn(1234, indices)
+        self.assertIn(5000, indices)
+        self.assertFalse(np.isnan(kept[[0, -1]]).any())
+
+    def test_buckets_follow_the_output_dpi(self):
+        fig, ax = plt.subplots(figsize=(6, 3), dpi=100)
+        try:
+            width_inches = ax.get_window_extent().width / fig.dpi
+            with matplotlib.rc_context({'savefig.dpi': 'figure'}):
+                self.assertEqual(target_buckets(ax), int(width_inches * 100))
+            with matplotlib.rc_context({'savefig.dpi': 300}):
+                self.assertEqual(target_buckets(ax), int(width_inches * 300))
+            self.assertEqual(target_buckets(ax, dpi=200), int(width_inches * 200))
+
+            x = np.arange(len(self.values))
+            x_ds, y_ds = downsample(x, self.values, ax=ax, dpi=200)
+            self.assertLessEqual(len(x_ds), 4 * int(width_inches * 200))
+            np.testing.assert_array_equal(y_ds, self.values[x_ds])
+        finally:
+            plt.close(fig)
+
+if __name__ == '__main__':
+    unittest.main()
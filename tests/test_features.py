@@ -0,0 +1,109 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.data.bars import resample_bars_many
+from macd_etf_analyzer.strategies.features import FeatureStore
+from macd_etf_analyzer.strategies.registry import STRATEGIES, register_strategy, strategy_features
+from macd_etf_analyzer.strategies.result import STRATEGY_NAMES
+from macd_etf_analyzer.utils.walk_forward import run_strategy
+from helpers import make_bars
+
+class TestFeatureStore(unittest.TestCase):
+    def setUp(self):
+        bars = resample_bars_many({'AAA': make_bars(0), '^VIX': make_bars(1)})
+        self.weekly_df, self.weekly_vix = bars['AAA'], bars['^VIX'][['Close']]
+
+    def test_strategies_share_features(self):
+        features = FeatureStore(self.weekly_df, self.weekly_vix)
+        for strategy in STRATEGY_NAMES:
+            shared = run_strategy(strategy, self.weekly_df, self.weekly_vix, features=features)
+            pd.testing.assert_frame_equal(shared, run_strategy(strategy, self.weekly_df, self.weekly_vix),
+                                          check_exact=True)
+
+        # EMA(12), EMA(26), MACD, VIX close, VPVMA line and VPVMA once each; the
+        # zero-cross variants reuse their base strategy's features
+        stats = features.stats().set_index('Feature')
+        self.assertEqual(features.computed, 6)
+        self.assertEqual(stats.loc['macd(12, 26, 9)', 'Hits'], 1)
+        self.assertEqual(stats.loc['vpvma(12, 26)', 'Hits'], 1)
+
+        # A MACD with other signal span only adds its own signal line
+        run_strategy('MACD', self.weekly_df, self.weekly_vix, features=features, signal_span=5)
+        self.assertEqual(features.computed, 7)
+        self.assertEqual(features.stats().set_index('Feature').loc['ema(12)', 'Hits'], 1)
+
+    def test_prefetch_batches_a_sweep(self):
+        features = FeatureStore(self.weekly_df, self.weekly_vix)
+        features.get('ema', 12)
+        features.prefetch('ema', [(span,) for span in [8, 12, 16, 21, 26, 34]])
+        features.prefetch('vpvma_line', [(8,), (12,), (16,)])
+        # The held EMA is kept; the rest of each kind comes from one batched kernel call
+        self.assertEqual(features.computed, 1 + 5 + 1 + 3)
+        self.assertEqual(features.stats().set_index('Feature').loc['ema(12)', 'Computed'], 1)
+
+        single = FeatureStore(self.weekly_df, self.weekly_vix)
+        for kind, arg in [('ema', 8), ('ema', 34), ('vpvma_line', 16)]:
+            np.testing.assert_array_equal(features.get(kind, arg), single.get(kind, arg))
+        run_strategy('MACD', self.weekly_df, self.weekly_vix, features=features, fast_span=8, slow_span=34)
+        self.assertEqual(features.computed, 1 + 5 + 1 + 3 + 1)
+
+    def test_bounded_store_evicts_least_recently_used(self):
+        features = FeatureStore(self.weekly_df, max_features=2)
+        first = features.get('ema', 12)
+        features.get('ema', 26)
+        features.get('ema', 12)  # now the most recently used
+        features.get('ema', 5)   # evicts ema(26)
+        self.assertEqual(len(features), 2)
+        self.assertIs(features.get('ema', 12), first)
+        self.assertEqual(features.computed, 3)
+        features.get('ema', 26)
+        self.assertEqual(features.computed, 4)
+        np.testing.assert_array_equal(features.get('ema', 26), FeatureStore(self.weekly_df).get('ema', 26))
+
+    def test_new_strategy_declares_features(self):
+        @register_strategy('EMA Cross', {'fast_span': 12, 'slow_span': 26},
+                           [('ema', 'fast_span'), ('ema', 'slow_span')], 'EMA')
+        def ema_cross_signals(bars, fast, slow):
+            return pd.Series(fast, index=bars.index), pd.Series(slow, index=bars.index), None
+
+        try:
+            self.assertEqual(strategy_features('EMA Cross', slow_span=30), [('ema', 12), ('ema', 30)])
+            features = FeatureStore(self.weekly_df, self.weekly_vix)
+            run_strategy('MACD', self.weekly_df, self.weekly_vix, features=features)
+            df = run_strategy('EMA Cross', self.weekly_df, self.weekly_vix, features=features)
+            self.assertEqual(features.hits, 2)
+            self.assertIn('EMA_Histogram', df.columns)
+            self.assertTrue(df['Position'].iloc[1:].isin([-1, 0, 1]).all())
+        finally:
+            del STRATEGIES['EMA Cross']
+
+        with self.assertRaises(ValueError):
+            run_strategy('EMA Cross', self.weekly_df, self.weekly_vix)
+        with self.assertRaises(TypeError):
+            run_strategy('MACD', self.weekly_df, self.weekly_vix, window=8)
+
+    def test_vix_is_aligned_by_week(self):
+        # VIX history starting years before the ETF's, with one week missing
+        daily_vix = make_bars(1, periods=3000)
+        daily_vix.index = pd.bdate_range(start='2007-09-03', periods=3000, tz='US/Eastern')
+        longer_vix = resample_bars_many({'^VIX': daily_vix})['^VIX'][['Close']].drop(self.weekly_df.index[100])
+        self.assertLess(longer_vix.index[0], self.weekly_df.index[0])
+
+        features = FeatureStore(self.weekly_df, longer_vix)
+        pd.testing.assert_series_equal(features.get('vix_close'), longer_vix['Close'].reindex(self.weekly_df.index))
+        self.assertTrue(np.isnan(features.get('vix_close').iloc[100]))
+
+        # Same VIX trimmed to the ETF's weeks gives the same VPVMA
+        trimmed = FeatureStore(self.weekly_df, longer_vix.loc[self.weekly_df.index[0]:])
+        np.testing.assert_array_equal(trimmed.get('vpvma_line', 12), features.get('vpvma_line', 12))
+
+    def test_concurrent_lookups_compute_once(self):
+        features = FeatureStore(self.weekly_df, self.weekly_vix)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            values = list(pool.map(lambda _: features.get('macd', 12, 26, 9), range(32)))
+        self.assertTrue(all(value is values[0] for value in values))
+        self.assertEqual(features.stats().set_index('Feature').loc['macd(12, 26, 9)'].tolist(), [1, 31])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.data.bars import resample_bars_many
+from macd_etf_analyzer.strategies.incremental import IncrementalBacktest, run_incremental, state_file
+from macd_etf_analyzer.strategies.result import STRATEGY_NAMES, StrategyResult
+from macd_etf_analyzer.utils.costs import DEFAULT_COST_MODELS
+from macd_etf_analyzer.utils.performance import extract_trades
+from macd_etf_analyzer.utils.walk_forward import run_strategy
+from helpers import make_bars
+
+BARS = {'start': '2005-01-03', 'volatility': 0.02, 'high_low': 0.02, 'volume': (1000, 100000)}
+
+def weekly_bars(seed):
+    bars = resample_bars_many({'AAA': make_bars(seed, 2500, **BARS), '^VIX': make_bars(99, 2500, **BARS)})
+    return bars['AAA'], bars['^VIX'][['Close']]
+
+def full_result(strategy, weekly_df, weekly_vix, precision='compact', **kwargs):
+    frame = run_strategy(strategy, weekly_df, weekly_vix, **kwargs)
+    return StrategyResult.from_frame(strategy, frame, index=weekly_df.index, precision=precision)
+
+class TestIncrementalBacktest(unittest.TestCase):
+    def test_extend_matches_full_run(self):
+        for precision in ('compact', 'full'):
+            weekly_df, weekly_vix = weekly_bars(0)
+            for strategy in STRATEGY_NAMES:
+                kwargs = {'cost_models': DEFAULT_COST_MODELS, 'net_of': 'Base', 'stop_loss_pct': 0.03}
+                backtest = IncrementalBacktest.run(strategy, weekly_df.iloc[:200], weekly_vix, precision=precision,
+                                                   **kwargs)
+                for end in (201, 204, 300, len(weekly_df)):
+                    backtest.extend(weekly_df.iloc[:end], weekly_vix)
+
+                expected = full_result(strategy, weekly_df, weekly_vix, precision, **kwargs)
+                pd.testing.assert_frame_equal(backtest.result.to_frame(), expected.to_frame(), check_exact=True)
+                pd.testing.assert_frame_equal(backtest.trades, extract_trades(expected), check_exact=True)
+
+    def test_extend_over_missing_closes(self):
+        weekly_df, weekly_vix = weekly_bars(3)
+        # Weeks without bars (NaN rows) before and after the stored run
+        weekly_df.iloc[[120, 121, 250, 320], :] = np.nan
+        kwargs = {'cost_models': DEFAULT_COST_MODELS, 'net_of': 'Base'}
+        for strategy in STRATEGY_NAMES:
+            backtest = IncrementalBacktest.run(strategy, weekly_df.iloc[:200], weekly_vix, **kwargs)
+            for end in (251, 300, len(weekly_df)):
+                self.assertTrue(backtest.matches(weekly_df.iloc[:end], weekly_vix))
+                backtest.extend(weekly_df.iloc[:end], weekly_vix)
+
+            expected = full_result(strategy, weekly_df, weekly_vix, **kwargs)
+            pd.testing.assert_frame_equal(backtest.result.to_frame(), expected.to_frame(), check_exact=True)
+            pd.testing.assert_frame_equal(backtest.trades, extract_trades(expected), check_exact=True)
+
+    def test_revised_bars_are_rejected(self):
+        weekly_df, weekly_vix = weekly_bars(1)
+        backtest = IncrementalBacktest.run('MACD', weekly_df.iloc[:200], weekly_vix)
+        revised = weekly_df.copy()
+        revised.iloc[199, revised.columns.get_loc('Close')] *= 1.01
+        self.assertTrue(backtest.matches(weekly_df, weekly_vix))
+        self.assertFalse(backtest.matches(revised, weekly_vix))
+        with self.assertRaises(ValueError):
+            backtest.extend(revised, weekly_vix)
+
+    def test_run_incremental_appends_trade_info(self):
+        weekly_df, weekly_vix = weekly_bars(2)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                os.makedirs(os.path.join('data', 'AAA'))
+                trade_file = os.path.join('data', 'AAA', 'trade_info_VPVMA.csv')
+                run_incremental('AAA', 'VPVMA', weekly_df.iloc[:300], weekly_vix, cost_models=DEFAULT_COST_MODELS)
+                self.assertTrue(os.path.exists(state_file('AAA', 'VPVMA')))
+                first = pd.read_csv(trade_file)
+
+                result = run_incremental('AAA', 'VPVMA', weekly_df, weekly_vix, cost_models=DEFAULT_COST_MODELS)
+                expected = full_result('VPVMA', weekly_df, weekly_vix, cost_models=DEFAULT_COST_MODELS)
+                pd.testing.assert_frame_equal(result.to_frame(), expected.to_frame(), check_exact=True)
+                ledger = pd.read_csv(trade_file)
+                self.assertGreater(len(ledger), len(first))
+                extract_trades(expected).to_csv('expected.csv', index=False)
+                pd.testing.assert_frame_equal(ledger, pd.read_csv('expected.csv'))
+                self.assertEqual(IncrementalBacktest.load(state_file('AAA', 'VPVMA')).result.index[-1],
+                                 weekly_df.index[-1])
+            finally:
+                os.chdir(cwd)
+
+if __name__ == '__main__':
+    unittest.main()
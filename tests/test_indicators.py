@@ -0,0 +1,32 @@
+import unittest
+import pandas as pd
+import numpy as np
+from macd_etf_analyzer.strategies.indicators import ewm_mean, rolling_mean
+
+class TestIndicatorKernels(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (4, 300)), axis=1))
+        self.values[1, :30] = np.nan  # warm-up of an upstream indicator
+        self.values[2, 150] = np.nan  # gap inside the series
+        self.values[3, :] = np.nan
+
+    def test_ewm_matches_pandas(self):
+        spans = [3, 12, 26]
+        means = ewm_mean(self.values, spans)
+        self.assertEqual(means.shape, (3, 4, 300))
+        for i, span in enumerate(spans):
+            for row in range(4):
+                expected = pd.Series(self.values[row]).ewm(span=span, adjust=False).mean()
+                np.testing.assert_allclose(means[i, row], expected, rtol=1e-12, equal_nan=True)
+
+    def test_rolling_matches_pandas(self):
+        windows = [1, 12, 26]
+        means = rolling_mean(self.values, windows)
+        for i, window in enumerate(windows):
+            for row in range(4):
+                expected = pd.Series(self.values[row]).rolling(window=window).mean()
+                np.testing.assert_allclose(means[i, row], expected, rtol=1e-12, equal_nan=True)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.utils.portfolio import allocation_weights, build_signal_matrix, run_portfolio_backtest
+
+def make_matrices(seed, weeks=120):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2015-01-02', periods=weeks, freq='W-FRI')
+    columns = ['XLF', 'XLK', 'TLT', 'GLD']
+    positions = pd.DataFrame(rng.choice([-1, 0, 1], size=(weeks, len(columns))), index=index, columns=columns)
+    returns = pd.DataFrame(rng.normal(0, [0.01, 0.02, 0.03, 0.04], size=(weeks, len(columns))), index=index, columns=columns)
+    return positions, returns
+
+class TestPortfolio(unittest.TestCase):
+    def test_signal_matrix_keeps_missing_weeks(self):
+        positions, returns = make_matrices(0)
+        etf_results = {
+            'XLF': ({'MACD': pd.DataFrame({'Position': positions['XLF'], 'Returns': returns['XLF']})}, 'MACD', {}),
+            'TLT': ({'MACD': pd.DataFrame({'Position': positions['TLT'], 'Returns': returns['TLT']}).iloc[40:]}, 'MACD', {})
+        }
+        signal_positions, signal_returns = build_signal_matrix(etf_results)
+        self.assertTrue((signal_positions['TLT'].iloc[:40] == 0).all())
+        self.assertTrue(signal_returns['TLT'].iloc[:40].isna().all())
+        pd.testing.assert_series_equal(signal_returns['XLF'], returns['XLF'], check_freq=False)
+
+    def test_equal_weights(self):
+        positions, returns = make_matrices(1)
+        weights = allocation_weights(positions, returns, method='equal')
+        active = (positions != 0).sum(axis=1)
+        expected = np.sign(positions).div(active.replace(0, np.nan), axis=0).fillna(0)
+        pd.testing.assert_frame_equal(weights, expected.astype(float))
+        np.testing.assert_allclose(weights.abs().sum(axis=1)[active > 0], 1)
+
+    def test_inverse_vol_ignores_missing_weeks(self):
+        positions, returns = make_matrices(2)
+        positions[:] = 1
+        gappy = returns.copy()
+        gappy.iloc[30:60, 0] = np.nan
+        weights = allocation_weights(positions, gappy, method='inverse_vol', vol_lookback=20)
+
+        # Each week's weights are 1 / vol of the valid weeks in the trailing window, normalised
+        week = 70
+        window = gappy.iloc[week - 20:week]
+        inverse = 1 / window.std()
+        np.testing.assert_allclose(weights.iloc[week], inverse / inverse.sum())
+
+        # A window with too few valid weeks gives the ETF no weight rather than a 0-return volatility
+        self.assertTrue((weights['XLF'].iloc[45:60] == 0).all())
+        self.assertTrue((weights['XLF'].iloc[70:] > 0).all())
+
+        # Lower-volatility ETFs get more weight
+        later = weights.iloc[80:].mean()
+        self.assertTrue(later['XLF'] > later['XLK'] > later['TLT'] > later['GLD'])
+
+    def test_category_caps(self):
+        positions, returns = make_matrices(3)
+        positions[:] = 1
+        weights = allocation_weights(positions, returns, method='equal', category_caps={'Sector': 0.3})
+        np.testing.assert_allclose(weights[['XLF', 'XLK']].sum(axis=1), 0.3)
+        np.testing.assert_allclose(weights['TLT'], 0.25)
+        np.testing.assert_allclose(weights['GLD'], 0.25)
+
+    def test_weekly_rebalance(self):
+        positions, returns = make_matrices(4)
+        returns.iloc[:10, 2] = np.nan
+        portfolio_df, weights = run_portfolio_backtest(positions, returns, initial_capital=100)
+        w = weights.to_numpy()
+        r = returns.fillna(0).to_numpy()
+
+        np.testing.assert_allclose(portfolio_df['Portfolio_Returns'], (w * r).sum(axis=1))
+        self.assertFalse(portfolio_df['Portfolio_Value'].isna().any())
+        np.testing.assert_allclose(portfolio_df['Portfolio_Value'],
+                                   100 * np.cumprod(1 + portfolio_df['Portfolio_Returns']))
+        # Turnover is the gross weight traded at each rebalance, starting from cash
+        np.testing.assert_allclose(portfolio_df['Turnover'].iloc[0], np.abs(w[0]).sum())
+        np.testing.assert_allclose(portfolio_df['Turnover'].iloc[1:], np.abs(np.diff(w, axis=0)).sum(axis=1))
+        np.testing.assert_allclose(portfolio_df['Net_Exposure'],
+                                   portfolio_df['Long_Exposure'] - portfolio_df['Short_Exposure'])
+        np.testing.assert_array_equal(portfolio_df['Active_Positions'], (positions != 0).sum(axis=1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+from macd_etf_analyzer.strategies.macd import get_macd_signals
+from macd_etf_analyzer.utils.position_manager import apply_stop_loss, calculate_strategy_returns
+from macd_etf_analyzer.utils.performance import stop_loss_sensitivity
+from macd_etf_analyzer.utils.costs import CostModel
+from helpers import make_bars
+
+class TestStopLossSensitivity(unittest.TestCase):
+    def setUp(self):
+        # Random-walk daily data over several years
+        self.df = make_bars(0, start='2015-01-01', end='2022-12-31')
+
+    def test_batch_matches_single_threshold(self):
+        weekly_df = get_macd_signals(df=self.df.copy(), symbol='TEST')
+        thresholds = [0.02, 0.05, 0.1]
+        sensitivity = stop_loss_sensitivity(weekly_df, thresholds)
+        
+        # Rebuild the pre-stop frame and run each threshold the slow way
+        base = weekly_df[['Open', 'High', 'Low', 'Volume']].copy()
+        base['Close'] = weekly_df['Raw_Close']
+        base['Position'] = weekly_df['Signal_Position']
+        base['Portfolio_Value'] = 1_000_000
+        for threshold, (_, row) in zip(thresholds, sensitivity.iterrows()):
+            result = calculate_strategy_returns(apply_stop_loss(base, stop_loss_pct=threshold))
+            returns = result['Strategy_Returns']
+            sharpe = np.sqrt(52) * returns.mean() / returns.std()
+            total_return = (result['Portfolio_Value'].iloc[-1] / 1_000_000 - 1) * 100
+            self.assertAlmostEqual(row['Sharpe Ratio'], sharpe, places=9)
+            self.assertAlmostEqual(row['Total Return (%)'], total_return, places=6)
+
+    def test_intraweek_stops(self):
+        weekly_df = get_macd_signals(df=self.df.copy(), symbol='TEST', intraweek_stops=True)
+        stops = weekly_df[weekly_df['Stop_Side'] != 0]
+        self.assertTrue(len(stops) > 0)
+        
+        # Every stop exits on a day of its own week, at or beyond the stop price
+        days_before_label = (stops.index - stops['Stop_Date']).dt.days
+        self.assertTrue(((days_before_label >= 0) & (days_before_label < 7)).all())
+        stop_price = stops['Stop_Entry_Price'] * (1 - stops['Stop_Side'] * 0.05)
+        self.assertTrue((stops['Stop_Side'] * (stop_price - stops['Close']) >= -1e-9).all())
+        
+        # The exit day really breaches the stop
+        exit_low = self.df.loc[stops['Stop_Date'], 'Low'].to_numpy()
+        exit_high = self.df.loc[stops['Stop_Date'], 'High'].to_numpy()
+        breached = np.where(stops['Stop_Side'] == 1, exit_low <= stop_price, exit_high >= stop_price)
+        self.assertTrue(breached.all())
+
+    def test_transaction_costs(self):
+        cost_models = {'Free': CostModel(), 'Commission': CostModel(commission_bps=10)}
+        weekly_df = get_macd_signals(df=self.df.copy(), symbol='TEST', cost_models=cost_models)
+        
+        # Zero-cost scenario equals gross; commission charged per unit of turnover
+        np.testing.assert_array_equal(weekly_df['Net_Strategy_Returns_Free'], weekly_df['Gross_Strategy_Returns'])
+        turnover = weekly_df['Position'].diff().abs().fillna(0)
+        np.testing.assert_allclose(weekly_df['Gross_Strategy_Returns'] - weekly_df['Net_Strategy_Returns_Commission'],
+                                   turnover * 0.001)
+        
+        # Net-of scenario drives the portfolio value
+        net_df = get_macd_signals(df=self.df.copy(), symbol='TEST', cost_models=cost_models, net_of='Commission')
+        self.assertLess(net_df['Portfolio_Value'].iloc[-1], weekly_df['Portfolio_Value'].iloc[-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.pipeline import prepare_bars, run_strategy_result
+from macd_etf_analyzer.strategies.result import STRATEGY_NAMES
+from macd_etf_analyzer.utils.costs import DEFAULT_COST_MODELS
+from macd_etf_analyzer.utils.precision import apply_precision, categorize
+from helpers import make_bars
+
+BARS = {'start': '2008-01-01', 'volatility': 0.012, 'open_noise': 0.002, 'volume': (100000, 1000000)}
+
+class TestPrecision(unittest.TestCase):
+    def run_symbol(self, seed, precision):
+        weekly_df, weekly_vix = prepare_bars('TEST', make_bars(seed, 3000, **BARS), make_bars(999, 3000, **BARS))
+        results = {name: run_strategy_result(name, weekly_df, weekly_vix, precision=precision,
+                                             cost_models=DEFAULT_COST_MODELS) for name in STRATEGY_NAMES}
+        return weekly_df, results
+
+    def test_compact_stores_the_float64_run(self):
+        for seed in range(3):
+            weekly_df, full = self.run_symbol(seed, 'full')
+            _, compact = self.run_symbol(seed, 'compact')
+            self.assertEqual(weekly_df['Close'].dtype, np.float64)
+            for name in STRATEGY_NAMES:
+                # The run is the same; compact only casts what it stores
+                self.assertEqual(compact[name].position.dtype, np.float16)
+                np.testing.assert_array_equal(compact[name].position, full[name].position)
+                for column in ['Close', 'Returns', 'Strategy_Returns', 'Net_Strategy_Returns_Base']:
+                    np.testing.assert_array_equal(compact[name][column].to_numpy(),
+                                                  full[name][column].to_numpy().astype(np.float32))
+                # Portfolio values keep float64, to the cent
+                self.assertEqual(compact[name].portfolio_value.dtype, np.float64)
+                np.testing.assert_array_equal(compact[name].portfolio_value, full[name].portfolio_value)
+
+    def test_memory_per_symbol(self):
+        _, full = self.run_symbol(0, 'full')
+        _, compact = self.run_symbol(0, 'compact')
+        self.assertLess(sum(r.nbytes for r in compact.values()), 0.6 * sum(r.nbytes for r in full.values()))
+
+    def test_apply_precision(self):
+        df = pd.DataFrame({'Position': [np.nan, 1.0, -1.0], 'Close': [1.0, 2.0, 3.0], 'Volume': [1, 2, 3]})
+        compact = apply_precision(df)
+        self.assertEqual(compact['Position'].dtype, np.float16)
+        np.testing.assert_array_equal(compact['Position'], df['Position'])
+        self.assertEqual(compact['Close'].dtype, np.float32)
+        self.assertEqual(compact['Volume'].dtype, df['Volume'].dtype)
+        # Integer positions store the undefined first week as flat
+        integer = apply_precision(df, {'position': np.int8})
+        self.assertEqual(list(integer['Position']), [0, 1, -1])
+        self.assertTrue(df['Position'].isna().iloc[0])
+
+    def test_categorize(self):
+        df = categorize(pd.DataFrame({'ETF': ['XLF', 'SPY', 'XLF'], 'PnL %': [1.0, 2.0, 3.0]}), ['ETF', 'Strategy'])
+        self.assertIsInstance(df['ETF'].dtype, pd.CategoricalDtype)
+        self.assertEqual(list(df['ETF'].unique()), ['XLF', 'SPY'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from macd_etf_analyzer.data import universe
+from macd_etf_analyzer.visualization import summary_plots
+from macd_etf_analyzer.visualization.render_cache import RenderCache, plot_inputs
+
+SUMMARY = pd.DataFrame({'ETF': ['XLF', 'TLT', 'EEM'], 'Best Strategy': ['MACD', 'VPVMA', 'MACD'],
+                        'Sharpe Ratio': [0.5, 0.2, -0.1], 'Annual Return (%)': [4.0, 2.0, -1.0],
+                        'Max Drawdown (%)': [-20.0, -10.0, -30.0], 'Win Ratio (%)': [55.0, 50.0, 40.0],
+                        'Number of Trades': [10, 12, 8]})
+
+@plot_inputs(['Sharpe Ratio'], 'sharpe.txt')
+def plot_sharpe(summary_df, output_dir):
+    scaled = summary_df['Sharpe Ratio'].map(lambda x: x * 2)
+    with open(os.path.join(output_dir, 'sharpe.txt'), 'w') as f:
+        f.write(scaled.to_string())
+
+@plot_inputs(['Sharpe Ratio'], 'sharpe.txt')
+def plot_sharpe_tripled(summary_df, output_dir):
+    scaled = summary_df['Sharpe Ratio'].map(lambda x: x * 3)
+    with open(os.path.join(output_dir, 'sharpe.txt'), 'w') as f:
+        f.write(scaled.to_string())
+
+# Same name as plot_sharpe, so only the constant in the nested lambda differs
+plot_sharpe_tripled.__qualname__ = plot_sharpe.__qualname__
+
+def add_no_category(summary_df):
+    return summary_df.assign(Category='All')
+
+# Looks like a package helper, so the fingerprint follows it
+add_no_category.__module__ = summary_plots.__name__
+
+class TestRenderCache(unittest.TestCase):
+    def test_unchanged_inputs_are_skipped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = RenderCache(tmp)
+            self.assertTrue(cache.render(plot_sharpe, SUMMARY))
+            cache.save()
+
+            cache = RenderCache(tmp)
+            self.assertFalse(cache.render(plot_sharpe, SUMMARY))
+            self.assertEqual(cache.skipped, ['sharpe.txt'])
+            # Other columns are not inputs of the plot
+            self.assertFalse(cache.render(plot_sharpe, SUMMARY.assign(ETF=['A', 'B', 'C'])))
+            self.assertTrue(cache.render(plot_sharpe, SUMMARY.assign(**{'Sharpe Ratio': [0.5, 0.2, 0.1]})))
+            os.remove(os.path.join(tmp, 'sharpe.txt'))
+            self.assertTrue(cache.render(plot_sharpe, SUMMARY.assign(**{'Sharpe Ratio': [0.5, 0.2, 0.1]})))
+
+    def test_code_changes_invalidate(self):
+        cache = RenderCache(tempfile.gettempdir())
+        self.assertNotEqual(cache.fingerprint(plot_sharpe, SUMMARY), cache.fingerprint(plot_sharpe_tripled, SUMMARY))
+
+        # plot_category_performance -> add_category_column -> get_category -> _SYMBOL_CATEGORY
+        plot = summary_plots.plot_category_performance
+        before = cache.fingerprint(plot, SUMMARY)
+        with mock.patch.dict(universe._SYMBOL_CATEGORY, {'XLF': 'Bond'}):
+            self.assertNotEqual(cache.fingerprint(plot, SUMMARY), before)
+        with mock.patch.object(summary_plots, 'add_category_column', add_no_category):
+            self.assertNotEqual(cache.fingerprint(plot, SUMMARY), before)
+        self.assertEqual(cache.fingerprint(plot, SUMMARY), before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import pandas as pd
+import numpy as np
+from macd_etf_analyzer.strategies.macd import get_macd_signals
+from macd_etf_analyzer.strategies.result import StrategyResult
+from macd_etf_analyzer.utils.costs import DEFAULT_COST_MODELS
+from macd_etf_analyzer.utils.performance import extract_trades, stop_loss_sensitivity
+from helpers import make_bars
+
+class TestStrategyResult(unittest.TestCase):
+    def setUp(self):
+        df = make_bars(0, start='2015-01-01', end='2020-12-31')
+        self.weekly_df = get_macd_signals(df=df, symbol='TEST', cost_models=DEFAULT_COST_MODELS)
+
+    def test_from_frame(self):
+        result = StrategyResult.from_frame('MACD', self.weekly_df)
+        self.assertIs(result.index, self.weekly_df.index)
+        self.assertEqual(result.position.dtype, np.float16)
+        self.assertEqual(result.strategy_returns.dtype, np.float32)
+        self.assertLess(result.nbytes, self.weekly_df.memory_usage(index=False).sum() / 2)
+
+        # Columns read back as Series matching the frame, with the first week's undefined position
+        np.testing.assert_allclose(result['Portfolio_Value'], self.weekly_df['Portfolio_Value'], rtol=1e-6)
+        self.assertTrue(np.isnan(result.position[0]))
+        for column in ['Signal_Position', 'Position', 'Position_Change']:
+            np.testing.assert_array_equal(result[column], self.weekly_df[column])
+        np.testing.assert_allclose(result['Net_Strategy_Returns_Base'], self.weekly_df['Net_Strategy_Returns_Base'],
+                                   rtol=1e-5, atol=1e-8)
+        self.assertIn('Net_Strategy_Returns_High', result.columns)
+        self.assertEqual(list(result.to_frame().columns), result.columns)
+
+    def test_reports_match_the_frame(self):
+        result = StrategyResult.from_frame('MACD', self.weekly_df, precision='full')
+        pd.testing.assert_frame_equal(extract_trades(result), extract_trades(self.weekly_df))
+        pd.testing.assert_frame_equal(stop_loss_sensitivity(result), stop_loss_sensitivity(self.weekly_df))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.__main__ import scan_etfs
+from macd_etf_analyzer.data.bars import resample_bars_many
+from macd_etf_analyzer.data.store import BarStore
+from macd_etf_analyzer.strategies.macd import compute_macd, crossover_positions
+from macd_etf_analyzer.strategies.result import STRATEGY_NAMES
+from macd_etf_analyzer.strategies.registry import STRATEGIES
+from macd_etf_analyzer.strategies.scan import scan_daily, scan_signals, warm_up_weeks
+from macd_etf_analyzer.strategies.vpvma import compute_vpvma
+from macd_etf_analyzer.utils.walk_forward import run_strategy
+from helpers import make_bars
+
+BARS = {'start': '2005-01-03', 'volatility': 0.012, 'open_noise': 0.002, 'high_low': 0.01,
+        'volume': (100000, 1000000)}
+
+class TestScan(unittest.TestCase):
+    def test_warm_up_weeks(self):
+        # (25/27)^240 and (8/10)^83 are both below 1e-8
+        self.assertEqual(warm_up_weeks('MACD'), 240 + 83)
+        self.assertEqual(warm_up_weeks('VPVMA Zero-Cross'), 12 + 26 - 1)
+        self.assertLess(warm_up_weeks('MACD', tol=1e-4), warm_up_weeks('MACD'))
+
+    def test_defaults_come_from_the_registry(self):
+        parameters = STRATEGIES['MACD'].parameters
+        self.assertEqual(warm_up_weeks('MACD'), warm_up_weeks('MACD', **parameters))
+        self.assertGreater(warm_up_weeks('MACD', slow_span=52), warm_up_weeks('MACD'))
+
+        bars = resample_bars_many({'S0': make_bars(0, 2000, **BARS)})
+        default = scan_signals(bars, strategies=['MACD'])
+        explicit = scan_signals(bars, strategies=['MACD'], params={'MACD': dict(parameters)})
+        pd.testing.assert_frame_equal(default, explicit)
+
+    def test_matches_full_computation(self):
+        # Long histories are scanned on a trailing window, the short one whole
+        frames = {f'S{seed}': make_bars(seed, periods, **BARS) for seed, periods in enumerate([4500, 5000, 3800, 300])}
+        vix_df = make_bars(99, 5000, **BARS)
+        scan_df = scan_daily(frames, vix_df)
+        self.assertEqual(len(scan_df), len(frames) * len(STRATEGY_NAMES))
+        self.assertLess(scan_df['Weeks Used'].min(), 100)
+
+        bars = resample_bars_many({**frames, '^VIX': vix_df})
+        weekly_vix = bars.pop('^VIX')[['Close']]
+        for _, row in scan_df.iterrows():
+            weekly_df = bars[row['ETF']]
+            full = run_strategy(row['Strategy'], weekly_df, weekly_vix)
+            if row['Strategy'].startswith('MACD'):
+                line, signal = compute_macd(weekly_df['Close'])
+                zero_line = 0
+            else:
+                line, signal = compute_vpvma(weekly_df, weekly_vix['Close'])
+                zero_line = weekly_df['Close']
+            position = crossover_positions(line, signal, zero_line if row['Strategy'].endswith('Zero-Cross') else None)
+            changes = np.flatnonzero(position.to_numpy()[1:] != position.to_numpy()[:-1]) + 1
+
+            self.assertEqual(row['Position'], full['Position'].iloc[-1], (row['ETF'], row['Strategy']))
+            self.assertEqual(row['Signal'], position.iloc[-1])
+            self.assertEqual(row['Last Crossover'], weekly_df.index[changes[-1]])
+            self.assertLess(abs(row['Distance'] - (line - signal).iloc[-1]), 1e-6 * row['Close'])
+
+    def test_cli_scans_the_store(self):
+        # Bars up to the last business day, so the store is current
+        end = pd.Timestamp.now(tz='US/Eastern').normalize().tz_localize(None) - pd.offsets.BDay(1)
+        recent = {**BARS, 'start': end - pd.offsets.BDay(1999), 'end': end}
+        frames = {f'S{seed}': make_bars(seed, **recent) for seed in range(3)}
+        vix_df = make_bars(99, **recent)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'store')
+            BarStore.create(path).append({**frames, '^VIX': vix_df})
+            output_file = os.path.join(tmp, 'summary', 'signal_scan.csv')
+            scan_df = scan_etfs(path, output_file=output_file)
+            saved = pd.read_csv(output_file)
+        pd.testing.assert_frame_equal(scan_df, scan_daily(frames, vix_df))
+        self.assertEqual(list(saved.columns), list(scan_df.columns))
+        self.assertEqual(list(saved['ETF'].unique()), list(frames))
+
+if __name__ == '__main__':
+    unittest.main()
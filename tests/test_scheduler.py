@@ -0,0 +1,53 @@
+import unittest
+import threading
+import time
+from macd_etf_analyzer.utils.scheduler import Scheduler
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = Scheduler(io_workers=2, cpu_workers=2, queue_factor=1)
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def test_lanes_are_bounded(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def task():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.pop()
+
+        futures = [self.scheduler.submit('cpu', task) for _ in range(10)]
+        for future in futures:
+            future.result()
+
+        stats = self.scheduler.stats()['cpu']
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(stats['Submitted'], 10)
+        self.assertEqual(stats['Completed'], 10)
+        self.assertLessEqual(stats['Max Queue Depth'], 2)
+        self.assertEqual(stats['Queue Depth'], 0)
+        self.assertGreater(stats['Utilization (%)'], 0)
+
+    def test_failures_are_counted(self):
+        def fail():
+            raise ValueError('boom')
+
+        future = self.scheduler.submit('io', fail)
+        with self.assertRaises(ValueError):
+            future.result()
+        self.scheduler.submit('io', lambda: None).result()
+
+        stats = self.scheduler.stats()['io']
+        self.assertEqual(stats['Failed'], 1)
+        self.assertEqual(stats['Completed'], 1)
+        self.assertTrue(self.scheduler.lane('io').has_capacity())
+
+if __name__ == '__main__':
+    unittest.main()
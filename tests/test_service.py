@@ -0,0 +1,98 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from macd_etf_analyzer.data.store import BarStore
+from macd_etf_analyzer.service import SignalService, make_server
+from macd_etf_analyzer.utils.costs import DEFAULT_COST_MODELS
+from macd_etf_analyzer.utils.performance import calculate_performance_metrics
+from macd_etf_analyzer.utils.walk_forward import run_strategy
+from helpers import make_bars
+
+class TestSignalService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.cwd = os.getcwd()
+        os.chdir(cls.tmp.name)
+        store = BarStore.create('store')
+        store.append({'AAA': make_bars(0), 'BBB': make_bars(1), '^VIX': make_bars(2)})
+        cls.service = SignalService(['AAA', 'BBB'], start_date='2010-01-01', end_date='2017-01-01',
+                                    store=BarStore('store'), max_backtests=1, backtest_wait=0.01).load()
+        cls.server = make_server(cls.service, port=0)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        os.chdir(cls.cwd)
+        cls.tmp.cleanup()
+
+    def request(self, path, method='GET'):
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url + path, method=method)) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    def test_signals_metrics_trades(self):
+        status, signals = self.request('/signals')
+        self.assertEqual(status, 200)
+        self.assertEqual([s['Symbol'] for s in signals], ['AAA', 'BBB'])
+
+        status, signal = self.request('/signals/AAA')
+        results, best_strategy, _ = self.service.results['AAA']
+        self.assertEqual(signal['Best Strategy'], best_strategy)
+        self.assertEqual(signal['Strategies']['MACD']['Position'], results['MACD'].position[-1])
+
+        status, metrics = self.request('/metrics/AAA')
+        self.assertEqual(set(metrics['Strategies']), set(results))
+
+        status, trades = self.request('/trades/AAA?strategy=VPVMA')
+        self.assertEqual(trades['Strategy'], 'VPVMA')
+        self.assertGreater(len(trades['Trades']), 0)
+
+        self.assertEqual(self.request('/signals/ZZZ')[0], 404)
+        self.assertEqual(self.request('/trades/AAA?strategy=Nope')[0], 404)
+
+    def test_backtest(self):
+        status, body = self.request('/backtest/AAA?strategy=MACD&fast_span=8&stop_loss_pct=0.1')
+        self.assertEqual(status, 200)
+        weekly_df, weekly_vix = self.service.bars['AAA']
+        expected = run_strategy('MACD', weekly_df, weekly_vix, fast_span=8, stop_loss_pct=0.1,
+                                cost_models=DEFAULT_COST_MODELS)
+        self.assertEqual(body['Metrics'], calculate_performance_metrics(expected))
+
+        self.assertEqual(self.request('/backtest/AAA?strategy=MACD&window=8')[0], 400)
+        self.assertEqual(self.request('/backtest/AAA?strategy=MACD&fast_span=x')[0], 400)
+        self.assertEqual(self.request('/backtest/AAA')[0], 400)
+        for query in ['strategy=MACD&fast_span=0', 'strategy=VPVMA&window=-3', 'strategy=MACD&stop_loss_pct=nan',
+                      'strategy=MACD&initial_capital=-1']:
+            status, body = self.request(f'/backtest/AAA?{query}')
+            self.assertEqual(status, 400, query)
+            self.assertIn('must be greater than', body['error'])
+
+        # With the only backtest slot taken, requests are rejected instead of piling up
+        self.service._backtests.acquire()
+        try:
+            self.assertEqual(self.request('/backtest/AAA?strategy=MACD')[0], 503)
+        finally:
+            self.service._backtests.release()
+
+    def test_load_writes_no_reports(self):
+        self.assertEqual(sorted(os.listdir('.')), ['store'])
+
+    def test_stats(self):
+        self.request('/signals/AAA')
+        status, stats = self.request('/stats')
+        self.assertEqual(stats['Symbols'], 2)
+        self.assertGreaterEqual(stats['Latency']['GET /signals']['Requests'], 1)
+        self.assertIn('p95 (ms)', stats['Latency']['GET /signals'])
+
+if __name__ == '__main__':
+    unittest.main()
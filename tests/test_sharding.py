@@ -0,0 +1,111 @@
+import os
+import time
+import tempfile
+import unittest
+import multiprocessing
+from macd_etf_analyzer.utils.sharding import (CLAIMED, DONE, FAILED, PENDING, ShardQueue, make_shards,
+                                              merge_results, run_coordinator, run_worker)
+
+SYMBOLS = [f'S{i:02d}' for i in range(20)]
+
+def fake_run(symbols, scale=1):
+    time.sleep(0.05)
+    return {symbol: (int(symbol[1:]) * scale, os.getpid()) for symbol in symbols}
+
+def crash_run(symbols, **options):
+    os._exit(1)
+
+def failing_run(symbols, **options):
+    if 'S05' in symbols:
+        raise ValueError('no data')
+    return fake_run(symbols, **options)
+
+def start_workers(queue_dir, run_shard, count, lease_seconds=600):
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=run_worker, args=(queue_dir, run_shard),
+                               kwargs={'lease_seconds': lease_seconds, 'poll_seconds': 0.02})
+               for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+class TestShardQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue_dir = os.path.join(self.tmp.name, 'queue')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_workers_share_the_queue(self):
+        workers = start_workers(self.queue_dir, fake_run, 3)
+        results, failures = run_coordinator(self.queue_dir, SYMBOLS, 3, options={'scale': 10}, poll_seconds=0.02)
+        for worker in workers:
+            worker.join(10)
+            self.assertEqual(worker.exitcode, 0)
+
+        self.assertEqual(failures, {})
+        self.assertEqual(list(results), SYMBOLS)
+        self.assertEqual([value for value, _ in results.values()], [10 * i for i in range(20)])
+        self.assertGreater(len({pid for _, pid in results.values()}), 1)
+        self.assertEqual(ShardQueue(self.queue_dir).status(), {PENDING: 0, CLAIMED: 0, DONE: 7, FAILED: 0})
+
+    def test_expired_lease_is_reassigned(self):
+        queue = ShardQueue(self.queue_dir, lease_seconds=0.5)
+        queue.create(make_shards(SYMBOLS, 4))
+        crashed = start_workers(self.queue_dir, crash_run, 1, lease_seconds=0.5)[0]
+        crashed.join(10)
+        self.assertEqual(crashed.exitcode, 1)
+        self.assertEqual(queue.status()[CLAIMED], 1)
+
+        workers = start_workers(self.queue_dir, fake_run, 2, lease_seconds=0.5)
+        for worker in workers:
+            worker.join(10)
+            self.assertEqual(worker.exitcode, 0)
+        self.assertTrue(queue.finished())
+        self.assertEqual(list(merge_results(queue)), SYMBOLS)
+
+    def test_stale_completion_is_ignored(self):
+        queue = ShardQueue(self.queue_dir, lease_seconds=0.2)
+        queue.create(make_shards(SYMBOLS, 10))
+        first = queue.claim('slow')
+        time.sleep(0.3)
+        self.assertEqual(queue.reclaim_expired(), [first.id])
+        second = queue.claim('fast')
+        self.assertEqual(second.id, first.id)
+
+        # The worker that lost the lease cannot renew, complete or fail the new claim
+        self.assertFalse(queue.renew(first.id, first.token))
+        self.assertFalse(queue.complete(first.id, {'S00': 'stale'}, first.token))
+        self.assertFalse(queue.fail(first.id, 'stale', first.token))
+        self.assertEqual(queue.status(), {PENDING: 1, CLAIMED: 1, DONE: 0, FAILED: 0})
+
+        self.assertTrue(queue.renew(second.id, second.token))
+        self.assertTrue(queue.complete(second.id, {'S00': 'fresh'}, second.token))
+        self.assertEqual(queue.results(), {second.id: {'S00': 'fresh'}})
+        self.assertEqual(queue.status(), {PENDING: 1, CLAIMED: 0, DONE: 1, FAILED: 0})
+        self.assertEqual(os.listdir(os.path.join(self.queue_dir, CLAIMED)), [])
+
+    def test_failed_shard_is_reported(self):
+        queue = ShardQueue(self.queue_dir)
+        queue.create(make_shards(SYMBOLS, 5))
+        self.assertEqual(run_worker(self.queue_dir, failing_run, poll_seconds=0.02), ['00000', '00001', '00002', '00003'])
+
+        self.assertTrue(queue.finished())
+        self.assertIn('no data', queue.failures()['00001'])
+        self.assertEqual(list(merge_results(queue)), SYMBOLS[:5] + SYMBOLS[10:])
+
+    def test_coordinator_resumes_only_the_same_run(self):
+        queue = ShardQueue(self.queue_dir)
+        queue.create(make_shards(SYMBOLS, 4), {'scale': 10})
+        run_worker(self.queue_dir, fake_run, poll_seconds=0.02)
+        results, _ = run_coordinator(self.queue_dir, SYMBOLS, 4, options={'scale': 10}, poll_seconds=0.02)
+        self.assertEqual([value for value, _ in results.values()], [10 * i for i in range(20)])
+
+        with self.assertRaisesRegex(ValueError, 'new queue directory'):
+            run_coordinator(self.queue_dir, SYMBOLS[:10], 4, options={'scale': 10}, poll_seconds=0.02)
+        with self.assertRaisesRegex(ValueError, 'new queue directory'):
+            run_coordinator(self.queue_dir, SYMBOLS, 4, options={'scale': 2}, poll_seconds=0.02)
+
+if __name__ == '__main__':
+    unittest.main()
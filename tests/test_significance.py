@@ -0,0 +1,88 @@
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.utils import significance
+from macd_etf_analyzer.utils.significance import (bootstrap_sharpe_pvalue, deflated_sharpe_ratio, random_entry_pvalue,
+                                                  run_significance_tests, stationary_bootstrap_indices)
+
+def make_returns(seed, mean, weeks=520):
+    return np.random.default_rng(seed).normal(mean, 0.02, weeks)
+
+class TestSignificance(unittest.TestCase):
+    def test_stationary_bootstrap_indices(self):
+        indices = stationary_bootstrap_indices(520, 2000, mean_block=8, rng=np.random.default_rng(0))
+        self.assertEqual(indices.shape, (2000, 520))
+        self.assertTrue(((indices >= 0) & (indices < 520)).all())
+        np.testing.assert_array_equal(indices, stationary_bootstrap_indices(520, 2000, 8, np.random.default_rng(0)))
+
+        # Blocks continue with probability 1 - 1/mean_block, wrapping at the end of the sample
+        continues = np.diff(indices, axis=1) % 520 == 1
+        self.assertAlmostEqual(continues.mean(), 1 - 1 / 8, delta=0.01)
+        # Every position is drawn about equally often
+        counts = np.bincount(indices.ravel(), minlength=520) / indices.size
+        np.testing.assert_allclose(counts, 1 / 520, rtol=0.15)
+
+    def test_bootstrap_pvalue(self):
+        rng = np.random.default_rng(1)
+        self.assertLess(bootstrap_sharpe_pvalue(make_returns(0, 0.005), 2000, rng=rng), 0.01)
+        self.assertGreater(bootstrap_sharpe_pvalue(make_returns(0, 0.0), 2000, rng=rng), 0.05)
+        # Under the null, p-values are roughly uniform
+        pvalues = np.array([bootstrap_sharpe_pvalue(make_returns(seed, 0.0), 500, rng=rng) for seed in range(100)])
+        self.assertAlmostEqual((pvalues < 0.1).mean(), 0.1, delta=0.08)
+
+    def test_random_entry_pvalue(self):
+        rng = np.random.default_rng(2)
+        market = make_returns(0, 0.0)
+        # Positions right about the week's direction 60% of the time beat random timing; random ones do not
+        informed = np.where(np.random.default_rng(3).random(len(market)) < 0.6, np.sign(market), -np.sign(market))
+        self.assertLess(random_entry_pvalue(informed, market, 2000, rng=rng), 0.01)
+        random = np.random.default_rng(4).choice([-1.0, 0.0, 1.0], len(market))
+        self.assertGreater(random_entry_pvalue(random, market, 2000, rng=rng), 0.05)
+
+    def test_deflated_sharpe(self):
+        significant = make_returns(0, 0.005)
+        null = make_returns(0, 0.0)
+        trials = [0.05, 0.1, -0.02, 0.2]
+        self.assertGreater(deflated_sharpe_ratio(significant, trials), 0.95)
+        self.assertLess(deflated_sharpe_ratio(null, trials), 0.5)
+        # More (and more dispersed) trials raise the bar
+        self.assertLess(deflated_sharpe_ratio(significant, trials + [0.3, -0.3] * 10),
+                        deflated_sharpe_ratio(significant, trials))
+        # A single trial is the probabilistic Sharpe against zero
+        self.assertAlmostEqual(deflated_sharpe_ratio(significant, [0.25]), deflated_sharpe_ratio(significant, [0.0]))
+
+    def test_annualization_only_scales_the_sharpe(self):
+        index = pd.date_range('2010-01-01', periods=520, freq='W-FRI')
+        market = make_returns(5, 0.0)
+        position = np.sign(np.random.default_rng(6).normal(size=520))
+        df = pd.DataFrame({'Strategy_Returns': position * market, 'Position': position, 'Returns': market}, index=index)
+        etf_results = {'XLF': ({'MACD': df, 'VPVMA': df.assign(Strategy_Returns=make_returns(7, 0.004))}, 'MACD', {})}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            weekly = run_significance_tests(etf_results, n_resamples=500, max_workers=1, output_dir=tmp)
+            monthly = run_significance_tests(etf_results, n_resamples=500, max_workers=1, output_dir=tmp,
+                                             periods_per_year=12)
+        np.testing.assert_allclose(weekly['Sharpe Ratio'] / np.sqrt(52), monthly['Sharpe Ratio'] / np.sqrt(12))
+        columns = ['Bootstrap p-value', 'Random-Entry p-value', 'Deflated Sharpe']
+        pd.testing.assert_frame_equal(weekly[columns], monthly[columns])
+
+    def test_workers_are_spawned(self):
+        # The reports run inside a threaded pipeline, where forked workers could inherit held locks
+        pools = []
+        def record_pool(*args, **kwargs):
+            pools.append(kwargs.get('mp_context'))
+            return ProcessPoolExecutor(*args, **kwargs)
+
+        df = pd.DataFrame({'Strategy_Returns': make_returns(0, 0.0), 'Position': 1.0, 'Returns': make_returns(0, 0.0)},
+                          index=pd.date_range('2010-01-01', periods=520, freq='W-FRI'))
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(significance, 'ProcessPoolExecutor', record_pool):
+            significance_df = run_significance_tests({'XLF': ({'MACD': df}, 'MACD', {})}, n_resamples=100,
+                                                     max_workers=1, output_dir=tmp)
+        self.assertEqual([context.get_start_method() for context in pools], ['spawn'])
+        self.assertEqual(len(significance_df), 1)
+
+if __name__ == '__main__':
+    unittest.main()
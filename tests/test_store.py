@@ -0,0 +1,138 @@
+import os
+import pickle
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.data.store import BarStore, update_store
+from macd_etf_analyzer.data.bars import resample_weekly
+from helpers import make_bars
+
+class TestBarStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'store')
+        self.spy = make_bars(0, 1500, '2015-01-01', open_noise=0.002)
+        self.vix = make_bars(1, 1500, '2015-01-01', open_noise=0.002)
+        self.qqq = make_bars(2, 1000, '2016-06-01', open_noise=0.002)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_append_and_read(self):
+        store = BarStore.create(self.path, capacity=1000)
+        store.append({'SPY': self.spy.iloc[:900], '^VIX': self.vix.iloc[:900]})
+        reader = BarStore(self.path)
+        # Appending past the capacity moves the bars to a larger file
+        store.append({'SPY': self.spy.iloc[900:], '^VIX': self.vix.iloc[900:], 'QQQ': self.qqq})
+        self.assertEqual(len(reader), 900)
+        self.assertEqual(reader.frame('SPY')['Close'].iloc[-1], self.spy['Close'].iloc[899])
+
+        reader = BarStore(self.path)
+        self.assertEqual(len(reader), 1500)
+        self.assertEqual(reader.symbols, ['SPY', '^VIX', 'QQQ'])
+        for symbol, df in [('SPY', self.spy), ('QQQ', self.qqq)]:
+            frame = reader.frame(symbol)
+            np.testing.assert_array_equal(frame.index, df.index)
+            np.testing.assert_array_equal(frame.to_numpy(), df.to_numpy(dtype=float))
+            self.assertTrue(np.shares_memory(frame['Close'].to_numpy(), reader.field('Close')))
+
+        df, vix_df = reader.load('QQQ', '2017-01-01', '2018-01-01')
+        expected = self.qqq.loc['2017-01-01':'2017-12-31']
+        np.testing.assert_array_equal(df.index, expected.index)
+        self.assertEqual(len(vix_df), len(df))
+        pd.testing.assert_frame_equal(resample_weekly(reader.frame('SPY')), resample_weekly(self.spy),
+                                      check_dtype=False, check_freq=False)
+
+        with self.assertRaises(ValueError):
+            reader.frame('SPY').to_numpy()[0, 0] = 0.0
+        with self.assertRaises(ValueError):
+            reader.append({'SPY': self.spy})
+
+    def test_pickle_reopens_read_only(self):
+        store = BarStore.create(self.path)
+        store.append({'SPY': self.spy})
+        clone = pickle.loads(pickle.dumps(store))
+        self.assertEqual(clone.mode, 'r')
+        pd.testing.assert_frame_equal(clone.frame('SPY'), store.frame('SPY'))
+
+    def test_rejects_days_inside_calendar(self):
+        store = BarStore.create(self.path)
+        store.append({'SPY': self.spy})
+        weekend = pd.DataFrame({'Close': [1.0]}, index=pd.DatetimeIndex(['2015-01-03'], tz='US/Eastern'))
+        with self.assertRaises(ValueError):
+            store.append({'XYZ': weekend})
+        self.assertNotIn('XYZ', BarStore(self.path))
+
+    def test_frame_leaves_out_days_without_bars(self):
+        store = BarStore.create(self.path)
+        gappy = self.qqq.drop(self.qqq.index[100:110])
+        store.append({'SPY': self.spy, 'QQQ': gappy})
+        frame = store.frame('QQQ')
+        np.testing.assert_array_equal(frame.index, gappy.index)
+        self.assertFalse(frame.isna().any().any())
+        self.assertEqual(len(store.frame('QQQ', '2015-01-01', self.qqq.index[50])), 50)
+
+    def test_update_store_appends_new_days(self):
+        full = {'SPY': self.spy, '^VIX': self.vix, 'QQQ': self.qqq}
+        requests = []
+
+        def fetch(ranges):
+            requests.append(ranges)
+            results = {}
+            for symbol, (start, end) in ranges.items():
+                df = full[symbol].loc[start:end]
+                results[symbol] = df[df.index < pd.Timestamp(end, tz='US/Eastern')]
+            return results
+
+        end = self.spy.index[1000].date()
+        appended, failures = update_store(self.path, ['SPY'], fetch, '2015-01-01', end)
+        self.assertEqual(appended, {'SPY': 1000, '^VIX': 1000})
+        store = BarStore(self.path)
+        self.assertTrue(store.covers('SPY', end))
+        self.assertFalse(store.covers('SPY', self.spy.index[1200].date()))
+        self.assertFalse(store.covers('QQQ', end))
+
+        later = self.spy.index[-1].date() + pd.Timedelta(days=1)
+        appended, failures = update_store(self.path, ['SPY', 'QQQ'], fetch, '2015-01-01', later)
+        self.assertEqual(requests[-1]['SPY'], (str(end), str(later)))
+        self.assertEqual(requests[-1]['QQQ'][0], '2015-01-01')
+        self.assertEqual(appended, {'SPY': 500, 'QQQ': 1000, '^VIX': 500})
+        store = BarStore(self.path)
+        for symbol, df in full.items():
+            np.testing.assert_array_equal(store.frame(symbol).to_numpy(), df.to_numpy(dtype=float))
+
+        # Up to date: nothing is fetched
+        self.assertEqual(update_store(self.path, ['SPY'], fetch, '2015-01-01', later), ({}, {}))
+
+        # Without an end date the bars must reach today
+        self.assertTrue(store.covers('SPY', later))
+        self.assertFalse(store.covers('SPY'))
+
+    def test_failed_fetch_leaves_the_symbol_stale(self):
+        full = {'SPY': self.spy, '^VIX': self.vix, 'QQQ': self.qqq}
+
+        def fetch(ranges):
+            results = {}
+            for symbol, (start, end) in ranges.items():
+                df = full[symbol].loc[start:end]
+                results[symbol] = df[df.index < pd.Timestamp(end, tz='US/Eastern')]
+            if 'QQQ' in ranges and ranges['QQQ'][0] != '2015-01-01':
+                results['QQQ'] = ConnectionError('provider unavailable')
+            return results
+
+        end = self.spy.index[1000].date()
+        update_store(self.path, ['SPY', 'QQQ'], fetch, '2015-01-01', end)
+        later = self.spy.index[-1].date() + pd.Timedelta(days=1)
+        appended, failures = update_store(self.path, ['SPY', 'QQQ'], fetch, '2015-01-01', later)
+        self.assertEqual(list(failures), ['QQQ'])
+        self.assertNotIn('QQQ', appended)
+
+        # The calendar moved on with SPY, but QQQ's bars still end at the first update
+        store = BarStore(self.path)
+        self.assertTrue(store.covers('SPY', later))
+        self.assertTrue(store.covers('QQQ', end))
+        self.assertFalse(store.covers('QQQ', later))
+
+if __name__ == '__main__':
+    unittest.main()
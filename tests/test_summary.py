@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from macd_etf_analyzer.data.bars import resample_bars_many
+from macd_etf_analyzer.strategies.result import StrategyResult
+from macd_etf_analyzer.utils.summary import collect_trades, generate_trade_logs_summary, trade_statistics
+from macd_etf_analyzer.utils.walk_forward import run_strategy
+from helpers import make_bars
+
+def make_etf_results():
+    etf_results = {}
+    for seed, (etf, best) in enumerate([('EEM', 'MACD'), ('XLF', 'MACD Zero-Cross'), ('TLT', 'MACD'),
+                                        ('XLK', 'MACD')]):
+        weekly_df = resample_bars_many({etf: make_bars(seed, volatility=0.015)})[etf]
+        results = {best: StrategyResult.from_frame(best, run_strategy(best, weekly_df, None), index=weekly_df.index)}
+        etf_results[etf] = (results, best, {best: 0.0})
+    return etf_results
+
+class TestTradeStatistics(unittest.TestCase):
+    def test_statistics_match_filtered_groups(self):
+        trades_df = collect_trades(make_etf_results())
+        stats = trade_statistics(trades_df)
+        self.assertEqual(stats.loc['ETF'].index.tolist(), ['EEM', 'XLF', 'TLT', 'XLK'])
+        self.assertEqual(stats.loc['Strategy'].index.tolist(), ['MACD', 'MACD Zero-Cross'])
+        self.assertEqual(stats.loc['Category'].index.tolist(), ['Country/Region', 'Sector', 'Bond'])
+
+        categories = {'EEM': 'Country/Region', 'XLF': 'Sector', 'XLK': 'Sector', 'TLT': 'Bond'}
+        for level, column in [('ETF', trades_df['ETF']), ('Strategy', trades_df['Strategy']),
+                              ('Category', trades_df['ETF'].map(categories).astype(str)),
+                              ('Overall', pd.Series('All', index=trades_df.index))]:
+            for group, row in stats.loc[level].iterrows():
+                group_trades = trades_df[column == group]
+                pnl = group_trades['PnL %'].astype(float)
+                self.assertEqual(row['Total Trades'], len(group_trades))
+                self.assertEqual(row['Winning Trades'], (pnl > 0).sum())
+                self.assertEqual(row['Losing Trades'], (pnl <= 0).sum())
+                self.assertAlmostEqual(row['Average PnL %'], pnl.mean(), places=10)
+                self.assertAlmostEqual(row['Worst Trade %'], pnl.min(), places=10)
+                self.assertAlmostEqual(row['Average Duration (days)'], group_trades['Duration (days)'].mean(),
+                                       places=10)
+
+    def test_report_is_rendered_from_the_table(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            report_file, csv_file = generate_trade_logs_summary(make_etf_results(), tmp)
+            stats = pd.read_csv(os.path.join(tmp, 'trade_statistics.csv'), index_col=['Level', 'Group'])
+            with open(report_file) as f:
+                report = f.read()
+            self.assertEqual(len(pd.read_csv(csv_file)), stats.loc[('Overall', 'All'), 'Total Trades'])
+
+        self.assertIn(f"Total Trades: {stats.loc[('Overall', 'All'), 'Total Trades']}\n", report)
+        self.assertIn(f"XLF:\n  Total Trades: {stats.loc[('ETF', 'XLF'), 'Total Trades']}\n", report)
+        self.assertIn(f"Sector:\n  Total Trades: {stats.loc[('Category', 'Sector'), 'Total Trades']}\n", report)
+
+if __name__ == '__main__':
+    unittest.main()
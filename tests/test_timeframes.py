@@ -0,0 +1,28 @@
+import unittest
+from macd_etf_analyzer.data.bars import resample_bars_many
+from macd_etf_analyzer.utils.performance import performance_values
+from macd_etf_analyzer.utils.timeframes import run_timeframes
+from macd_etf_analyzer.utils.walk_forward import run_strategy
+from helpers import make_bars
+
+class TestTimeframes(unittest.TestCase):
+    def test_one_table_keyed_by_timeframe(self):
+        frames = {'AAA': make_bars(0), 'BBB': make_bars(1)}
+        vix_df = make_bars(2)
+        timeframe_df = run_timeframes(frames, vix_df, stop_loss_pct=0.1)
+        self.assertEqual(list(timeframe_df.index.unique('Timeframe')), ['D', 'W', 'ME'])
+        self.assertEqual(len(timeframe_df), 3 * 2 * 4)
+        self.assertEqual(timeframe_df.loc[('D', 'AAA', 'MACD'), 'Bars'], 2000)
+
+        # Each row is the strategy on that timeframe's bars, annualized with its bars per year
+        for freq, annualization in [('W', 52), ('ME', 12)]:
+            bars = resample_bars_many({'BBB': frames['BBB'], '^VIX': vix_df}, freq)
+            expected = performance_values(run_strategy('VPVMA', bars['BBB'], bars['^VIX'][['Close']],
+                                                       stop_loss_pct=0.1), annualization)
+            row = timeframe_df.loc[(freq, 'BBB', 'VPVMA')]
+            self.assertEqual(row['Periods Per Year'], annualization)
+            for name, value in expected.items():
+                self.assertAlmostEqual(row[name], value, places=10)
+
+if __name__ == '__main__':
+    unittest.main()
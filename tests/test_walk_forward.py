@@ -0,0 +1,66 @@
+import itertools
+import unittest
+import numpy as np
+import pandas as pd
+from macd_etf_analyzer.data.bars import resample_bars_many
+from macd_etf_analyzer.strategies.features import FeatureStore
+from macd_etf_analyzer.utils.walk_forward import (PARAMETER_GRIDS, run_strategy, run_walk_forward, search_grid,
+                                                   walk_forward_folds)
+from helpers import make_bars
+
+class TestWalkForward(unittest.TestCase):
+    def test_fold_boundaries(self):
+        folds = walk_forward_folds(300, train_weeks=100, test_weeks=52)
+        self.assertEqual(folds, [(0, 100, 152), (52, 152, 204), (104, 204, 256), (156, 256, 300)])
+        # Test windows follow their train windows and tile the weeks after the first train window
+        for (train_start, train_end, test_end), next_fold in zip(folds, folds[1:] + [None]):
+            self.assertEqual(train_end - train_start, 100)
+            if next_fold is not None:
+                self.assertEqual(next_fold[1], test_end)
+        self.assertEqual(folds[-1][2], 300)
+        self.assertEqual(walk_forward_folds(100, train_weeks=100), [])
+
+    def test_out_of_sample_segments_are_stitched(self):
+        weekly_df = resample_bars_many({'AAA': make_bars(0, volatility=0.015)})['AAA']
+        grid = {'fast_span': [8, 12], 'slow_span': [26], 'signal_span': [9], 'stop_loss_pct': [0.05, 0.1]}
+        oos_df, folds_df = run_walk_forward(weekly_df, strategy='MACD', grid=grid, train_weeks=156, test_weeks=52,
+                                            max_workers=2, initial_capital=1000)
+
+        folds = walk_forward_folds(len(weekly_df), 156, 52)
+        self.assertEqual(len(folds_df), len(folds))
+        self.assertTrue(oos_df.index.equals(weekly_df.index[156:]))
+        for (_, train_end, test_end), (_, fold) in zip(folds, folds_df.iterrows()):
+            self.assertEqual(fold['Test Start'], weekly_df.index[train_end])
+            self.assertEqual(fold['Test End'], weekly_df.index[test_end - 1])
+            # Each segment is the fold's chosen parameters run on the history up to its test end
+            params = {name: fold[name] for name in grid}
+            params = {name: (int(value) if name != 'stop_loss_pct' else value) for name, value in params.items()}
+            expected = run_strategy('MACD', weekly_df.iloc[:test_end], None, **params)['Strategy_Returns']
+            pd.testing.assert_series_equal(oos_df['Strategy_Returns'].iloc[train_end - 156:test_end - 156],
+                                           expected.iloc[train_end:], check_names=False)
+
+        np.testing.assert_allclose(oos_df['Portfolio_Value'], 1000 * (1 + oos_df['Strategy_Returns']).cumprod())
+
+    def test_grid_shares_features(self):
+        bars = resample_bars_many({'AAA': make_bars(0, volatility=0.015), '^VIX': make_bars(1)})
+        history, weekly_vix = bars['AAA'].iloc[:300], bars['^VIX'][['Close']]
+        for strategy in ['MACD', 'VPVMA']:
+            grid = PARAMETER_GRIDS[strategy]
+            grid_size = int(np.prod([len(values) for values in grid.values()]))
+            features = FeatureStore(history, weekly_vix)
+            best_params, best_sharpe = search_grid(strategy, history, weekly_vix, grid, 100, features)
+            # Every distinct EMA / rolling mean is computed once for the whole grid
+            self.assertLess(features.computed, grid_size)
+            self.assertEqual(features.computed, len(features))
+
+            # Same choice as running every grid point on its own store
+            sharpes = {}
+            for values in itertools.product(*grid.values()):
+                params = dict(zip(grid, values))
+                returns = run_strategy(strategy, history, weekly_vix, **params)['Strategy_Returns'].iloc[100:]
+                sharpes[values] = np.sqrt(52) * returns.mean() / returns.std()
+            self.assertEqual(tuple(best_params.values()), max(sharpes, key=sharpes.get))
+            self.assertAlmostEqual(best_sharpe, max(sharpes.values()))
+
+if __name__ == '__main__':
+    unittest.main()
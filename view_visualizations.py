@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Script to view the generated visualizations.
-This script opens the visualization images in the default image viewer.
+This script opens the HTML dashboard if it exists, otherwise the
+visualization images in the default image viewer.
 """
 
 import os
@@ -48,6 +49,14 @@ def main():
         print("Please run the MACD ETF analyzer first to generate visualizations.")
         sys.exit(1)
     
+    # Prefer the single self-contained dashboard over the individual PNGs
+    dashboard_file = os.path.join(summary_dir, 'dashboard.html')
+    if os.path.exists(dashboard_file) and '--png' not in sys.argv:
+        print("Opening dashboard.html...")
+        open_file(dashboard_file)
+        print("\nDashboard opened in your default browser (pass --png to open the images instead).")
+        return
+    
     # Open each visualization file
     for filename in visualization_files:
         filepath = os.path.join(summary_dir, filename)